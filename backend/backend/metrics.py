@@ -0,0 +1,385 @@
+"""
+Request instrumentation.
+
+``PerformanceMiddleware`` times every request and records, for it:
+
+* wall time,
+* database queries and their time, captured by an execute wrapper that
+  stays on each connection and reports to the request in the current
+  context (so queries made through ``sync_to_async`` count too),
+* time spent in serializers using ``TimedSerializerMixin``,
+* the response size (not known for streaming responses).
+
+These are returned in a ``Server-Timing`` header and folded into per-route
+histograms, which ``metrics_view`` serves in the Prometheus text format.
+Requests slower than ``PERF_METRICS["SLOW_REQUEST_MS"]`` are logged with
+their queries, for a ``SLOW_SAMPLE_RATE`` share of them.
+
+Views declare a ``query_budget`` (the most queries one request may run,
+authentication included, as a number or a dict per HTTP method) and other
+code can wrap a block in
+``query_budget(n)``; see ``PERF_METRICS["QUERY_BUDGETS"]`` for what happens
+when one is exceeded.
+
+The histograms live in the process: with several workers, each reports its
+own, and Prometheus sums them across scrape targets.
+"""
+import hmac
+import logging
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ContextDecorator, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import Http404, HttpResponse
+
+logger = logging.getLogger(__name__)
+
+MAX_LOGGED_QUERIES = 100
+UNMATCHED_ROUTE = "<unmatched>"
+
+_current = ContextVar("request_stats", default=None)
+
+
+# ─────────────────────────────────────────
+# Per-request stats
+# ─────────────────────────────────────────
+class RequestStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.db_seconds = 0.0
+        self.queries = []
+        self.serialize_seconds = 0.0
+        self._depth = 0
+
+    def record_query(self, sql, elapsed):
+        self.query_count += 1
+        self.db_seconds += elapsed
+        if len(self.queries) < MAX_LOGGED_QUERIES:
+            self.queries.append((sql, elapsed))
+
+    def merge(self, other):
+        self.query_count += other.query_count
+        self.db_seconds += other.db_seconds
+        self.queries.extend(other.queries[:MAX_LOGGED_QUERIES - len(self.queries)])
+        self.serialize_seconds += other.serialize_seconds
+
+    def query_listing(self):
+        return "\n".join(f"  {elapsed * 1000:8.2f}ms  {sql}" for sql, elapsed in self.queries)
+
+    @contextmanager
+    def serializing(self):
+        # Nested serializers (and list children) count once, at the outermost.
+        self._depth += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if not self._depth:
+                self.serialize_seconds += time.perf_counter() - started
+
+
+def _record_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.record_query(sql, time.perf_counter() - started)
+
+
+def install():
+    """Put the query recorder on this thread's connections (idempotent)."""
+    for alias in connections:
+        wrappers = connections[alias].execute_wrappers
+        if _record_query not in wrappers:
+            wrappers.append(_record_query)
+
+
+class TimedSerializerMixin:
+    """Counts a serializer's ``to_representation`` towards the request's serializer time."""
+
+    def to_representation(self, instance):
+        stats = _current.get()
+        if stats is None:
+            return super().to_representation(instance)
+        with stats.serializing():
+            return super().to_representation(instance)
+
+
+# ─────────────────────────────────────────
+# Histograms (Prometheus text format)
+# ─────────────────────────────────────────
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}"
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels, buckets):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_values, value):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                # One slot per bucket plus the overflow above the largest.
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def collect(self):
+        with self._lock:
+            series = {key: (list(counts), total, count) for key, (counts, total, count) in self._series.items()}
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        bounds = [f'le="{bound}"' for bound in self.buckets] + ['le="+Inf"']
+        for label_values, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_labels(self.labels, label_values, bound)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, label_values)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labels, label_values)} {count}")
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+class Counter:
+    def __init__(self, name, help_text, labels):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def collect(self):
+        with self._lock:
+            values = dict(self._values)
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines.extend(
+            f"{self.name}{_labels(self.labels, label_values)} {value}"
+            for label_values, value in sorted(values.items())
+        )
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROUTE = ("method", "route")
+
+REQUESTS = Counter("http_requests_total", "Requests served.", ROUTE + ("status",))
+DURATION = Histogram("http_request_duration_seconds", "Request wall time.", ROUTE, SECONDS)
+DB_TIME = Histogram("http_request_db_seconds", "Time in database queries per request.", ROUTE, SECONDS)
+QUERIES = Histogram(
+    "http_request_db_queries", "Database queries per request.", ROUTE,
+    (0, 1, 2, 3, 5, 10, 20, 50, 100, 200),
+)
+SERIALIZE_TIME = Histogram(
+    "http_request_serialize_seconds", "Time in serializers per request.", ROUTE, SECONDS,
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes", "Response body size (non-streaming responses).", ROUTE,
+    (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+)
+METRICS = (REQUESTS, DURATION, DB_TIME, QUERIES, SERIALIZE_TIME, RESPONSE_SIZE)
+
+
+def render_metrics():
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.collect())
+    return "\n".join(lines) + "\n"
+
+
+def clear_metrics():
+    for metric in METRICS:
+        metric.clear()
+
+
+# ─────────────────────────────────────────
+# Middleware
+# ─────────────────────────────────────────
+def _route(request):
+    match = getattr(request, "resolver_match", None)
+    return match.route if match is not None and match.route else UNMATCHED_ROUTE
+
+
+def _view_budget(request):
+    """The view's ``query_budget``: a number, or one per HTTP method."""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return None
+    view = getattr(match.func, "view_class", match.func)
+    budget = getattr(view, "query_budget", None)
+    return budget.get(request.method) if isinstance(budget, dict) else budget
+
+
+def _server_timing(stats, total):
+    return ", ".join((
+        f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.query_count} queries"',
+        f"serialize;dur={stats.serialize_seconds * 1000:.1f}",
+        f"app;dur={(total - stats.db_seconds - stats.serialize_seconds) * 1000:.1f}",
+        f"total;dur={total * 1000:.1f}",
+    ))
+
+
+class PerformanceMiddleware:
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        install()
+        stats = RequestStats()
+        token = _current.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, stats)
+
+    async def __acall__(self, request):
+        # Connections are per thread: the ORM runs on the request's
+        # thread-sensitive thread, so that is where the recorder goes.
+        await sync_to_async(install)()
+        stats = RequestStats()
+        token = _current.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, stats)
+
+    def _finish(self, request, response, stats):
+        total = time.perf_counter() - stats.started
+        config = settings.PERF_METRICS
+        route = (request.method, _route(request))
+
+        REQUESTS.inc(route + (str(response.status_code),))
+        DURATION.observe(route, total)
+        DB_TIME.observe(route, stats.db_seconds)
+        QUERIES.observe(route, stats.query_count)
+        SERIALIZE_TIME.observe(route, stats.serialize_seconds)
+        if not response.streaming:
+            RESPONSE_SIZE.observe(route, len(response.content))
+
+        budget = _view_budget(request)
+        if budget is not None:
+            check_budget(f"{request.method} {_route(request)}", budget, stats)
+        if config["SERVER_TIMING"]:
+            response["Server-Timing"] = _server_timing(stats, total)
+        if total * 1000 >= config["SLOW_REQUEST_MS"] and random.random() < config["SLOW_SAMPLE_RATE"]:
+            logger.warning(
+                "Slow request: %s %s took %.1fms, %d queries in %.1fms\n%s",
+                request.method, request.get_full_path(), total * 1000,
+                stats.query_count, stats.db_seconds * 1000, stats.query_listing(),
+            )
+        return response
+
+
+# ─────────────────────────────────────────
+# Query budgets
+# ─────────────────────────────────────────
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def check_budget(label, limit, stats):
+    """
+    Act on ``stats`` running over ``limit`` queries, as
+    ``PERF_METRICS["QUERY_BUDGETS"]`` says: "raise", "log" or "off".
+    """
+    mode = settings.PERF_METRICS["QUERY_BUDGETS"]
+    if mode == "off" or stats.query_count <= limit:
+        return
+    message = (
+        f"{label} ran {stats.query_count} queries, over its budget of {limit}:\n"
+        f"{stats.query_listing()}"
+    )
+    if mode == "raise":
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+class query_budget(ContextDecorator):
+    """
+    At most ``limit`` queries in the block (or decorated function). Inside
+    a request, the block's queries still count towards the request.
+    """
+
+    def __init__(self, limit, label=None):
+        self.limit = limit
+        self.label = label
+
+    def _recreate_cm(self):
+        # A fresh instance per call, so a decorated function is reentrant.
+        return type(self)(self.limit, self.label)
+
+    def __enter__(self):
+        install()
+        self.stats = RequestStats()
+        self._outer = _current.get()
+        self._token = _current.set(self.stats)
+        return self.stats
+
+    def __exit__(self, exc_type, exc, traceback):
+        _current.reset(self._token)
+        if self._outer is not None:
+            self._outer.merge(self.stats)
+        if exc_type is None:
+            check_budget(self.label or "Block", self.limit, self.stats)
+        return False
+
+
+# ─────────────────────────────────────────
+# Metrics endpoint
+# ─────────────────────────────────────────
+def metrics_view(request):
+    """
+    Prometheus scrape target, protected by ``PERF_METRICS["TOKEN"]`` sent as
+    ``Authorization: Bearer <token>``; without a token configured it is off.
+    """
+    token = settings.PERF_METRICS["TOKEN"]
+    if not token:
+        raise Http404
+    supplied = request.headers.get("Authorization", "").removeprefix("Bearer ")
+    if not hmac.compare_digest(supplied.encode(), token.encode()):
+        return HttpResponse("Unauthorized.\n", status=401, content_type="text/plain")
+    return HttpResponse(render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,74 @@
+"""
+JSON rendering through orjson, when it is installed.
+
+The bytes are the same as DRF's ``JSONRenderer`` with its default (compact,
+unicode, strict) settings: anything orjson does not encode natively goes
+through DRF's own encoder, and output that might differ — floats orjson
+spells differently, integers or keys it refuses — is rendered by the
+standard library instead. The one exception is NaN and infinity, which
+DRF refuses with an error and orjson writes as ``null``.
+"""
+import re
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# orjson writes 1e16, 1e-7 and 1e-5 as "1e16", "1e-7" and "0.00001"; the
+# standard library as "1e+16", "1e-07" and "1e-05". Either shape sends the
+# data to the slow path; a match inside a string only costs the speed-up.
+_EXPONENT = re.compile(rb"e-?\d")
+_SMALL = b"0.0000"
+
+
+def _may_differ(rendered):
+    if _EXPONENT.search(rendered):
+        return True
+    # Only as a number of its own: seconds such as "10.00001" are fine.
+    start = rendered.find(_SMALL)
+    while start != -1:
+        if start == 0 or rendered[start - 1] in b":,[-":
+            return True
+        start = rendered.find(_SMALL, start + 1)
+    return False
+
+
+_encoder = JSONEncoder()
+
+
+def _stdlib_dumps(data):
+    return JSONRenderer().render(data)
+
+
+def _defaults():
+    return api_settings.COMPACT_JSON and api_settings.UNICODE_JSON and api_settings.STRICT_JSON
+
+
+def dumps(data):
+    """``data`` as ``JSONRenderer().render(data)`` would render it."""
+    if orjson is None or not _defaults():
+        return _stdlib_dumps(data)
+    try:
+        rendered = orjson.dumps(
+            data, default=_encoder.default, option=orjson.OPT_PASSTHROUGH_DATETIME
+        )
+    except orjson.JSONEncodeError:
+        return _stdlib_dumps(data)
+    if _may_differ(rendered):
+        return _stdlib_dumps(data)
+    # DRF escapes the two line terminators that are valid JSON but not JavaScript.
+    return rendered.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+
+
+class FastJSONRenderer(JSONRenderer):
+    """``JSONRenderer`` using ``dumps`` unless indentation is asked for."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
@@ -0,0 +1,44 @@
+"""
+Database routing.
+
+Reads made inside ``use_replica()`` go to the ``replica`` alias when one
+is configured; all other reads and every write use ``default``.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+
+REPLICA = "replica"
+
+_read_from_replica = ContextVar("read_from_replica", default=False)
+
+
+@contextmanager
+def use_replica(enabled=True):
+    token = _read_from_replica.set(enabled)
+    try:
+        yield
+    finally:
+        _read_from_replica.reset(token)
+
+
+def replica_configured():
+    return REPLICA in connections.settings
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _read_from_replica.get() and replica_configured():
+            return REPLICA
+        return None
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA
@@ -5,6 +5,7 @@ Generated by 'django-admin startproject' using Django 5.2.4
 
 from pathlib import Path
 from datetime import timedelta
+from importlib.util import find_spec
 import os
 from dotenv import load_dotenv
 
@@ -49,6 +50,7 @@ INSTALLED_APPS = [
 # ────────────────────────────────────────────
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",          # keep first for CORS pre-flight
+    "backend.metrics.PerformanceMiddleware",          # times everything below it
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -66,14 +68,94 @@ WSGI_APPLICATION = "backend.wsgi.application"
 ASGI_APPLICATION = "backend.asgi.application"
 
 # ────────────────────────────────────────────
-# Database — SQLite for dev; switch via env vars later
+# Database — SQLite for dev; PostgreSQL via DB_* env vars
+#   DB_ENGINE=postgresql DB_NAME DB_USER DB_PASSWORD DB_HOST DB_PORT
+#   DB_POOL=true        psycopg pool (DB_POOL_MIN_SIZE / _MAX_SIZE / _TIMEOUT)
+#   DB_CONN_MAX_AGE=60  persistent connections when not pooling
+#   DB_REPLICA_HOST     read replica for the analytics views (other
+#                       DB_REPLICA_* values default to the primary's)
+#   DB_SQLITE_TUNED=true  WAL, relaxed fsync, bigger cache, mmap and
+#                         BEGIN IMMEDIATE writes (see _sqlite_options)
 # ────────────────────────────────────────────
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+def _env_flag(name, default):
+    return os.getenv(name, default).lower() == "true"
+
+
+def _postgres(prefix, fallback=None):
+    fallback = fallback or {}
+
+    def env(key, default=""):
+        return os.getenv(f"{prefix}_{key}", fallback.get(key, default))
+
+    pooled = _env_flag("DB_POOL", "true")
+    options = {}
+    if pooled:
+        options["pool"] = {
+            "min_size": int(os.getenv("DB_POOL_MIN_SIZE", 2)),
+            "max_size": int(os.getenv("DB_POOL_MAX_SIZE", 10)),
+            "timeout": int(os.getenv("DB_POOL_TIMEOUT", 10)),
+        }
+    return {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": env("NAME", "expenses"),
+        "USER": env("USER", "postgres"),
+        "PASSWORD": env("PASSWORD"),
+        "HOST": env("HOST", "localhost"),
+        "PORT": env("PORT", "5432"),
+        # The pool keeps connections itself; Django refuses both at once.
+        "CONN_MAX_AGE": 0 if pooled else int(os.getenv("DB_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": _env_flag("DB_CONN_HEALTH_CHECKS", "true"),
+        "OPTIONS": options,
     }
-}
+
+
+def _sqlite_options():
+    if not _env_flag("DB_SQLITE_TUNED", "true"):
+        return {}
+    pragmas = {
+        # Readers no longer block on the writer, nor the writer on readers.
+        "journal_mode": "WAL",
+        # With WAL, NORMAL only risks the last commits on power loss, never
+        # corruption, and skips an fsync per transaction.
+        "synchronous": "NORMAL",
+        # Negative cache_size is in KiB.
+        "cache_size": -int(os.getenv("DB_SQLITE_CACHE_KB", 64 * 1024)),
+        "mmap_size": int(os.getenv("DB_SQLITE_MMAP_BYTES", 256 * 1024 * 1024)),
+        "temp_store": "MEMORY",
+    }
+    return {
+        "init_command": ";".join(f"PRAGMA {name}={value}" for name, value in pragmas.items()),
+        # Take the write lock when the transaction starts, so concurrent
+        # writers queue on the busy timeout rather than failing with
+        # "database is locked" when a read lock cannot be upgraded.
+        "transaction_mode": "IMMEDIATE",
+        # Busy timeout, in seconds.
+        "timeout": int(os.getenv("DB_SQLITE_TIMEOUT", 20)),
+    }
+
+
+if os.getenv("DB_ENGINE", "sqlite") == "postgresql":
+    _primary = _postgres("DB")
+    DATABASES = {"default": _primary}
+    if os.getenv("DB_REPLICA_HOST"):
+        DATABASES["replica"] = {
+            **_postgres("DB_REPLICA", fallback={
+                key: _primary[key] for key in ("NAME", "USER", "PASSWORD", "PORT")
+            }),
+            "TEST": {"MIRROR": "default"},
+        }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.getenv("DB_NAME", BASE_DIR / "db.sqlite3"),
+            "OPTIONS": _sqlite_options(),
+        }
+    }
+
+# Reads inside backend.routers.use_replica() go to "replica" when configured
+DATABASE_ROUTERS = ["backend.routers.ReplicaRouter"]
+DATABASE_REPLICA_STICKY_SECONDS = int(os.getenv("DB_REPLICA_STICKY_SECONDS", 5))
 
 # ────────────────────────────────────────────
 # Templates
@@ -104,11 +186,20 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticated",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "users.authentication.LazyJWTAuthentication",
     ),
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
     ],
+    # Same bytes as DRF's JSONRenderer; orjson-backed when it is installed.
+    "DEFAULT_RENDERER_CLASSES": [
+        "backend.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    # Reverse proxies in front of the app that append to X-Forwarded-For.
+    # With 0 the header is ignored and clients are told apart by the socket
+    # address; see AUTH_THROTTLES.
+    "NUM_PROXIES": int(os.getenv("NUM_PROXIES", 0)),
 }
 
 SIMPLE_JWT = {
@@ -119,8 +210,102 @@ SIMPLE_JWT = {
     "BLACKLIST_AFTER_ROTATION": True,
 }
 
+# Each process answers "is this refresh token blacklisted?" from a Bloom
+# filter kept within SYNC_SECONDS of the database (users/tokens.py); purge
+# expired tokens with `manage.py purge_tokens`.
+TOKEN_BLACKLIST_FILTER = {
+    "ENABLED": _env_flag("TOKEN_BLACKLIST_FILTER", "true"),
+    "SYNC_SECONDS": float(os.getenv("TOKEN_BLACKLIST_SYNC_SECONDS", 1.0)),
+}
+
+# ────────────────────────────────────────────
+# Password hashing — PROFILE encodes new passwords (argon2 when argon2-cffi
+# is installed, else pbkdf2); the rest verify older hashes, which are
+# rehashed at the next login. Hashes run on WORKERS threads with up to
+# QUEUE callers waiting; more get a 503 (users/hashers.py).
+# ────────────────────────────────────────────
+PASSWORD_HASHING = {
+    "PROFILE": os.getenv("PASSWORD_HASHER", "auto"),               # auto | argon2 | pbkdf2 | scrypt
+    "ARGON2_TIME_COST": int(os.getenv("ARGON2_TIME_COST", 2)),
+    "ARGON2_MEMORY_KIB": int(os.getenv("ARGON2_MEMORY_KIB", 19456)),
+    "ARGON2_PARALLELISM": int(os.getenv("ARGON2_PARALLELISM", 1)),
+    "PBKDF2_ITERATIONS": int(os.getenv("PBKDF2_ITERATIONS", 1_000_000)),
+    "WORKERS": int(os.getenv("PASSWORD_HASH_WORKERS", 2)),
+    "QUEUE": int(os.getenv("PASSWORD_HASH_QUEUE", 8)),
+}
+if PASSWORD_HASHING["PROFILE"] == "auto":
+    PASSWORD_HASHING["PROFILE"] = "argon2" if find_spec("argon2") else "pbkdf2"
+_HASHERS = {
+    "argon2": "users.hashers.Argon2PasswordHasher",
+    "pbkdf2": "users.hashers.PBKDF2PasswordHasher",
+    "scrypt": "users.hashers.ScryptPasswordHasher",
+}
+PASSWORD_HASHERS = [
+    _HASHERS.pop(PASSWORD_HASHING["PROFILE"]),
+    *_HASHERS.values(),
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+]
+
+# Token buckets per client IP and per account on register, login and
+# change-password; refused requests never reach a hasher (users/throttling.py).
+# The client IP is X-Forwarded-For's entry NUM_PROXIES hops from the end, or
+# REMOTE_ADDR when NUM_PROXIES is 0: set it to the number of proxies in front
+# of the app, or every request shares the proxy's bucket — and too high a
+# number lets clients pick their own bucket with a forged header.
+AUTH_THROTTLES = {
+    "ENABLED": _env_flag("AUTH_THROTTLE", "true"),
+    "BACKEND": os.getenv("AUTH_THROTTLE_BACKEND", "auto"),         # auto | lru | django
+    "IP": {
+        "BURST": int(os.getenv("AUTH_THROTTLE_IP_BURST", 20)),
+        "PER_MINUTE": float(os.getenv("AUTH_THROTTLE_IP_PER_MINUTE", 10)),
+    },
+    "ACCOUNT": {
+        "BURST": int(os.getenv("AUTH_THROTTLE_ACCOUNT_BURST", 5)),
+        "PER_MINUTE": float(os.getenv("AUTH_THROTTLE_ACCOUNT_PER_MINUTE", 1)),
+    },
+}
+
 AUTH_USER_MODEL = "users.User"                              # custom user model to be created
 
+# Tokens are checked against the user's row, cached for ROW_TTL seconds;
+# deactivations reach other workers within that unless CACHES is shared
+# (users/authentication.py).
+USER_CACHE = {
+    "BACKEND": os.getenv("USER_CACHE_BACKEND", "auto"),       # auto | lru | django
+    "ROW_TTL": int(os.getenv("USER_CACHE_ROW_TTL", 5)),
+}
+
+# ────────────────────────────────────────────
+# Response cache — dashboard / series / recent
+# "auto" uses CACHES when configured, else a bounded in-process LRU
+# ────────────────────────────────────────────
+EXPENSES_RESPONSE_CACHE = {
+    "BACKEND": os.getenv("EXPENSES_CACHE_BACKEND", "auto"),   # auto | lru | django
+    "ALIAS": "default",
+    "MAX_ENTRIES": int(os.getenv("EXPENSES_CACHE_MAX_ENTRIES", 2048)),
+    "TIMEOUT": int(os.getenv("EXPENSES_CACHE_TIMEOUT", 300)),
+}
+
+# Serve the dashboard/series/recent endpoints from async views; turn on
+# when running under an ASGI server (uvicorn, daphne).
+EXPENSES_ASYNC_VIEWS = _env_flag("EXPENSES_ASYNC_VIEWS", "false")
+
+# ────────────────────────────────────────────
+# Request instrumentation — Server-Timing headers, /metrics/ (Prometheus)
+# and slow-request logging; the endpoint is off until a token is set.
+# Views over their query budget are logged under DEBUG and fail the tests
+# (backend.testing.QueryBudgetTestRunner sets "raise").
+# ────────────────────────────────────────────
+PERF_METRICS = {
+    # Per-phase timings and query counts are for developers, not visitors.
+    "SERVER_TIMING": _env_flag("PERF_SERVER_TIMING", str(DEBUG)),
+    "SLOW_REQUEST_MS": float(os.getenv("PERF_SLOW_REQUEST_MS", 500)),
+    "SLOW_SAMPLE_RATE": float(os.getenv("PERF_SLOW_SAMPLE_RATE", 1.0)),
+    "TOKEN": os.getenv("METRICS_TOKEN", ""),
+    "QUERY_BUDGETS": os.getenv("PERF_QUERY_BUDGETS", "log" if DEBUG else "off"),  # raise | log | off
+}
+TEST_RUNNER = "backend.testing.QueryBudgetTestRunner"
+
 # ────────────────────────────────────────────
 # Internationalisation
 # ────────────────────────────────────────────
@@ -134,6 +319,16 @@ USE_TZ = True
 # ────────────────────────────────────────────
 STATIC_URL = "static/"
 
+# ────────────────────────────────────────────
+# Uploaded files (CSV statement imports)
+# ────────────────────────────────────────────
+MEDIA_ROOT = BASE_DIR / "media"
+EXPENSE_IMPORT_WORKERS = int(os.getenv("EXPENSE_IMPORT_WORKERS", 2))
+# Checked once the upload is in; cap request bodies at the proxy as well.
+EXPENSE_IMPORT_MAX_BYTES = int(os.getenv("EXPENSE_IMPORT_MAX_BYTES", 50 * 1024 * 1024))
+ACCOUNT_DELETION_WORKERS = int(os.getenv("ACCOUNT_DELETION_WORKERS", 1))  # users/deletion.py
+EXPENSE_SYNC_TOMBSTONE_DAYS = int(os.getenv("EXPENSE_SYNC_TOMBSTONE_DAYS", 90))  # expenses/sync.py
+
 # ────────────────────────────────────────────
 # CORS — wide open for local React dev
 # ────────────────────────────────────────────
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class QueryBudgetTestRunner(DiscoverRunner):
+    """
+    Runs the suite with every view's ``query_budget`` enforced, and the auth
+    throttles off: tests that want them turn them back on.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._budgets = override_settings(
+            PERF_METRICS={**settings.PERF_METRICS, "QUERY_BUDGETS": "raise"},
+            AUTH_THROTTLES={**settings.AUTH_THROTTLES, "ENABLED": False},
+        )
+        self._budgets.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._budgets.disable()
+        super().teardown_test_environment(**kwargs)
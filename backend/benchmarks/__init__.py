@@ -0,0 +1,91 @@
+"""
+Stand-alone benchmarks. Run from ``backend/`` as ``python -m benchmarks.<name>``.
+
+Each benchmark calls ``setup()`` first, which points Django at a scratch
+SQLite file (never the development database) and migrates it.
+"""
+import atexit
+import os
+import tempfile
+
+import django
+from django.conf import settings
+
+
+def setup(database=None, **overrides):
+    from backend import settings as project_settings
+
+    if database is None:
+        handle, database = tempfile.mkstemp(prefix="bench-", suffix=".sqlite3")
+        os.close(handle)
+        atexit.register(_remove_database, database)
+    values = {
+        name: getattr(project_settings, name)
+        for name in dir(project_settings) if name.isupper()
+    }
+    values["DEBUG"] = False
+    default = project_settings.DATABASES["default"]
+    if default["ENGINE"] != "django.db.backends.sqlite3":
+        default = {"ENGINE": "django.db.backends.sqlite3"}
+    values["DATABASES"] = {"default": {**default, "NAME": database}}
+    values.update(overrides)
+    settings.configure(**values)
+    django.setup()
+
+    from django.core.management import call_command
+    call_command("migrate", verbosity=0)
+    return database
+
+
+def _remove_database(path):
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def percentile(samples, fraction):
+    """The ``fraction`` percentile of ``samples`` (seconds), in milliseconds."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))
+    return round(ordered[index] * 1000, 2)
+
+
+def rss_bytes():
+    """Current resident set size (Linux), falling back to the peak."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def seed_expenses(user, rows, batch_size=10_000):
+    """Insert ``rows`` plain expenses for ``user`` spread over ~3 years."""
+    from datetime import timedelta
+    from decimal import Decimal
+
+    from django.utils import timezone
+
+    from expenses import sync
+    from expenses.models import Expense
+
+    today = timezone.now().date()
+    categories = list(Expense.Category.values)
+    methods = list(Expense.PaymentMethod.values)
+    for start in range(0, rows, batch_size):
+        batch = [
+            Expense(
+                owner=user,
+                amount=Decimal(i % 50_000 + 1) / 100,
+                category=categories[i % len(categories)],
+                payment_method=methods[i % len(methods)],
+                description=f"expense {i}",
+                date=today - timedelta(days=i % 1000),
+            )
+            for i in range(start, min(start + batch_size, rows))
+        ]
+        sync.stamp(batch)
+        Expense.objects.bulk_create(batch)
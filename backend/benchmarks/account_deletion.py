@@ -0,0 +1,95 @@
+"""
+Deleting an account with a large history: in the request vs in the background.
+
+    python -m benchmarks.account_deletion --expenses 1000000
+
+Seeds two users with ``--expenses`` expenses each. The first is deleted as
+``ProfileView`` used to, with ``user.delete()`` in one transaction. The
+second goes through the pipeline: ``DELETE /api/users/profile/`` returns at
+once, then ``run_deletion`` purges the rows ``--chunk-size`` at a time.
+Reports the request time, the purge time and rate, the longest single write
+transaction (what other writers wait behind) and the process's peak RSS
+after each phase.
+"""
+import argparse
+import json
+import time
+from types import SimpleNamespace
+
+from benchmarks import seed_expenses, setup
+
+
+def peak_rss_mb():
+    import resource
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--expenses", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=None)
+    args = parser.parse_args()
+
+    setup()
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from users import deletion
+
+    User = get_user_model()
+    in_request, pipelined = (
+        User.objects.create_user(username=name, email=f"{name}@example.com", password="bench-pass")
+        for name in ("in-request", "pipelined")
+    )
+    started = time.perf_counter()
+    seed_expenses(in_request, args.expenses)
+    seed_expenses(pipelined, args.expenses)
+    report = {"expenses": args.expenses, "seed_seconds": round(time.perf_counter() - started, 1)}
+
+    # The pipeline first: the peak RSS only ever grows.
+    transactions = []
+    delete_chunk = deletion.delete_chunk
+
+    def timed_chunk(queryset, chunk_size):
+        began = time.perf_counter()
+        deleted = delete_chunk(queryset, chunk_size)
+        transactions.append(time.perf_counter() - began)
+        return deleted
+
+    deletion.delete_chunk = timed_chunk
+    # Run the queued job here rather than on the background pool, to time it.
+    queued = []
+    deletion._executor = SimpleNamespace(submit=lambda fn, job_id: queued.append(job_id))
+    client = Client(headers={"Authorization": f"Bearer {AccessToken.for_user(pipelined)}"})
+    client.get("/api/users/profile/")  # warm up
+    started = time.perf_counter()
+    response = client.delete("/api/users/profile/")
+    request_ms = (time.perf_counter() - started) * 1000
+    assert response.status_code == 202, response.status_code
+    # Only the purge is timed, not its wait for other workers to refuse the tokens.
+    deletion.time = SimpleNamespace(sleep=lambda seconds: None)
+    started = time.perf_counter()
+    job = deletion.run_deletion(queued[0], chunk_size=args.chunk_size or deletion.CHUNK_SIZE)
+    elapsed = time.perf_counter() - started
+    report["pipeline"] = {
+        "request_ms": round(request_ms, 1),
+        "purge_seconds": round(elapsed, 1),
+        "rows_per_second": round(job.rows_deleted / elapsed),
+        "longest_transaction_ms": round(max(transactions) * 1000, 1),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+    started = time.perf_counter()
+    in_request.delete()
+    elapsed = time.perf_counter() - started
+    report["in_request"] = {
+        "request_ms": round(elapsed * 1000, 1),
+        "longest_transaction_ms": round(elapsed * 1000, 1),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
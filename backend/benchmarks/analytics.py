@@ -0,0 +1,159 @@
+"""
+Columnar reports (NumPy) vs the same reports as per-row Python loops.
+
+    python -m benchmarks.analytics --rows 1000000
+
+Both sides start from data already in memory: ``analytics.load`` columns
+for NumPy, the ``values_list`` row tuples for the loops. Load times are
+reported separately. Each report is checked to give the same answer both
+ways before it is timed (median of ``--repeat`` runs).
+"""
+import argparse
+import json
+import statistics
+import time
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from benchmarks import seed_expenses, setup
+
+PERCENTILES = (50, 90, 99)
+
+
+def timed(fn, repeat):
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        runs.append(time.perf_counter() - started)
+    return result, statistics.median(runs)
+
+
+# ── per-row reference implementations ──
+def loop_rolling_average(rows, end, days, window):
+    per_day = defaultdict(Decimal)
+    for day, amount, _, _ in rows:
+        per_day[day] += amount
+    first = end - timedelta(days=days - 1)
+    report = []
+    for i in range(days):
+        day = first + timedelta(days=i)
+        total = sum(per_day.get(day - timedelta(days=back), 0) for back in range(window))
+        report.append({"day": day.isoformat(), "average": round(float(total) / window, 2)})
+    return report
+
+
+def loop_category_percentiles(rows, categories):
+    groups = defaultdict(list)
+    for _, amount, category, _ in rows:
+        groups[category].append(int(amount * 100))
+    report = {}
+    for category in categories:
+        values = sorted(groups.get(category, ()))
+        if not values:
+            continue
+        entry = {"count": len(values)}
+        for p in PERCENTILES:
+            rank = (len(values) - 1) * p / 100
+            low = int(rank)
+            high = min(low + 1, len(values) - 1)
+            value = values[low] + (values[high] - values[low]) * (rank - low)
+            entry[f"p{p}"] = round(value / 100, 2)
+        report[category] = entry
+    return report
+
+
+def loop_monthly_changes(rows):
+    per_month = defaultdict(Decimal)
+    for day, amount, _, _ in rows:
+        per_month[(day.year, day.month)] += amount
+    if not per_month:
+        return []
+    (year, month), last = min(per_month), max(per_month)
+    totals = []
+    while (year, month) <= last:
+        totals.append(((year, month), per_month.get((year, month), Decimal(0))))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+    def change(current, base):
+        return round(float((current - base) / base * 100), 2) if base > 0 else None
+
+    report = []
+    for i, ((year, month), total) in enumerate(totals):
+        previous = totals[i - 1][1] if i >= 1 else Decimal(0)
+        year_ago = totals[i - 12][1] if i >= 12 else Decimal(0)
+        report.append({
+            "month": f"{year:04d}-{month:02d}",
+            "total": round(float(total), 2),
+            "change_pct": change(total, previous),
+            "yoy_change_pct": change(total, year_ago),
+        })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--window", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    setup()
+    from django.contrib.auth import get_user_model
+    from django.utils import timezone
+
+    from expenses import analytics
+    from expenses.models import Expense
+
+    user = get_user_model().objects.create_user(
+        username="bench", email="bench@example.com", password="bench-pass"
+    )
+    seed_expenses(user, args.rows)
+    today = timezone.now().date()
+
+    columns, load_columns = timed(lambda: analytics.load(user), 1)
+    rows, load_rows = timed(lambda: list(
+        Expense.objects.filter(owner=user).order_by()
+        .values_list("date", "amount", "category", "payment_method")
+        .iterator(chunk_size=analytics.LOAD_CHUNK)
+    ), 1)
+
+    reports = {
+        "rolling_average": (
+            lambda: analytics.rolling_average(columns, today, args.days, args.window),
+            lambda: loop_rolling_average(rows, today, args.days, args.window),
+        ),
+        "category_percentiles": (
+            lambda: analytics.category_percentiles(columns, PERCENTILES),
+            lambda: loop_category_percentiles(rows, analytics.CATEGORIES),
+        ),
+        "monthly_changes": (
+            lambda: analytics.monthly_changes(columns),
+            lambda: loop_monthly_changes(rows),
+        ),
+    }
+    results = []
+    for name, (vectorised, looped) in reports.items():
+        fast, fast_s = timed(vectorised, args.repeat)
+        slow, slow_s = timed(looped, args.repeat)
+        if fast != slow:
+            raise SystemExit(f"{name}: NumPy and loop results differ")
+        results.append({
+            "report": name,
+            "numpy_ms": round(fast_s * 1000, 2),
+            "loop_ms": round(slow_s * 1000, 2),
+            "speedup": round(slow_s / fast_s, 1),
+        })
+    print(json.dumps({
+        "rows": args.rows,
+        "load_columns_s": round(load_columns, 2),
+        "load_rows_s": round(load_rows, 2),
+        "column_bytes": sum(column.nbytes for column in columns),
+        "reports": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
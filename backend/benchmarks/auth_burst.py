@@ -0,0 +1,122 @@
+"""
+Expense endpoint latency during a burst of logins.
+
+    python -m benchmarks.auth_burst --threads 8 --requests 100
+
+``--threads`` clients log in over and over from one address while the main
+thread times ``--requests`` calls to the expense list. Phases:
+
+- ``idle``: no logins, for reference.
+- ``unbounded``: a hashing pool as wide as the burst, as when every request
+  worker hashed for itself.
+- ``pooled``: one hashing thread, every login waiting its turn.
+- ``shedding``: one hashing thread and one waiting login; the rest get 503.
+- ``throttled``: ``pooled`` with the auth throttles at their defaults, so
+  the flood is mostly refused with 429.
+
+Prints JSON with the expense list's p50/p95/p99 and the login responses by
+status code for each phase. Refused logins come back in about a
+millisecond, so in the last two phases the flood threads spin and their
+own client-side work competes with the timed requests.
+"""
+import argparse
+import json
+import threading
+import time
+from collections import Counter
+
+from benchmarks import percentile, seed_expenses, setup
+
+PASSWORD = "bench-pass"
+
+
+def phase(expense_client, login_threads, requests, login):
+    stop = threading.Event()
+    statuses = Counter()
+    lock = threading.Lock()
+
+    def flood():
+        from django.db import connection
+        while not stop.is_set():
+            status = login()
+            with lock:
+                statuses[status] += 1
+        connection.close()
+
+    threads = [threading.Thread(target=flood) for _ in range(login_threads)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.5 if threads else 0)  # let the burst build up
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = expense_client.get("/api/expenses/")
+        latencies.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.status_code
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return {
+        "expenses_p50_ms": percentile(latencies, 0.50),
+        "expenses_p95_ms": percentile(latencies, 0.95),
+        "expenses_p99_ms": percentile(latencies, 0.99),
+        "logins": dict(sorted(statuses.items())),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--expenses", type=int, default=1000)
+    args = parser.parse_args()
+
+    from backend import settings as project_settings
+
+    setup(
+        PERF_METRICS={**project_settings.PERF_METRICS, "SLOW_REQUEST_MS": float("inf")},
+        AUTH_THROTTLES={**project_settings.AUTH_THROTTLES, "ENABLED": False},
+    )
+    from django.contrib.auth import get_user_model
+    from django.test import Client, override_settings
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from users import hashers
+    from users.throttling import buckets
+
+    user = get_user_model().objects.create_user(
+        username="bench", email="bench@example.com", password=PASSWORD
+    )
+    seed_expenses(user, args.expenses)
+    expense_client = Client(headers={"Authorization": f"Bearer {AccessToken.for_user(user)}"})
+    login_client = Client()
+
+    def login():
+        return login_client.post(
+            "/api/users/login/", {"email": user.email, "password": PASSWORD},
+            content_type="application/json",
+        ).status_code
+
+    report = {
+        "hasher": project_settings.PASSWORD_HASHERS[0],
+        "threads": args.threads,
+        "idle": phase(expense_client, 0, args.requests, login),
+    }
+    pools = {
+        "unbounded": hashers.HashingPool(args.threads, 0),
+        "pooled": hashers.HashingPool(1, args.threads),
+        "shedding": hashers.HashingPool(1, 1),
+    }
+    for name, pool in pools.items():
+        hashers.hashing_pool = pool
+        report[name] = phase(expense_client, args.threads, args.requests, login)
+
+    hashers.hashing_pool = pools["pooled"]
+    buckets.clear()
+    with override_settings(AUTH_THROTTLES=project_settings.AUTH_THROTTLES):
+        report["throttled"] = phase(expense_client, args.threads, args.requests, login)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
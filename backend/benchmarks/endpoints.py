@@ -0,0 +1,470 @@
+"""
+Latency and throughput of every API endpoint, in-process, WSGI and ASGI.
+
+    python -m benchmarks.endpoints --users 1000 --expenses 1000 --output before.json
+    python -m benchmarks.endpoints --compare before.json after.json
+
+Seeds a scratch database with ``generate_sample_data`` (seeded, so every
+run sees the same data), then drives each endpoint ``--requests`` times
+through Django's test ``Client`` (WSGI) and ``AsyncClient`` (ASGI, with
+the async analytics views), each in its own process. Requests go round a
+pool of ``--pool`` users with real JWTs; reads skip the response cache
+unless ``--cached``. Writes run create → update → delete, so a round
+leaves the data as it found it; password-hashing endpoints run a tenth as
+often. Prints JSON with p50/p95/p99 latency and requests/s per endpoint,
+stamped with the commit, for diffing with ``--compare``.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import timedelta
+
+from benchmarks import _remove_database, percentile, setup
+
+PREFIX = "sample"
+PASSWORD = "sample-password"
+BULK_ITEMS = 100
+
+
+# ─────────────────────────────────────────
+# Scenarios
+# ─────────────────────────────────────────
+class Pool:
+    """The benchmark users, their tokens and the rows scenarios act on."""
+
+    def __init__(self, size):
+        from django.contrib.auth import get_user_model
+        from django.utils import timezone
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        from expenses.models import Budget, Expense, ImportJob, RecurringExpense
+
+        self.today = timezone.now().date()
+        self.users = list(
+            get_user_model().objects.filter(username__startswith=PREFIX).order_by("id")[:size]
+        )
+        self.tokens = {user.id: str(AccessToken.for_user(user)) for user in self.users}
+        ids = [user.id for user in self.users]
+        self.expense = dict(Expense.objects.filter(owner_id__in=ids).values_list("owner_id", "id"))
+        self.budget = dict(Budget.objects.filter(owner_id__in=ids).values_list("owner_id", "id"))
+        self.rule = dict(RecurringExpense.objects.filter(owner_id__in=ids).values_list("owner_id", "id"))
+        self.job = dict(ImportJob.objects.filter(owner_id__in=ids).values_list("owner_id", "id"))
+        # Rows written by one scenario for the next ones to act on, per user.
+        self.created = {}
+        self.registered = []
+
+    def push(self, user, kind, value):
+        self.created.setdefault((kind, user.id), []).append(value)
+
+    def pop(self, user, kind):
+        return self.created[(kind, user.id)].pop()
+
+    def peek(self, user, kind):
+        return self.created[(kind, user.id)][-1]
+
+
+def _expense(pool, **fields):
+    return {
+        "amount": "23.40", "category": "GROCERIES", "payment_method": "DEBIT_CARD",
+        "description": "Benchmark", "date": pool.today.isoformat(), **fields,
+    }
+
+
+def _rule(pool):
+    return {**_expense(pool), "frequency": "MONTHLY", "start_date": pool.today.isoformat()}
+
+
+# One budget per category: a user's Nth budget (the pool starts with a
+# GROCERIES one) takes the Nth other category, good for 8 rounds of the pool.
+BUDGET_CATEGORIES = (
+    "DINING_OUT", "TRANSPORTATION", "ENTERTAINMENT", "UTILITIES",
+    "HOUSING", "HEALTHCARE", "EDUCATION", "OTHER",
+)
+
+
+def _budget(pool, user):
+    made = len(pool.created.get(("budget", user.id), []))
+    return {"category": BUDGET_CATEGORIES[made % len(BUDGET_CATEGORIES)], "amount": "120.00"}
+
+
+def _refresh(pool, user):
+    from rest_framework_simplejwt.tokens import RefreshToken
+    return {"refresh": str(RefreshToken.for_user(user))}
+
+
+def _upload(pool, user):
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    return {"file": SimpleUploadedFile(
+        "expenses.csv", b"date,amount,category,payment_method,description\n", "text/csv",
+    )}
+
+
+def _register(pool, user):
+    return {
+        "email": f"bench-{uuid.uuid4().hex}@example.com", "first_name": "Bench", "last_name": "User",
+        "password": PASSWORD, "confirm_password": PASSWORD,
+    }
+
+
+def _ids(response):
+    return [row["id"] for row in response.json()["results"]]
+
+
+# Each scenario: (name, method, path(pool, user), body(pool, user) or None,
+# after(pool, user, response) or None, options). Order matters: writes
+# leave rows behind for the scenarios after them to update and delete.
+SCENARIOS = [
+    ("expenses.list", "GET", lambda p, u: "/api/expenses/", None, None, {}),
+    ("expenses.list_filtered", "GET",
+     lambda p, u: f"/api/expenses/?category=GROCERIES&min_date={p.today - timedelta(days=90)}",
+     None, None, {}),
+    ("expenses.detail", "GET", lambda p, u: f"/api/expenses/{p.expense[u.id]}/", None, None, {}),
+    ("expenses.recent", "GET", lambda p, u: "/api/expenses/recent/", None, None, {}),
+    ("expenses.dashboard", "GET", lambda p, u: "/api/expenses/dashboard/", None, None, {}),
+    ("expenses.series_daily", "GET", lambda p, u: "/api/expenses/series/daily/?days=90", None, None, {}),
+    ("expenses.series", "GET",
+     lambda p, u: "/api/expenses/series/?series=day:30&series=week:12:category&series=month:12",
+     None, None, {}),
+    ("expenses.reports", "GET", lambda p, u: "/api/expenses/reports/", None, None, {}),
+    ("expenses.distribution", "GET",
+     lambda p, u: f"/api/expenses/distribution/?from={(p.today - timedelta(days=365)):%Y-%m}",
+     None, None, {}),
+    ("expenses.search", "GET", lambda p, u: "/api/expenses/search/?q=star", None, None, {}),
+    ("expenses.export_csv", "GET",
+     lambda p, u: f"/api/expenses/export/csv/?min_date={p.today - timedelta(days=90)}",
+     None, None, {}),
+    ("expenses.create", "POST", lambda p, u: "/api/expenses/", lambda p, u: _expense(p),
+     lambda p, u, r: p.push(u, "expense", r.json()["id"]), {}),
+    ("expenses.update", "PATCH", lambda p, u: f"/api/expenses/{p.peek(u, 'expense')}/",
+     lambda p, u: {"amount": "31.00", "category": "DINING_OUT"}, None, {}),
+    ("expenses.delete", "DELETE", lambda p, u: f"/api/expenses/{p.pop(u, 'expense')}/",
+     None, None, {}),
+    ("expenses.bulk_create", "POST", lambda p, u: "/api/expenses/bulk/",
+     lambda p, u: [_expense(p, description=f"Bulk {i}") for i in range(BULK_ITEMS)],
+     lambda p, u, r: p.push(u, "bulk", _ids(r)), {}),
+    ("expenses.bulk_update", "PATCH", lambda p, u: "/api/expenses/bulk/",
+     lambda p, u: [{"id": i, "amount": "1.50"} for i in p.peek(u, "bulk")], None, {}),
+    ("expenses.bulk_delete", "DELETE", lambda p, u: "/api/expenses/bulk/",
+     lambda p, u: {"ids": p.pop(u, "bulk")}, None, {}),
+    ("imports.create", "POST", lambda p, u: "/api/expenses/imports/", _upload,
+     None, {"multipart": True}),
+    ("imports.detail", "GET", lambda p, u: f"/api/expenses/imports/{p.job[u.id]}/", None, None, {}),
+    ("budgets.list", "GET", lambda p, u: "/api/expenses/budgets/", None, None, {}),
+    ("budgets.detail", "GET", lambda p, u: f"/api/expenses/budgets/{p.budget[u.id]}/", None, None, {}),
+    ("budgets.status", "GET", lambda p, u: "/api/expenses/budgets/status/", None, None, {}),
+    ("budgets.create", "POST", lambda p, u: "/api/expenses/budgets/", _budget,
+     lambda p, u, r: p.push(u, "budget", r.json()["id"]), {}),
+    ("budgets.update", "PATCH", lambda p, u: f"/api/expenses/budgets/{p.peek(u, 'budget')}/",
+     lambda p, u: {"amount": "150.00"}, None, {}),
+    ("budgets.delete", "DELETE", lambda p, u: f"/api/expenses/budgets/{p.pop(u, 'budget')}/",
+     None, None, {}),
+    ("recurring.list", "GET", lambda p, u: "/api/expenses/recurring/", None, None, {}),
+    ("recurring.detail", "GET", lambda p, u: f"/api/expenses/recurring/{p.rule[u.id]}/",
+     None, None, {}),
+    ("recurring.create", "POST", lambda p, u: "/api/expenses/recurring/", lambda p, u: _rule(p),
+     lambda p, u, r: p.push(u, "rule", r.json()["id"]), {}),
+    ("recurring.update", "PATCH", lambda p, u: f"/api/expenses/recurring/{p.peek(u, 'rule')}/",
+     lambda p, u: {"interval": 2}, None, {}),
+    ("recurring.delete", "DELETE", lambda p, u: f"/api/expenses/recurring/{p.pop(u, 'rule')}/",
+     None, None, {}),
+    ("users.profile", "GET", lambda p, u: "/api/users/profile/", None, None, {}),
+    ("users.profile_update", "PATCH", lambda p, u: "/api/users/profile/",
+     lambda p, u: {"first_name": "Bench"}, None, {}),
+    ("users.refresh", "POST", lambda p, u: "/api/users/refresh/", _refresh, None, {}),
+    ("users.logout", "POST", lambda p, u: "/api/users/logout/", _refresh, None, {}),
+    ("users.login", "POST", lambda p, u: "/api/users/login/",
+     lambda p, u: {"email": u.email, "password": PASSWORD}, None, {"hashing": True}),
+    ("users.change_password", "PUT", lambda p, u: "/api/users/change-password/",
+     lambda p, u: {"old_password": PASSWORD, "new_password": PASSWORD, "confirm_password": PASSWORD},
+     None, {"hashing": True}),
+    ("users.register", "POST", lambda p, u: "/api/users/register/", _register,
+     lambda p, u, r: p.registered.append(r.json()["access"]), {"hashing": True, "anonymous": True}),
+    # Deletes the accounts users.register made, with their own tokens.
+    ("users.delete", "DELETE", lambda p, u: "/api/users/profile/", None, None,
+     {"hashing": True, "registered": True}),
+]
+
+
+def _request(pool, scenario, index):
+    """``(user, method, path, kwargs)`` for request ``index`` of ``scenario``."""
+    name, method, path, body, after, options = scenario
+    user = pool.users[index % len(pool.users)]
+    kwargs = {}
+    if options.get("registered"):
+        kwargs["headers"] = {"Authorization": f"Bearer {pool.registered.pop()}"}
+    elif not options.get("anonymous"):
+        kwargs["headers"] = {"Authorization": f"Bearer {pool.tokens[user.id]}"}
+    if body is not None:
+        data = body(pool, user)
+        if options.get("multipart"):
+            kwargs["multipart"] = data
+        else:
+            kwargs["data"] = json.dumps(data)
+            kwargs["content_type"] = "application/json"
+    return user, method, path(pool, user), kwargs
+
+
+def _count(args, scenario):
+    return max(1, args.requests // 10) if scenario[5].get("hashing") else args.requests
+
+
+def _selected(args):
+    return [s for s in SCENARIOS if not args.only or any(o in s[0] for o in args.only)]
+
+
+# ─────────────────────────────────────────
+# Clients
+# ─────────────────────────────────────────
+def _warm_up(pool):
+    """Headers for one untimed request, so imports and URL resolution are done."""
+    return {"Authorization": f"Bearer {pool.tokens[pool.users[0].id]}"}
+
+
+def _call(client, method, path, kwargs):
+    """Works for ``Client`` and, awaited, for ``AsyncClient``."""
+    if method == "GET":
+        return client.get(path, headers=kwargs.get("headers"))
+    if "multipart" in kwargs:
+        return client.post(path, kwargs["multipart"], headers=kwargs.get("headers"))
+    return client.generic(method, path, **kwargs)
+
+
+def run_wsgi(args, pool, before_request):
+    from django.test import Client
+
+    client = Client(raise_request_exception=False)
+    client.get("/api/users/profile/", headers=_warm_up(pool))
+    results = []
+    for scenario in _selected(args):
+        latencies, errors = [], 0
+        for index in range(_count(args, scenario)):
+            user, method, path, kwargs = _request(pool, scenario, index)
+            before_request(user)
+            began = time.perf_counter()
+            response = _call(client, method, path, kwargs)
+            if response.streaming:
+                b"".join(response.streaming_content)
+            latencies.append(time.perf_counter() - began)
+            errors += response.status_code >= 400
+            if scenario[4] and response.status_code < 400:
+                scenario[4](pool, user, response)
+        results.append(summarise("wsgi", scenario, latencies, errors))
+    return results
+
+
+def run_asgi(args, pool, before_request):
+    from asgiref.sync import sync_to_async
+    from django.test import AsyncClient
+
+    client = AsyncClient(raise_request_exception=False)
+
+    async def main():
+        await client.get("/api/users/profile/", headers=_warm_up(pool))
+        results = []
+        for scenario in _selected(args):
+            latencies, errors = [], 0
+            for index in range(_count(args, scenario)):
+                # Building a request may query (tokens, uploads); keep it
+                # off the loop and out of the timing.
+                user, method, path, kwargs = await sync_to_async(_request)(pool, scenario, index)
+                await sync_to_async(before_request)(user)
+                began = time.perf_counter()
+                response = await _call(client, method, path, kwargs)
+                if response.streaming:
+                    b"".join([chunk async for chunk in response])
+                latencies.append(time.perf_counter() - began)
+                errors += response.status_code >= 400
+                if scenario[4] and response.status_code < 400:
+                    scenario[4](pool, user, response)
+            results.append(summarise("asgi", scenario, latencies, errors))
+        return results
+
+    return asyncio.run(main())
+
+
+def summarise(client, scenario, latencies, errors):
+    # Requests run one at a time, so throughput is that of a single worker,
+    # without the untimed work of building each request.
+    return {
+        "client": client,
+        "endpoint": scenario[0],
+        "method": scenario[1],
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "requests_per_s": round(len(latencies) / sum(latencies), 1),
+    }
+
+
+# ─────────────────────────────────────────
+# Runs
+# ─────────────────────────────────────────
+def _settings(args):
+    from backend import settings as project_settings
+
+    return {
+        "ALLOWED_HOSTS": ["*"],
+        "MEDIA_ROOT": os.path.join(os.path.dirname(args.database), "media"),
+        "EXPENSES_ASYNC_VIEWS": args.client == "asgi",
+        # Login and registration are slow by design; keep the log quiet.
+        "PERF_METRICS": {**project_settings.PERF_METRICS, "SLOW_REQUEST_MS": float("inf")},
+        # Every request comes from one address, logging the pool in again and again.
+        "AUTH_THROTTLES": {**project_settings.AUTH_THROTTLES, "ENABLED": False},
+    }
+
+
+def seed(args):
+    """Generate the sample data, plus a budget, rule and import per pool user."""
+    from decimal import Decimal
+
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.utils import timezone
+
+    from expenses.models import Budget, ImportJob, RecurringExpense
+
+    call_command(
+        "generate_sample_data", users=args.users, expenses=args.expenses,
+        seed=args.seed, prefix=PREFIX, password=PASSWORD, verbosity=0,
+    )
+    users = get_user_model().objects.filter(username__startswith=PREFIX).order_by("id")[:args.pool]
+    today = timezone.now().date()
+    Budget.objects.bulk_create(
+        Budget(owner=user, category="GROCERIES", amount=Decimal("400.00")) for user in users
+    )
+    RecurringExpense.objects.bulk_create(
+        RecurringExpense(
+            owner=user, amount=Decimal("12.99"), category="ENTERTAINMENT",
+            payment_method="CREDIT_CARD", description="Netflix", frequency="MONTHLY",
+            start_date=today + timedelta(days=1), next_date=today + timedelta(days=1),
+        )
+        for user in users
+    )
+    ImportJob.objects.bulk_create(
+        ImportJob(owner=user, file="imports/benchmark.csv", status=ImportJob.Status.COMPLETED)
+        for user in users
+    )
+
+
+def serve(args):
+    """Benchmark one client in this process."""
+    setup(database=args.database, **_settings(args))
+    from expenses.cache import response_cache
+
+    pool = Pool(args.pool)
+
+    def before_request(user):
+        if not args.cached:
+            response_cache.bump(user.id)
+
+    run = run_asgi if args.client == "asgi" else run_wsgi
+    print(json.dumps(run(args, pool, before_request)))
+
+
+def _commit():
+    try:
+        head = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], check=True, capture_output=True, text=True,
+        ).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain"], capture_output=True, text=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return head + ("-dirty" if dirty.strip() else "")
+
+
+def compare(before_path, after_path):
+    """Per-endpoint change in p50/p95/p99 and throughput between two runs."""
+    with open(before_path) as before_file, open(after_path) as after_file:
+        before, after = json.load(before_file), json.load(after_file)
+    old = {(row["client"], row["endpoint"]): row for row in before["results"]}
+    rows = []
+    for row in after["results"]:
+        previous = old.get((row["client"], row["endpoint"]))
+        if previous is None:
+            continue
+        rows.append({
+            "client": row["client"],
+            "endpoint": row["endpoint"],
+            **{
+                f"{field}_change_pct": round((row[field] / previous[field] - 1) * 100, 1)
+                for field in ("p50_ms", "p95_ms", "p99_ms", "requests_per_s")
+                if previous[field]
+            },
+        })
+    print(json.dumps({"before": before["commit"], "after": after["commit"], "changes": rows}, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--expenses", type=int, default=1000, help="mean per user")
+    parser.add_argument("--pool", type=int, default=50, help="users the requests go round")
+    parser.add_argument("--requests", type=int, default=200, help="per endpoint")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cached", action="store_true")
+    parser.add_argument("--clients", nargs="+", choices=("wsgi", "asgi"), default=["wsgi", "asgi"])
+    parser.add_argument("--only", nargs="+", help="endpoints whose name contains any of these")
+    parser.add_argument("--output", help="also write the report here")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"))
+    parser.add_argument("--client", choices=("wsgi", "asgi"), help=argparse.SUPPRESS)
+    parser.add_argument("--database", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.compare:
+        return compare(*args.compare)
+    if args.client:
+        return serve(args)
+
+    with tempfile.TemporaryDirectory() as scratch:
+        database = f"{scratch}/bench.sqlite3"
+        setup(database=database)
+        started = time.perf_counter()
+        seed(args)
+        seed_s = time.perf_counter() - started
+
+        results = []
+        for client in args.clients:
+            # Each client writes and deletes the same rows, so runs on the
+            # same data are independent; each gets its own process because
+            # the URLconf picks sync or async views at import.
+            child = subprocess.run(
+                [sys.executable, "-m", "benchmarks.endpoints", *sys.argv[1:],
+                 "--client", client, "--database", database],
+                capture_output=True, text=True,
+            )
+            if child.returncode:
+                raise SystemExit(f"{client} run failed:\n{child.stderr}")
+            results.extend(json.loads(child.stdout.splitlines()[-1]))
+        _remove_database(database)
+
+    import django
+    report = {
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "users": args.users,
+        "expenses_per_user": args.expenses,
+        "pool": args.pool,
+        "requests": args.requests,
+        "cached": args.cached,
+        "seed_s": round(seed_s, 1),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Resident memory while streaming a large export.
+
+    python -m benchmarks.export_rss --rows 1000000 --format csv
+
+Prints JSON with RSS sampled as rows are consumed; a flat ``growth_mb``
+is the point — memory must not scale with the number of rows exported.
+
+RSS also counts SQLite's page cache and memory-mapped database pages,
+which fill up to ``DB_SQLITE_CACHE_KB`` + ``DB_SQLITE_MMAP_BYTES`` as the
+table is read. Set both low to see the export's own memory:
+
+    DB_SQLITE_MMAP_BYTES=0 DB_SQLITE_CACHE_KB=2000 python -m benchmarks.export_rss
+"""
+import argparse
+import json
+import time
+
+from benchmarks import rss_bytes, seed_expenses, setup
+
+MB = 1024 * 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--format", choices=("csv", "ndjson"), default="csv")
+    parser.add_argument("--samples", type=int, default=10)
+    args = parser.parse_args()
+
+    setup()
+    from django.contrib.auth import get_user_model
+    from rest_framework.test import APIClient
+
+    user = get_user_model().objects.create_user(
+        username="bench", email="bench@example.com", password="bench-pass"
+    )
+    seed_expenses(user, args.rows)
+
+    client = APIClient()
+    client.force_authenticate(user)
+    response = client.get(f"/api/expenses/export/{args.format}/")
+
+    every = max(args.rows // args.samples, 1)
+    baseline = rss_bytes()
+    samples, lines, size = [], 0, 0
+    started = time.perf_counter()
+    for chunk in response.streaming_content:
+        lines += 1
+        size += len(chunk)
+        if lines % every == 0:
+            samples.append({"rows": lines, "rss_mb": round(rss_bytes() / MB, 1)})
+    elapsed = time.perf_counter() - started
+
+    peak = max([baseline] + [s["rss_mb"] * MB for s in samples])
+    print(json.dumps({
+        "format": args.format,
+        "rows": args.rows,
+        "bytes": size,
+        "seconds": round(elapsed, 2),
+        "rows_per_second": round(args.rows / elapsed),
+        "baseline_rss_mb": round(baseline / MB, 1),
+        "growth_mb": round((peak - baseline) / MB, 1),
+        "samples": samples,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Materialising recurring expenses at scale.
+
+    python -m benchmarks.recurring --rules 100000 --users 20000
+
+Seeds ``--rules`` monthly rules spread over ``--users`` users, each with
+one occurrence due in the last four weeks (``--occurrences`` > 1 makes them
+weekly rules with that many overdue), then times ``recurring.materialise``
+and an immediate re-run, which must write nothing.
+"""
+import argparse
+import json
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from benchmarks import setup
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rules", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--occurrences", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    setup()
+    from django.contrib.auth import get_user_model
+    from django.utils import timezone
+
+    from expenses import recurring, rollups
+    from expenses.models import Expense, RecurringExpense
+
+    User = get_user_model()
+    users = User.objects.bulk_create(
+        (User(username=f"bench{i}", email=f"bench{i}@example.com") for i in range(args.users)),
+        batch_size=5000,
+    )
+    today = timezone.now().date()
+    if args.occurrences > 1:
+        frequency, span = RecurringExpense.Frequency.WEEKLY, 7 * (args.occurrences - 1)
+    else:
+        frequency, span = RecurringExpense.Frequency.MONTHLY, 0
+    rules = []
+    for i in range(args.rules):
+        start = today - timedelta(days=span + i % 7 if span else i % 28)
+        rules.append(RecurringExpense(
+            owner=users[i % len(users)],
+            amount=Decimal(i % 5000 + 100) / 100,
+            category=Expense.Category.values[i % len(Expense.Category.values)],
+            description=f"rule {i}",
+            frequency=frequency,
+            start_date=start,
+            next_date=start,
+        ))
+    RecurringExpense.objects.bulk_create(rules, batch_size=5000)
+
+    started = time.perf_counter()
+    advanced, created = recurring.materialise(batch_size=args.batch_size)
+    first_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    rerun = recurring.materialise(batch_size=args.batch_size)
+    rerun_s = time.perf_counter() - started
+
+    if rerun != (0, 0) or Expense.objects.count() != created:
+        raise SystemExit("re-run wrote occurrences again")
+    if rollups.verify():
+        raise SystemExit("rollups out of step with expenses")
+
+    print(json.dumps({
+        "rules": args.rules,
+        "users": args.users,
+        "batch_size": args.batch_size,
+        "rules_advanced": advanced,
+        "expenses_created": created,
+        "materialise_s": round(first_s, 2),
+        "rules_per_second": round(advanced / first_s),
+        "rerun_s": round(rerun_s, 3),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
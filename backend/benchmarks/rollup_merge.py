@@ -0,0 +1,89 @@
+"""
+Rollup merge: writing existing buckets back with a primary-key upsert vs
+``bulk_update``.
+
+    python -m benchmarks.rollup_merge --buckets 1000 5000 20000
+
+Seeds one user with ``--buckets`` daily rollup buckets, then times the write
+``rollups._apply_many`` does once it has read and adjusted the existing
+rows, both ways (median of ``--repeat`` runs, each rolled back).
+"""
+import argparse
+import json
+import statistics
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from benchmarks import setup
+
+CATEGORIES = ("GROCERIES", "UTILITIES", "DINING_OUT", "HOUSING", "OTHER")
+
+
+def timed(write, rows, repeat):
+    from django.db import transaction
+
+    runs = []
+    for _ in range(repeat):
+        with transaction.atomic():
+            started = time.perf_counter()
+            write(rows)
+            runs.append(time.perf_counter() - started)
+            transaction.set_rollback(True)
+    return round(statistics.median(runs) * 1000, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--buckets", type=int, nargs="+", default=[1000, 5000, 20_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    setup()
+    from django.contrib.auth import get_user_model
+    from django.utils import timezone
+
+    from expenses.models import DailyRollup
+    from expenses.rollups import BATCH_SIZE
+
+    def upsert(rows):
+        DailyRollup.objects.bulk_create(
+            rows, batch_size=BATCH_SIZE,
+            update_conflicts=True, unique_fields=["id"], update_fields=["total", "count"],
+        )
+
+    def update(rows):
+        DailyRollup.objects.bulk_update(rows, ["total", "count"], batch_size=BATCH_SIZE)
+
+    user = get_user_model().objects.create_user(
+        username="bench", email="bench@example.com", password="bench-pass"
+    )
+    today = timezone.now().date()
+    report = []
+    for buckets in sorted(args.buckets):
+        DailyRollup.objects.filter(owner=user).delete()
+        DailyRollup.objects.bulk_create(
+            (
+                DailyRollup(
+                    owner=user, date=today - timedelta(days=n // len(CATEGORIES)),
+                    category=CATEGORIES[n % len(CATEGORIES)], payment_method="CASH",
+                    total=Decimal("10.00"), count=1,
+                )
+                for n in range(buckets)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        rows = list(DailyRollup.objects.filter(owner=user))
+        for row in rows:
+            row.total += Decimal("2.50")
+            row.count += 1
+        report.append({
+            "buckets": buckets,
+            "upsert_ms": timed(upsert, rows, args.repeat),
+            "bulk_update_ms": timed(update, rows, args.repeat),
+        })
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
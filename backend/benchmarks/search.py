@@ -0,0 +1,99 @@
+"""
+Description search: FTS5 index vs ``icontains``.
+
+    python -m benchmarks.search --rows 100000 1000000
+
+For each size the single benchmark user is topped up to that many rows,
+then every query is timed both ways (median of ``--repeat`` runs) for the
+first page of results and for the full match count.
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+from benchmarks import setup
+
+WORDS = (
+    "coffee groceries rent electricity water internet pizza sushi uber taxi "
+    "train bus fuel parking cinema concert books tuition pharmacy dentist "
+    "gym netflix spotify amazon hardware gift flowers bakery market lunch"
+).split()
+QUERIES = ("cof", "coffee", "pizza lun", "pharm", "gym net", "zzz")
+
+
+def top_up(user, target, batch_size=10_000):
+    from datetime import timedelta
+    from decimal import Decimal
+
+    from django.utils import timezone
+
+    from expenses.models import Expense
+
+    rng = random.Random(target)
+    today = timezone.now().date()
+    have = Expense.objects.filter(owner=user).count()
+    while have < target:
+        size = min(batch_size, target - have)
+        Expense.objects.bulk_create([
+            Expense(
+                owner=user,
+                amount=Decimal(rng.randint(1, 50_000)) / 100,
+                description=" ".join(rng.sample(WORDS, 3)),
+                date=today - timedelta(days=rng.randint(0, 1500)),
+            )
+            for _ in range(size)
+        ])
+        have += size
+
+
+def timed(fn, repeat):
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - started)
+    return round(statistics.median(runs) * 1000, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    setup()
+    from django.contrib.auth import get_user_model
+
+    from expenses.models import Expense
+    from expenses.search import search_expenses
+
+    user = get_user_model().objects.create_user(
+        username="bench", email="bench@example.com", password="bench-pass"
+    )
+    owned = Expense.objects.filter(owner=user)
+    report = []
+    for rows in sorted(args.rows):
+        top_up(user, rows)
+        for query in QUERIES:
+            fts = search_expenses(owned, query)
+            scan = owned.filter(description__icontains=query)
+            report.append({
+                "rows": rows,
+                "query": query,
+                "matches": fts.count(),
+                "page_ms": {
+                    "icontains": timed(lambda: list(scan[:20]), args.repeat),
+                    "fts": timed(lambda: list(fts[:20]), args.repeat),
+                },
+                "count_ms": {
+                    "icontains": timed(scan.count, args.repeat),
+                    "fts": timed(fts.count, args.repeat),
+                },
+            })
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Expense list serialization: ``ExpenseSerializer`` over model instances vs
+``ExpenseRowSerializer`` over ``values()`` rows, and DRF's JSONRenderer vs
+the orjson-backed ``FastJSONRenderer``.
+
+    python -m benchmarks.serialization --rows 1000 10000
+
+For each size, every stage is timed per 1k rows (median of ``--repeat``
+runs): fetching, serializing, rendering and the three together. Both paths
+are checked to render the same bytes before anything is timed.
+"""
+import argparse
+import json
+import statistics
+import time
+
+from benchmarks import seed_expenses, setup
+
+
+def timed(fn, repeat):
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        runs.append(time.perf_counter() - started)
+    return result, statistics.median(runs)
+
+
+def per_1k(seconds, rows):
+    return round(seconds * 1000 / rows * 1000, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    setup()
+    from django.contrib.auth import get_user_model
+    from rest_framework.renderers import JSONRenderer
+
+    from backend import renderers
+    from expenses.models import Expense
+    from expenses.serializers import ExpenseRowSerializer, ExpenseSerializer
+
+    user = get_user_model().objects.create_user(
+        username="bench", email="bench@example.com", password="bench-pass"
+    )
+    seed_expenses(user, max(args.rows))
+    fast_renderer, drf_renderer = renderers.FastJSONRenderer(), JSONRenderer()
+
+    report = {"orjson": renderers.orjson is not None, "ms_per_1k_rows": []}
+    for rows in sorted(args.rows):
+        queryset = Expense.objects.filter(owner=user).order_by("-date", "-created_at", "-id")[:rows]
+
+        # .all() each time: a queryset caches its rows once evaluated.
+        def drf():
+            return drf_renderer.render(ExpenseSerializer(list(queryset.all()), many=True).data)
+
+        def fast():
+            return fast_renderer.render(ExpenseRowSerializer(ExpenseRowSerializer.values(queryset)).data)
+
+        if drf() != fast():
+            raise SystemExit("ExpenseRowSerializer + FastJSONRenderer output differs from DRF")
+
+        instances, fetch_instances = timed(lambda: list(queryset.all()), args.repeat)
+        _, fetch_values = timed(lambda: list(ExpenseRowSerializer.values(queryset)), args.repeat)
+        data, serialize_drf = timed(lambda: ExpenseSerializer(instances, many=True).data, args.repeat)
+        # The row serializer formats its dicts in place, so each run gets fresh ones.
+        fresh = [list(ExpenseRowSerializer.values(queryset)) for _ in range(args.repeat)]
+        _, serialize_fast = timed(lambda: ExpenseRowSerializer(fresh.pop()).data, args.repeat)
+        _, render_drf = timed(lambda: drf_renderer.render(data), args.repeat)
+        _, render_fast = timed(lambda: fast_renderer.render(data), args.repeat)
+        _, total_drf = timed(drf, args.repeat)
+        _, total_fast = timed(fast, args.repeat)
+
+        report["ms_per_1k_rows"].append({
+            "rows": rows,
+            "fetch": {"instances": per_1k(fetch_instances, rows), "values": per_1k(fetch_values, rows)},
+            "serialize": {"drf": per_1k(serialize_drf, rows), "plan": per_1k(serialize_fast, rows)},
+            "render": {"drf": per_1k(render_drf, rows), "fast": per_1k(render_fast, rows)},
+            "total": {"drf": per_1k(total_drf, rows), "fast": per_1k(total_fast, rows)},
+            "speedup": round(total_drf / total_fast, 2),
+        })
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+SQLite under concurrent writers and readers: stock settings vs the tuned
+profile from ``backend/settings.py``.
+
+    python -m benchmarks.sqlite_concurrency --writers 1 4 8 --readers 4
+
+Each run gets a fresh database file. Writer threads create expenses
+through ``services.create_expense`` (expense, rollup upsert and cache
+bump in one transaction); reader threads fetch the dashboard summary.
+Reported per profile and writer count: committed writes/s, writes that
+failed with ``database is locked``, reads/s and p50/p99 latencies.
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from benchmarks import _remove_database, percentile, setup
+
+STOCK = {
+    "init_command": "PRAGMA journal_mode=DELETE",
+    "timeout": 5,
+}
+
+
+def use_database(options):
+    """Point ``default`` at a new, migrated file opened with ``options``."""
+    from django.core.management import call_command
+    from django.db import connections
+
+    handle, path = tempfile.mkstemp(prefix="bench-", suffix=".sqlite3")
+    os.close(handle)
+    connections["default"].close()
+    connections.settings["default"] = {
+        **connections.settings["default"], "NAME": path, "OPTIONS": options,
+    }
+    del connections["default"]
+    call_command("migrate", verbosity=0)
+    return path
+
+
+def run(writers, readers, seconds):
+    from django.contrib.auth import get_user_model
+    from django.db import OperationalError, connection
+    from django.utils import timezone
+
+    from expenses.services import create_expense, get_dashboard_summary
+
+    user = get_user_model().objects.create_user(
+        username="bench", email="bench@example.com", password="bench-pass"
+    )
+    today = timezone.now().date()
+    results = {"write": [], "read": [], "locked": 0}
+    lock = threading.Lock()
+    start = threading.Barrier(writers + readers)
+
+    def write(worker):
+        latencies, locked, i = [], 0, 0
+        start.wait()
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            i += 1
+            began = time.perf_counter()
+            try:
+                create_expense(user, {
+                    "amount": Decimal(i % 5000 + 1) / 100,
+                    "date": today - timedelta(days=(worker + i) % 60),
+                    "description": f"writer {worker} #{i}",
+                })
+            except OperationalError:
+                locked += 1
+                continue
+            latencies.append(time.perf_counter() - began)
+        return latencies, locked
+
+    def read(worker):
+        latencies = []
+        start.wait()
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            began = time.perf_counter()
+            try:
+                get_dashboard_summary(user)
+            except OperationalError:
+                continue
+            latencies.append(time.perf_counter() - began)
+        return latencies, 0
+
+    def thread(kind, target, worker):
+        try:
+            latencies, locked = target(worker)
+        finally:
+            connection.close()
+        with lock:
+            results[kind].extend(latencies)
+            results["locked"] += locked
+
+    threads = [
+        threading.Thread(target=thread, args=("write", write, n)) for n in range(writers)
+    ] + [
+        threading.Thread(target=thread, args=("read", read, n)) for n in range(readers)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    return {
+        "writers": writers,
+        "readers": readers,
+        "writes_per_s": round(len(results["write"]) / seconds, 1),
+        "locked_errors": results["locked"],
+        "write_p50_ms": percentile(results["write"], 0.50),
+        "write_p99_ms": percentile(results["write"], 0.99),
+        "reads_per_s": round(len(results["read"]) / seconds, 1),
+        "read_p50_ms": percentile(results["read"], 0.50),
+        "read_p99_ms": percentile(results["read"], 0.99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--writers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    # The tuned profile is measured even if DB_SQLITE_TUNED turns it off.
+    os.environ["DB_SQLITE_TUNED"] = "true"
+    setup()
+    from django.db import connections
+
+    from backend.settings import _sqlite_options
+
+    tuned = _sqlite_options()
+    report = []
+    for name, options in (("stock", STOCK), ("tuned", tuned)):
+        for writers in args.writers:
+            path = use_database(options)
+            try:
+                report.append({"profile": name, **run(writers, args.readers, args.seconds)})
+            finally:
+                connections["default"].close()
+                _remove_database(path)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
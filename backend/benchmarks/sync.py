@@ -0,0 +1,89 @@
+"""
+Offline sync: a delta from the last cursor vs refetching the whole list.
+
+    python -m benchmarks.sync --expenses 100000 --changes 10 100 1000
+
+Seeds one user with ``--expenses`` expenses and takes a cursor. Then, for
+each ``--changes``, edits, deletes and adds that many expenses between them
+(half, a quarter, a quarter) and times a client catching up: paging through
+``/api/expenses/sync/`` from the cursor, and, for reference, paging through
+the whole ``/api/expenses/`` list as a client without sync must. Reports
+each one's time, requests and queries.
+"""
+import argparse
+import json
+import time
+from decimal import Decimal
+
+from benchmarks import seed_expenses, setup
+
+
+def walk(client, url, next_url):
+    """Follow ``url`` until ``next_url(body)`` is None; returns (seconds, requests, queries, last body)."""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    requests = 0
+    started = time.perf_counter()
+    with CaptureQueriesContext(connection) as queries:
+        while url:
+            body = client.get(url).json()
+            requests += 1
+            url = next_url(body)
+    return time.perf_counter() - started, requests, len(queries), body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--expenses", type=int, default=100_000)
+    parser.add_argument("--changes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--limit", type=int, default=1000)
+    args = parser.parse_args()
+
+    setup()
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from expenses.models import Expense, SyncSequence
+    from expenses.services import bulk_create_expenses, bulk_delete_expenses, bulk_update_expenses
+
+    user = get_user_model().objects.create_user(
+        username="bench", email="bench@example.com", password="bench-pass"
+    )
+    started = time.perf_counter()
+    seed_expenses(user, args.expenses)
+    report = {"expenses": args.expenses, "seed_seconds": round(time.perf_counter() - started, 1), "runs": []}
+
+    client = Client(headers={"Authorization": f"Bearer {AccessToken.for_user(user)}"})
+    # Where a client that synced everything just now stands.
+    cursor = f"{SyncSequence.objects.get(owner=user).value}.0"
+    client.get(f"/api/expenses/sync/?since={cursor}")  # warm up
+
+    def sync_next(body):
+        return f"/api/expenses/sync/?since={body['cursor']}&limit={args.limit}" if body["has_more"] else None
+
+    for changes in args.changes:
+        owned = Expense.objects.filter(owner=user).order_by("?")
+        picked = list(owned[:changes * 3 // 4])
+        edits, deletes = picked[:changes // 2], picked[changes // 2:]
+        bulk_update_expenses(user, [(expense, {"amount": Decimal("1.23")}) for expense in edits])
+        bulk_delete_expenses(user, [expense.id for expense in deletes])
+        bulk_create_expenses(user, [{
+            "amount": Decimal("4.56"), "category": "OTHER", "payment_method": "CASH",
+            "description": "new", "date": edits[0].date,
+        }] * (changes - len(picked)))
+
+        seconds, requests, queries, body = walk(
+            client, f"/api/expenses/sync/?since={cursor}&limit={args.limit}", sync_next
+        )
+        cursor = body["cursor"]
+        delta = {"ms": round(seconds * 1000, 1), "requests": requests, "queries": queries}
+        seconds, requests, queries, _ = walk(client, "/api/expenses/?page_size=100", lambda body: body["next"])
+        full = {"ms": round(seconds * 1000, 1), "requests": requests, "queries": queries}
+        report["runs"].append({"changes": changes, "delta_sync": delta, "full_list": full})
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Refresh latency against a large token history, and the expiry purge.
+
+    python -m benchmarks.token_refresh --tokens 10000000
+
+Seeds ``--tokens`` outstanding refresh tokens spread over ``--days`` of
+history, every other one blacklisted as rotation leaves them, so most of
+them have expired. Then times ``--requests`` rotating refreshes with the
+blacklist filter off (every check reads the database) and on, runs
+``purge_expired`` and times the refreshes again on the purged tables.
+Prints JSON with p50/p95/p99 latency per phase and the purge rate.
+"""
+import argparse
+import json
+import time
+import uuid
+from datetime import timedelta
+
+from benchmarks import percentile, setup
+
+SEED_BATCH = 100_000
+
+
+def seed(user, tokens, days):
+    from django.db import connection, transaction
+    from django.utils import timezone
+    from rest_framework_simplejwt.settings import api_settings
+
+    adapt = connection.ops.adapt_datetimefield_value
+    lifetime = api_settings.REFRESH_TOKEN_LIFETIME
+    start = timezone.now() - timedelta(days=days)
+    step = timedelta(days=days) / tokens
+    with connection.cursor() as cursor:
+        for first in range(0, tokens, SEED_BATCH):
+            outstanding, blacklisted = [], []
+            for i in range(first, min(first + SEED_BATCH, tokens)):
+                created = start + i * step
+                outstanding.append(
+                    (i + 1, uuid.uuid4().hex, "-", adapt(created), adapt(created + lifetime), user.pk)
+                )
+                if i % 2 == 0:
+                    blacklisted.append((i // 2 + 1, adapt(created + step), i + 1))
+            with transaction.atomic():
+                cursor.executemany(
+                    "INSERT INTO token_blacklist_outstandingtoken "
+                    "(id, jti, token, created_at, expires_at, user_id) VALUES (%s, %s, %s, %s, %s, %s)",
+                    outstanding,
+                )
+                cursor.executemany(
+                    "INSERT INTO token_blacklist_blacklistedtoken (id, blacklisted_at, token_id) "
+                    "VALUES (%s, %s, %s)",
+                    blacklisted,
+                )
+
+
+def refreshes(client, user, requests):
+    from users.tokens import RefreshToken
+
+    refresh = str(RefreshToken.for_user(user))
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = client.post("/api/users/refresh/", {"refresh": refresh}, content_type="application/json")
+        latencies.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            raise SystemExit(f"refresh failed: {response.status_code} {response.content[:200]!r}")
+        refresh = response.json()["refresh"]
+    return {
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tokens", type=int, default=10_000_000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=None)
+    args = parser.parse_args()
+
+    setup()
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+    from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+    from users.tokens import PURGE_BATCH_SIZE, blacklist_filter, purge_expired
+
+    user = get_user_model().objects.create_user(
+        username="bench", email="bench@example.com", password="bench-pass"
+    )
+    started = time.perf_counter()
+    seed(user, args.tokens, args.days)
+    report = {"tokens": args.tokens, "seed_seconds": round(time.perf_counter() - started, 1)}
+
+    client = Client()
+    blacklist_filter.config["ENABLED"] = False
+    report["filter_off"] = refreshes(client, user, args.requests)
+
+    blacklist_filter.config["ENABLED"] = True
+    blacklist_filter.reset()
+    started = time.perf_counter()
+    blacklist_filter.sync()
+    report["filter_load_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    report["filter_entries"] = blacklist_filter.bloom.count
+    report["filter_on"] = refreshes(client, user, args.requests)
+
+    started = time.perf_counter()
+    deleted = purge_expired(batch_size=args.batch_size or PURGE_BATCH_SIZE)
+    elapsed = time.perf_counter() - started
+    report["purge"] = {
+        "deleted": deleted,
+        "seconds": round(elapsed, 1),
+        "tokens_per_second": round(deleted / elapsed) if elapsed else None,
+        "remaining": OutstandingToken.objects.count(),
+    }
+    report["after_purge"] = refreshes(client, user, args.requests)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Analytics endpoint latency: sync views under WSGI vs async views under ASGI.
+
+    python -m benchmarks.wsgi_vs_asgi --rows 100000 --concurrency 1 8 32
+
+Each server runs in its own process (the URLconf picks sync or async
+views at import) against the same seeded data, driving Django's own
+``WSGIHandler`` from a pool of threads, one per concurrent client, or its
+``ASGIHandler`` from as many concurrent tasks on one event loop. Requests
+carry a real JWT, and the response cache is bypassed unless ``--cached``.
+Prints p50/p99 latency and requests/s per endpoint and concurrency.
+
+Defaults on one CPU with SQLite; p50 / p99 ms (requests/s):
+
+    endpoint      clients  WSGI                  ASGI (async views)
+    dashboard        1      13.6 /  21.6 ( 72)    16.9 /  30.1 ( 58)
+    dashboard        8      92.3 / 192.9 ( 83)   101.4 / 145.9 ( 78)
+    dashboard       32     322.1 / 618.9 ( 75)   517.5 / 639.7 ( 62)
+    series/daily     1       3.9 /   5.2 (254)     8.0 /  11.7 (124)
+    series/daily     8      27.3 / 115.3 (246)    51.3 / 104.3 (157)
+    series/daily    32      63.0 / 464.5 (249)   182.8 / 292.1 (171)
+    recent           1       3.6 /   4.9 (268)     6.9 /  14.5 (144)
+    recent           8      25.7 /  92.2 (266)    50.4 / 103.1 (158)
+    recent          32      54.7 / 434.2 (261)   160.7 / 285.7 (193)
+
+The async views pay a thread hop for DRF's checks and for every ORM call,
+so they lose on p50 and throughput at every level and only narrow the
+tail under load. Hence the sync views stay the default, and
+EXPENSES_ASYNC_VIEWS is for ASGI deployments that wait mostly on the
+database.
+"""
+import argparse
+import asyncio
+import io
+import json
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks import _remove_database, percentile, seed_expenses, setup
+
+ENDPOINTS = ("/api/expenses/dashboard/", "/api/expenses/series/daily/", "/api/expenses/recent/")
+
+
+def summarise(server, path, concurrency, latencies, elapsed, statuses):
+    return {
+        "server": server,
+        "endpoint": path,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": sum(1 for status in statuses if status != 200),
+        "p50_ms": percentile(latencies, 0.50),
+        "p99_ms": percentile(latencies, 0.99),
+        "requests_per_s": round(len(latencies) / elapsed, 1),
+    }
+
+
+def run_wsgi(path, token, concurrency, requests, before_request):
+    from django.core.handlers.wsgi import WSGIHandler
+
+    handler = WSGIHandler()
+    latencies, statuses, lock = [], [], threading.Lock()
+
+    def client():
+        for _ in range(requests):
+            environ = {
+                "REQUEST_METHOD": "GET",
+                "PATH_INFO": path,
+                "QUERY_STRING": "",
+                "SERVER_NAME": "testserver",
+                "SERVER_PORT": "80",
+                "SERVER_PROTOCOL": "HTTP/1.1",
+                "HTTP_HOST": "testserver",
+                "HTTP_AUTHORIZATION": f"Bearer {token}",
+                "wsgi.input": io.BytesIO(),
+                "wsgi.errors": sys.stderr,
+                "wsgi.url_scheme": "http",
+            }
+            status = []
+            before_request()
+            began = time.perf_counter()
+            response = handler(environ, lambda s, headers, *_: status.append(s))
+            b"".join(response)
+            response.close()
+            took = time.perf_counter() - began
+            with lock:
+                latencies.append(took)
+                statuses.append(int(status[0].split()[0]))
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, time.perf_counter() - started, statuses
+
+
+def run_asgi(path, token, concurrency, requests, before_request):
+    from django.core.handlers.asgi import ASGIHandler
+
+    handler = ASGIHandler()
+    latencies, statuses = [], []
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"testserver"), (b"authorization", f"Bearer {token}".encode())],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+
+    async def request():
+        sent = False
+
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            # The client never disconnects; Django cancels this wait.
+            await asyncio.Event().wait()
+
+        status = []
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                status.append(message["status"])
+
+        before_request()
+        began = time.perf_counter()
+        await handler(dict(scope), receive, send)
+        latencies.append(time.perf_counter() - began)
+        statuses.append(status[0])
+
+    async def client():
+        for _ in range(requests):
+            await request()
+
+    async def main():
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        return time.perf_counter() - started
+
+    elapsed = asyncio.run(main())
+    return latencies, elapsed, statuses
+
+
+def serve(args):
+    """Benchmark one server type in this process."""
+    setup(
+        database=args.database,
+        ALLOWED_HOSTS=["*"],
+        EXPENSES_ASYNC_VIEWS=args.server == "asgi",
+    )
+    from django.contrib.auth import get_user_model
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    from expenses import rollups
+    from expenses.cache import response_cache
+
+    user, created = get_user_model().objects.get_or_create(
+        username="bench", defaults={"email": "bench@example.com"}
+    )
+    if created:
+        seed_expenses(user, args.rows)
+        rollups.rebuild([user.id])
+    token = str(RefreshToken.for_user(user).access_token)
+
+    def before_request():
+        if not args.cached:
+            response_cache.bump(user.id)
+
+    run = run_asgi if args.server == "asgi" else run_wsgi
+    report = []
+    for concurrency in args.concurrency:
+        for path in ENDPOINTS:
+            run(path, token, concurrency, 2, before_request)   # warm up
+            latencies, elapsed, statuses = run(
+                path, token, concurrency, args.requests, before_request
+            )
+            report.append(summarise(
+                args.server, path, concurrency, latencies, elapsed, statuses
+            ))
+    print(json.dumps(report))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=50, help="per client")
+    parser.add_argument("--cached", action="store_true")
+    parser.add_argument("--server", choices=("wsgi", "asgi"), help=argparse.SUPPRESS)
+    parser.add_argument("--database", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.server:
+        return serve(args)
+
+    with tempfile.TemporaryDirectory() as scratch:
+        database = f"{scratch}/bench.sqlite3"
+        report = []
+        for server in ("wsgi", "asgi"):
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.wsgi_vs_asgi", *sys.argv[1:],
+                 "--server", server, "--database", database],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            report.extend(json.loads(output.splitlines()[-1]))
+        _remove_database(database)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
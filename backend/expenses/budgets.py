@@ -0,0 +1,52 @@
+"""
+Budget status from the running monthly totals.
+
+Every expense write keeps ``MonthlyCategoryTotal`` current in the same
+transaction (see ``rollups``), so a budget's spend is a single-row lookup
+joined onto the budget, never a sum over expenses.
+"""
+from decimal import Decimal
+
+from django.db.models import DecimalField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Budget, MonthlyCategoryTotal
+
+OK = "ok"
+WARNING = "warning"
+OVER = "over"
+
+# Share of the budget spent at which a category is flagged.
+WARNING_RATIO = Decimal("0.8")
+
+
+def with_spend(user, month):
+    """The owner's budgets, each annotated with ``spent`` in ``month``."""
+    spent = MonthlyCategoryTotal.objects.filter(
+        owner=OuterRef("owner"), category=OuterRef("category"), month=month.replace(day=1),
+    ).order_by().values("total")[:1]
+    return Budget.objects.filter(owner=user).annotate(spent=Coalesce(
+        Subquery(spent), Value(Decimal("0")),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    ))
+
+
+def status_of(amount, spent):
+    if spent > amount:
+        return OVER
+    if spent >= amount * WARNING_RATIO:
+        return WARNING
+    return OK
+
+
+def describe(budget):
+    """Status payload for one budget from ``with_spend``."""
+    return {
+        "id": budget.id,
+        "category": budget.category,
+        "amount": float(budget.amount),
+        "spent": float(budget.spent),
+        "remaining": float(budget.amount - budget.spent),
+        "used_percentage": round(float(budget.spent / budget.amount * 100), 2),
+        "status": status_of(budget.amount, budget.spent),
+    }
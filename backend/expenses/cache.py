@@ -0,0 +1,287 @@
+"""
+Per-user versioned response cache.
+
+Entries are keyed by ``(namespace, user, data version, params)``. Every
+expense write bumps the owner's version, so older entries are simply never
+addressed again and age out of the backend — nothing is deleted explicitly.
+
+The backend is chosen by ``EXPENSES_RESPONSE_CACHE["BACKEND"]``: ``"lru"``
+(a size-bounded in-process LRU), ``"django"`` (the ``CACHES`` alias named by
+``"ALIAS"``) or ``"auto"``, which uses Django's cache framework when
+``CACHES`` is configured and the LRU otherwise. The LRU is per process, so
+multi-worker deployments should configure a shared ``CACHES`` backend.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from backend.routers import use_replica
+
+MISSING = object()
+
+DEFAULTS = {
+    "BACKEND": "auto",
+    "ALIAS": "default",
+    "MAX_ENTRIES": 2048,
+    "TIMEOUT": 300,
+}
+
+
+class LocMemLRUBackend:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key, MISSING)
+            if value is not MISSING:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def get_or_init(self, key, initial):
+        with self._lock:
+            return self._data.setdefault(key, initial)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key, initial):
+        with self._lock:
+            self._data[key] = self._data.get(key, initial) + 1
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    # In-process and lock-guarded, so cheap enough to call from the event loop.
+    async def aget(self, key):
+        return self.get(key)
+
+    async def aset(self, key, value):
+        self.set(key, value)
+
+    async def aget_or_init(self, key, initial):
+        return self.get_or_init(key, initial)
+
+
+class DjangoCacheBackend:
+    def __init__(self, alias, timeout):
+        self.cache = caches[alias]
+        self.timeout = timeout
+
+    def get(self, key):
+        return self.cache.get(key, MISSING)
+
+    def set(self, key, value):
+        self.cache.set(key, value, self.timeout)
+
+    def get_or_init(self, key, initial):
+        self.cache.add(key, initial, None)
+        return self.cache.get(key, initial)
+
+    def delete(self, key):
+        self.cache.delete(key)
+
+    def incr(self, key, initial):
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            self.cache.add(key, initial + 1, None)
+            return self.cache.get(key, initial + 1)
+
+    def clear(self):
+        self.cache.clear()
+
+    async def aget(self, key):
+        return await self.cache.aget(key, MISSING)
+
+    async def aset(self, key, value):
+        await self.cache.aset(key, value, self.timeout)
+
+    async def aget_or_init(self, key, initial):
+        await self.cache.aadd(key, initial, None)
+        return await self.cache.aget(key, initial)
+
+
+def build_backend(config):
+    backend = config["BACKEND"]
+    if backend == "auto":
+        backend = "django" if settings.is_overridden("CACHES") else "lru"
+    if backend == "django":
+        return DjangoCacheBackend(config["ALIAS"], config["TIMEOUT"])
+    if backend == "lru":
+        return LocMemLRUBackend(config["MAX_ENTRIES"])
+    raise ValueError(f"Unknown response cache backend: {backend!r}")
+
+
+class ResponseCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def _version_key(self, user_id):
+        return f"expenses:version:{user_id}"
+
+    def version(self, user_id):
+        # A missing version (never set, or evicted) starts from the clock,
+        # so it can never coincide with a version older entries were keyed on.
+        return self.backend.get_or_init(self._version_key(user_id), time.time_ns())
+
+    async def aversion(self, user_id):
+        return await self.backend.aget_or_init(self._version_key(user_id), time.time_ns())
+
+    def _written_key(self, user_id):
+        return f"expenses:written:{user_id}"
+
+    def bump(self, user_id):
+        self.backend.incr(self._version_key(user_id), time.time_ns())
+        self.backend.set(self._written_key(user_id), time.time())
+
+    def written_since(self, user_id, seconds):
+        """Whether ``user_id`` wrote within the last ``seconds``."""
+        written = self.backend.get(self._written_key(user_id))
+        return written is not MISSING and time.time() - written < seconds
+
+    async def awritten_since(self, user_id, seconds):
+        written = await self.backend.aget(self._written_key(user_id))
+        return written is not MISSING and time.time() - written < seconds
+
+    def bump_on_commit(self, user_id):
+        """
+        Bump now, so nothing computed mid-transaction is served later, and
+        again once the write is visible to other connections.
+        """
+        self.bump(user_id)
+        transaction.on_commit(lambda: self.bump(user_id))
+
+    def _key(self, namespace, user_id, version, params):
+        digest = hashlib.blake2b(
+            json.dumps([namespace, *params], default=str).encode(), digest_size=12
+        ).hexdigest()
+        return f"expenses:{namespace}:{user_id}:{version}:{digest}"
+
+    def key(self, namespace, user_id, params=()):
+        return self._key(namespace, user_id, self.version(user_id), params)
+
+    async def akey(self, namespace, user_id, params=()):
+        return self._key(namespace, user_id, await self.aversion(user_id), params)
+
+    def etag(self, key):
+        return 'W/"%s"' % hashlib.blake2b(key.encode(), digest_size=12).hexdigest()
+
+    def get_or_compute(self, key, compute):
+        value = self.backend.get(key)
+        if value is not MISSING:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = compute()
+        self.backend.set(key, value)
+        return value
+
+    async def aget_or_compute(self, key, compute):
+        """``get_or_compute`` with ``compute`` a coroutine function."""
+        value = await self.backend.aget(key)
+        if value is not MISSING:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = await compute()
+        await self.backend.aset(key, value)
+        return value
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+        }
+
+    def clear(self):
+        self.backend.clear()
+        self.hits = self.misses = self.not_modified = 0
+
+
+response_cache = ResponseCache(build_backend({
+    **DEFAULTS, **getattr(settings, "EXPENSES_RESPONSE_CACHE", {}),
+}))
+
+
+class VersionedCacheMixin:
+    """
+    Serve a read-only per-user view through ``response_cache``, answering
+    ``If-None-Match`` with 304 before any query runs.
+
+    With ``read_from_replica`` set, misses are computed on the read replica
+    unless the user wrote recently enough that it may still be catching up.
+    """
+    cache_namespace = None
+    read_from_replica = False
+
+    def _headers(self, key):
+        return {
+            "ETag": response_cache.etag(key),
+            "Cache-Control": "private, no-cache",
+        }
+
+    def _not_modified(self, request, headers):
+        if headers["ETag"] in parse_etags(request.headers.get("If-None-Match", "")):
+            response_cache.not_modified += 1
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return None
+
+    def cached_response(self, request, params, compute):
+        key = response_cache.key(self.cache_namespace, request.user.id, params)
+        headers = self._headers(key)
+        if (response := self._not_modified(request, headers)) is not None:
+            return response
+        data = response_cache.get_or_compute(key, lambda: self._compute(request, compute))
+        return Response(data, status=status.HTTP_200_OK, headers=headers)
+
+    def _compute(self, request, compute):
+        replica = self.read_from_replica and not response_cache.written_since(
+            request.user.id, settings.DATABASE_REPLICA_STICKY_SECONDS
+        )
+        with use_replica(replica):
+            return compute()
+
+    async def acached_response(self, request, params, compute):
+        """``cached_response`` for async views; ``compute`` is a coroutine function."""
+        key = await response_cache.akey(self.cache_namespace, request.user.id, params)
+        headers = self._headers(key)
+        if (response := self._not_modified(request, headers)) is not None:
+            return response
+        data = await response_cache.aget_or_compute(key, lambda: self._acompute(request, compute))
+        return Response(data, status=status.HTTP_200_OK, headers=headers)
+
+    async def _acompute(self, request, compute):
+        replica = self.read_from_replica and not await response_cache.awritten_since(
+            request.user.id, settings.DATABASE_REPLICA_STICKY_SECONDS
+        )
+        # The async ORM runs queries in sync_to_async threads, which inherit
+        # this context, so the routing choice carries over.
+        with use_replica(replica):
+            return await compute()
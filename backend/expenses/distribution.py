@@ -0,0 +1,71 @@
+"""
+Category distribution and top merchants over a window of whole months.
+
+Both read the running per-month totals that every expense write keeps
+current (``MonthlyCategoryTotal`` and ``MonthlyMerchantTotal``), so a window
+costs one row per category (or merchant) per month in it, never a scan of
+the expenses themselves.
+"""
+from datetime import datetime
+
+from django.db.models import Sum
+
+from .models import MonthlyCategoryTotal, MonthlyMerchantTotal
+
+MAX_MONTHS = 120
+MAX_MERCHANTS = 50
+
+
+def parse_month(text):
+    """``"2026-03"`` → ``date(2026, 3, 1)``; raises ValueError."""
+    return datetime.strptime(text, "%Y-%m").date()
+
+
+def months_between(first, last):
+    return (last.year - first.year) * 12 + last.month - first.month + 1
+
+
+def _window(model, user, first, last, field):
+    return (
+        model.objects
+        .filter(owner=user, month__gte=first, month__lte=last)
+        .order_by()
+        .values(field)
+        .annotate(total=Sum("total"), count=Sum("count"))
+        .order_by("-total", field)
+    )
+
+
+def categories(user, first, last):
+    """Spend per category in the window, largest first."""
+    return _window(MonthlyCategoryTotal, user, first, last, "category")
+
+
+def merchants(user, first, last, limit):
+    """The ``limit`` merchants with the most spend in the window."""
+    return _window(MonthlyMerchantTotal, user, first, last, "merchant")[:limit]
+
+
+def _share(part, whole):
+    return round(float(part / whole * 100), 2) if whole else 0.0
+
+
+def build(first, last, category_rows, merchant_rows):
+    category_rows = list(category_rows)
+    total = sum(row["total"] for row in category_rows)
+    return {
+        "from": first.strftime("%Y-%m"),
+        "to": last.strftime("%Y-%m"),
+        "total": float(total),
+        "count": sum(row["count"] for row in category_rows),
+        "active_categories_count": len(category_rows),
+        "top_category": category_rows[0]["category"] if category_rows else None,
+        "categories": [
+            {**row, "total": float(row["total"]), "percentage": _share(row["total"], total)}
+            for row in category_rows
+        ],
+        "merchants": [
+            {**row, "total": float(row["total"]), "percentage": _share(row["total"], total)}
+            for row in merchant_rows
+        ],
+    }
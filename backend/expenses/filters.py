@@ -1,7 +1,11 @@
 import django_filters
+
+from .search import search_expenses
+
+
 class ExpenseFilter(django_filters.FilterSet):
     search     = django_filters.CharFilter(
-        field_name="description", lookup_expr="icontains"
+        field_name="description", method="filter_search"
     )
     category   = django_filters.CharFilter(
         field_name="category",    lookup_expr="iexact"
@@ -12,3 +16,6 @@ class ExpenseFilter(django_filters.FilterSet):
     max_date   = django_filters.DateFilter(
         field_name="date",        lookup_expr="lte"
     )
+
+    def filter_search(self, queryset, name, value):
+        return search_expenses(queryset, value)
@@ -0,0 +1,299 @@
+"""
+Streaming CSV import.
+
+The uploaded file is read row by row through a generator, validated a
+chunk at a time and written with ``bulk_create``. Jobs run on a small
+background pool (or via the ``process_imports`` command) so large
+statements never hold a request worker.
+"""
+import csv
+import io
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Expense, ImportJob, validate_not_future_date
+from .services import bulk_create_expenses
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1000
+MAX_STORED_ERRORS = 100
+STALE_AFTER = timedelta(minutes=10)
+
+FIELDS = ("date", "amount", "description", "category", "payment_method")
+HEADER_ALIASES = {
+    "date": ("date", "transaction_date", "posted", "posting_date", "booking_date"),
+    "amount": ("amount", "value", "debit", "debit_amount"),
+    "description": ("description", "memo", "details", "narrative", "payee", "merchant"),
+    "category": ("category",),
+    "payment_method": ("payment_method", "method", "payment", "payment_type"),
+}
+
+_MAX_AMOUNT = Decimal("1e8")                # max_digits=10, decimal_places=2
+_MIN_AMOUNT = Decimal("0.01")
+_DESCRIPTION_MAX = Expense._meta.get_field("description").max_length
+_AMOUNT_JUNK = re.compile(r"[\s$€£]")
+# Commas only as thousands separators ahead of an optional dot: "1,50" and
+# "1.234,50" read differently in different locales, so they are refused
+# rather than guessed at. A lone group of three ("1,500") cannot be a
+# decimal part, which has at most two digits.
+_GROUPED_AMOUNT = re.compile(r"[-+]?\d{1,3}(?:,\d{3})+(?:\.\d*)?")
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, "EXPENSE_IMPORT_WORKERS", 2),
+    thread_name_prefix="expense-import",
+)
+
+
+# ─────────────────────────────────────────
+# Parsing
+# ─────────────────────────────────────────
+def _normalise(header):
+    return re.sub(r"[^a-z0-9]+", "_", header.strip().lower()).strip("_")
+
+
+def resolve_columns(header, column_map=None):
+    """Map each Expense field to its column index in ``header``."""
+    normalised = [_normalise(name) for name in header]
+    columns = {}
+    for source, field in (column_map or {}).items():
+        if field in FIELDS and _normalise(source) in normalised:
+            columns[field] = normalised.index(_normalise(source))
+    for field, aliases in HEADER_ALIASES.items():
+        if field in columns:
+            continue
+        for alias in aliases:
+            if alias in normalised:
+                columns[field] = normalised.index(alias)
+                break
+    missing = [field for field in ("date", "amount", "description") if field not in columns]
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(missing)}.")
+    return columns
+
+
+def read_rows(fileobj, column_map=None):
+    """
+    Yield ``(row_number, {field: raw_value})`` without loading the file;
+    row numbers count data rows from 1.
+    """
+    reader = csv.reader(io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline=""))
+    header = next(reader, None)
+    if header is None:
+        return
+    columns = resolve_columns(header, column_map)
+    for number, row in enumerate(reader, start=1):
+        yield number, {
+            field: row[index].strip() if index < len(row) else ""
+            for field, index in columns.items()
+        }
+
+
+# ─────────────────────────────────────────
+# Validation — one column at a time per chunk
+# ─────────────────────────────────────────
+def _choice_lookup(choices):
+    lookup = {}
+    for value, label in choices:
+        lookup[value.lower()] = value
+        lookup[label.lower()] = value
+        lookup[_normalise(label)] = value
+    return lookup
+
+
+_CATEGORIES = _choice_lookup(Expense.Category.choices)
+_PAYMENT_METHODS = _choice_lookup(Expense.PaymentMethod.choices)
+
+
+def _parse_amount(raw):
+    text = _AMOUNT_JUNK.sub("", raw)
+    if "," in text:
+        if not _GROUPED_AMOUNT.fullmatch(text):
+            return None, "Use a dot for decimals; commas may only separate thousands."
+        text = text.replace(",", "")
+    try:
+        amount = Decimal(text)
+    except InvalidOperation:
+        return None, "Enter a valid number."
+    if not amount.is_finite():
+        return None, "Enter a valid number."
+    if amount.as_tuple().exponent < -2:
+        return None, "Ensure that there are no more than 2 decimal places."
+    if amount < _MIN_AMOUNT:
+        return None, "Ensure this value is greater than or equal to 0.01."
+    if amount >= _MAX_AMOUNT:
+        return None, "Ensure that there are no more than 10 digits in total."
+    return amount, None
+
+
+def _parse_date(raw):
+    try:
+        return date.fromisoformat(raw), None
+    except ValueError:
+        return None, "Date has wrong format. Use YYYY-MM-DD."
+
+
+def _parse_choice(lookup, default):
+    def parse(raw):
+        if not raw:
+            return default, None
+        value = lookup.get(raw.lower()) or lookup.get(_normalise(raw))
+        if value is None:
+            return None, f'"{raw}" is not a valid choice.'
+        return value, None
+    return parse
+
+
+def _parse_description(raw):
+    if not raw:
+        return None, "This field may not be blank."
+    if len(raw) > _DESCRIPTION_MAX:
+        return None, f"Ensure this field has no more than {_DESCRIPTION_MAX} characters."
+    return raw, None
+
+
+PARSERS = {
+    "date": _parse_date,
+    "amount": _parse_amount,
+    "description": _parse_description,
+    "category": _parse_choice(_CATEGORIES, Expense.Category.OTHER),
+    "payment_method": _parse_choice(_PAYMENT_METHODS, Expense.PaymentMethod.OTHER),
+}
+
+
+def validate_chunk(rows):
+    """
+    Validate a chunk of ``(row_number, raw)`` pairs column by column.
+    Returns ``(valid_rows, errors)`` with ``errors`` as
+    ``[{"row": n, "errors": {field: [message]}}]``.
+    """
+    numbers = [number for number, _ in rows]
+    problems = {number: {} for number in numbers}
+    columns = {}
+    for field, parse in PARSERS.items():
+        parsed = []
+        for number, (_, raw) in zip(numbers, rows):
+            value, error = parse(raw.get(field, ""))
+            if error:
+                problems[number][field] = [error]
+            parsed.append(value)
+        columns[field] = parsed
+
+    # The future-date rule holds for the whole chunk if it holds for its
+    # latest date, so it only runs row by row when that check fails.
+    dates = [value for value in columns["date"] if value is not None]
+    if dates:
+        try:
+            validate_not_future_date(max(dates))
+        except ValidationError as exc:
+            today = timezone.now().date()
+            for number, value in zip(numbers, columns["date"]):
+                if value is not None and value > today:
+                    problems[number]["date"] = exc.messages
+
+    valid, errors = [], []
+    for position, number in enumerate(numbers):
+        if problems[number]:
+            errors.append({"row": number, "errors": problems[number]})
+        else:
+            valid.append({field: columns[field][position] for field in PARSERS})
+    return valid, errors
+
+
+# ─────────────────────────────────────────
+# Jobs
+# ─────────────────────────────────────────
+def schedule_import(job):
+    """Queue ``job`` on the background pool once the upload is committed."""
+    transaction.on_commit(lambda: _executor.submit(_run_in_thread, job.pk))
+
+
+def _run_in_thread(job_id):
+    try:
+        run_import(job_id)
+    except Exception:
+        logger.exception("Import job %s crashed", job_id)
+    finally:
+        connection.close()
+
+
+def _claimable():
+    # RUNNING jobs whose progress stopped moving were interrupted mid-way.
+    stale = timezone.now() - STALE_AFTER
+    return Q(status=ImportJob.Status.PENDING) | Q(
+        status=ImportJob.Status.RUNNING, updated_at__lt=stale
+    )
+
+
+def pending_jobs():
+    return ImportJob.objects.filter(_claimable()).order_by("created_at")
+
+
+def claim(job_id):
+    """Atomically move a pending or stalled job to RUNNING; False if taken."""
+    return bool(
+        ImportJob.objects.filter(_claimable(), pk=job_id)
+        .update(status=ImportJob.Status.RUNNING, updated_at=timezone.now())
+    )
+
+
+def run_import(job_id, chunk_size=CHUNK_SIZE):
+    if not claim(job_id):
+        return None
+    job = ImportJob.objects.select_related("owner").get(pk=job_id)
+    if job.started_at is None:
+        job.started_at = timezone.now()
+        job.save(update_fields=["started_at", "updated_at"])
+
+    try:
+        with job.file.open("rb") as fileobj:
+            rows = read_rows(fileobj, job.column_map)
+            # Resume: everything up to rows_processed was committed already.
+            rows = islice(rows, job.rows_processed, None)
+            while chunk := list(islice(rows, chunk_size)):
+                _import_chunk(job, chunk)
+    except (ValueError, UnicodeDecodeError, csv.Error) as exc:
+        # The file itself is unusable; anything else (e.g. a lost database
+        # connection) leaves the job RUNNING so it is resumed once stale.
+        return _finish(job, ImportJob.Status.FAILED, str(exc))
+    return _finish(job, ImportJob.Status.COMPLETED)
+
+
+def _finish(job, status, message=""):
+    """Record how the job ended, then drop its upload: nothing reads it again."""
+    upload = job.file.name
+    job.file = None
+    job.status, job.message, job.finished_at = status, message, timezone.now()
+    job.save(update_fields=["file", "status", "message", "finished_at", "updated_at"])
+    try:
+        ImportJob.file.field.storage.delete(upload)
+    except OSError:
+        logger.exception("Could not delete the upload of import job %s", job.pk)
+    return job
+
+
+def _import_chunk(job, chunk):
+    valid, errors = validate_chunk(chunk)
+    with transaction.atomic():
+        if valid:
+            bulk_create_expenses(job.owner, valid)
+        job.rows_processed += len(chunk)
+        job.rows_imported += len(valid)
+        job.rows_rejected += len(errors)
+        room = MAX_STORED_ERRORS - len(job.errors)
+        if room > 0:
+            job.errors = job.errors + errors[:room]
+        job.save(update_fields=[
+            "rows_processed", "rows_imported", "rows_rejected", "errors", "updated_at",
+        ])
+
@@ -0,0 +1,87 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from expenses import rollups, sync
+from expenses.models import Expense
+from expenses.sampledata import expenses_per_user, user_expenses
+
+USER_BATCH_SIZE = 5000
+OWNER_BATCH_SIZE = 500  # owners per rollup rebuild, however few expenses they have
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate synthetic users and expenses for load tests, e.g. "
+        "--users 10000 --expenses 1000. Users are <prefix>N@example.com."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument(
+            "--expenses", type=int, default=1000,
+            help="Mean expenses per user; the spread is heavy-tailed.",
+        )
+        parser.add_argument("--days", type=int, default=730, help="How far back expenses go.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--prefix", default="sample")
+        parser.add_argument(
+            "--password", default="sample-password",
+            help="Shared by every generated user (hashed once).",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=50_000,
+            help="Expenses written (and rolled up) per transaction.",
+        )
+
+    def handle(self, *args, users, expenses, days, seed, prefix, password, batch_size, verbosity, **options):
+        User = get_user_model()
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(f'Users named "{prefix}…" already exist; pick another --prefix.')
+
+        started = time.perf_counter()
+        rng = random.Random(seed)
+        today = timezone.now().date()
+        hashed = make_password(password)
+        owners = User.objects.bulk_create(
+            (
+                User(username=f"{prefix}{n}", email=f"{prefix}{n}@example.com", password=hashed)
+                for n in range(users)
+            ),
+            batch_size=USER_BATCH_SIZE,
+        )
+
+        created, pending, owner_ids = 0, [], []
+
+        def flush():
+            # Rollups are rebuilt for the batch's owners in one pass rather
+            # than folded in row by row.
+            with transaction.atomic():
+                sync.stamp(pending)
+                Expense.objects.bulk_create(pending, batch_size=1000)
+                rollups.rebuild(owner_ids)
+            pending.clear()
+            owner_ids.clear()
+
+        for owner in owners:
+            pending.extend(user_expenses(owner.id, expenses_per_user(rng, expenses), rng, today, days))
+            owner_ids.append(owner.id)
+            if len(pending) >= batch_size or len(owner_ids) >= OWNER_BATCH_SIZE:
+                created += len(pending)
+                flush()
+                if verbosity > 1:
+                    self.stdout.write(f"  {created} expenses…")
+        created += len(pending)
+        if owner_ids:
+            flush()
+
+        if verbosity:
+            self.stdout.write(self.style.SUCCESS(
+                f"Created {len(owners)} users and {created} expenses "
+                f"in {time.perf_counter() - started:.1f}s."
+            ))
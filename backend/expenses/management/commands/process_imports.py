@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from expenses.imports import pending_jobs, run_import
+
+
+class Command(BaseCommand):
+    help = "Run pending CSV import jobs and resume interrupted ones."
+
+    def handle(self, *args, **options):
+        for job_id in pending_jobs().values_list("id", flat=True):
+            job = run_import(job_id)
+            if job is None:
+                continue
+            self.stdout.write(
+                f"import #{job.pk}: {job.status} — {job.rows_imported} imported, "
+                f"{job.rows_rejected} rejected ({job.rows_per_second} rows/s)"
+            )
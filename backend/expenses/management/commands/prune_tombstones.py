@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from expenses import sync
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the delete markers kept for delta sync once they are old. "
+        "Clients that last synced before them start over. Schedule it daily."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=sync.TOMBSTONE_DAYS,
+            help="Keep tombstones this many days.",
+        )
+
+    def handle(self, *args, days, **options):
+        deleted = sync.prune_tombstones(days=days)
+        self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} tombstones older than {days} days."))
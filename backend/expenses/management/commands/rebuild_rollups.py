@@ -0,0 +1,40 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from expenses import rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the rollup tables from raw expenses, or verify them."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify", action="store_true",
+            help="Report mismatches instead of rebuilding; exits non-zero on drift.",
+        )
+        parser.add_argument(
+            "--user", action="append", dest="emails", metavar="EMAIL",
+            help="Limit to the given user (repeatable).",
+        )
+
+    def handle(self, *args, verify=False, emails=None, **options):
+        owner_ids = None
+        if emails:
+            owner_ids = list(
+                get_user_model().objects
+                .filter(email__in=emails).values_list("id", flat=True)
+            )
+            if len(owner_ids) != len(set(emails)):
+                raise CommandError("Unknown user in --user.")
+
+        if not verify:
+            written = rollups.rebuild(owner_ids)
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} rollup buckets."))
+            return
+
+        mismatches = rollups.verify(owner_ids)
+        for table, key, expected, actual in mismatches:
+            self.stdout.write(f"{table} {key}: expected {expected}, found {actual}")
+        if mismatches:
+            raise CommandError(f"{len(mismatches)} rollup buckets out of date.")
+        self.stdout.write(self.style.SUCCESS("Rollups match raw expenses."))
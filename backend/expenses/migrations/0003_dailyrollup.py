@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_rollups(apps, schema_editor):
+    Expense = apps.get_model('expenses', 'Expense')
+    DailyRollup = apps.get_model('expenses', 'DailyRollup')
+    buckets = (
+        Expense.objects.order_by()
+        .values('owner_id', 'date', 'category', 'payment_method')
+        .annotate(total=Sum('amount'), count=Count('id'))
+    )
+    DailyRollup.objects.bulk_create(
+        (DailyRollup(**row) for row in buckets.iterator()), batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0002_alter_expense_amount_alter_expense_date_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('category', models.CharField(choices=[('GROCERIES', 'Groceries'), ('ENTERTAINMENT', 'Entertainment'), ('UTILITIES', 'Utilities'), ('DINING_OUT', 'Dining Out'), ('TRANSPORTATION', 'Transportation'), ('HOUSING', 'Housing'), ('HEALTHCARE', 'Healthcare'), ('EDUCATION', 'Education'), ('OTHER', 'Other')], max_length=20)),
+                ('payment_method', models.CharField(choices=[('DEBIT_CARD', 'Debit Card'), ('CREDIT_CARD', 'Credit Card'), ('CASH', 'Cash'), ('BANK_TRANSFER', 'Bank Transfer'), ('OTHER', 'Other')], max_length=20)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('count', models.IntegerField(default=0)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-date'],
+                'constraints': [models.UniqueConstraint(fields=('owner', 'date', 'category', 'payment_method'), name='expenses_dailyrollup_bucket_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
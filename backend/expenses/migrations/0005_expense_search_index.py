@@ -0,0 +1,71 @@
+from django.db import migrations
+
+# The SQL is frozen here: expenses.search may change, this migration may not.
+SQLITE_FTS = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS expenses_expense_fts USING fts5(
+        description,
+        content='expenses_expense',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS expenses_expense_fts_ai
+    AFTER INSERT ON expenses_expense BEGIN
+        INSERT INTO expenses_expense_fts(rowid, description) VALUES (new.id, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS expenses_expense_fts_ad
+    AFTER DELETE ON expenses_expense BEGIN
+        INSERT INTO expenses_expense_fts(expenses_expense_fts, rowid, description)
+        VALUES ('delete', old.id, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS expenses_expense_fts_au
+    AFTER UPDATE OF description ON expenses_expense BEGIN
+        INSERT INTO expenses_expense_fts(expenses_expense_fts, rowid, description)
+        VALUES ('delete', old.id, old.description);
+        INSERT INTO expenses_expense_fts(rowid, description) VALUES (new.id, new.description);
+    END
+    """,
+    "INSERT INTO expenses_expense_fts(expenses_expense_fts) VALUES ('rebuild')",
+]
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS expenses_expense_fts_ai",
+    "DROP TRIGGER IF EXISTS expenses_expense_fts_ad",
+    "DROP TRIGGER IF EXISTS expenses_expense_fts_au",
+    "DROP TABLE IF EXISTS expenses_expense_fts",
+]
+POSTGRES_TRGM = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    CREATE INDEX IF NOT EXISTS expenses_expense_description_trgm
+    ON expenses_expense USING gin (description gin_trgm_ops)
+    """,
+]
+POSTGRES_DROP = ["DROP INDEX IF EXISTS expenses_expense_description_trgm"]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0004_importjob'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({"sqlite": SQLITE_FTS, "postgresql": POSTGRES_TRGM}),
+            _run({"sqlite": SQLITE_DROP, "postgresql": POSTGRES_DROP}),
+        ),
+    ]
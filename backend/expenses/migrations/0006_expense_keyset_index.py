@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0005_expense_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='expense',
+            options={'ordering': ['-date', '-created_at', '-id']},
+        ),
+        migrations.RemoveIndex(
+            model_name='expense',
+            name='expenses_ex_owner_i_d056f1_idx',
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['owner', '-date', '-created_at', '-id'], name='expenses_expense_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:59
+
+import django.core.validators
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+def backfill_monthly_totals(apps, schema_editor):
+    Expense = apps.get_model('expenses', 'Expense')
+    MonthlyCategoryTotal = apps.get_model('expenses', 'MonthlyCategoryTotal')
+    buckets = (
+        Expense.objects.order_by()
+        .annotate(month=TruncMonth('date'))
+        .values('owner_id', 'month', 'category')
+        .annotate(total=Sum('amount'), count=Count('id'))
+    )
+    MonthlyCategoryTotal.objects.bulk_create(
+        (MonthlyCategoryTotal(**row) for row in buckets.iterator()), batch_size=1000
+    )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0006_expense_keyset_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Budget',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(choices=[('GROCERIES', 'Groceries'), ('ENTERTAINMENT', 'Entertainment'), ('UTILITIES', 'Utilities'), ('DINING_OUT', 'Dining Out'), ('TRANSPORTATION', 'Transportation'), ('HOUSING', 'Housing'), ('HEALTHCARE', 'Healthcare'), ('EDUCATION', 'Education'), ('OTHER', 'Other')], max_length=20)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))])),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='budgets', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['category'],
+                'constraints': [models.UniqueConstraint(fields=('owner', 'category'), name='expenses_budget_owner_category_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MonthlyCategoryTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('category', models.CharField(choices=[('GROCERIES', 'Groceries'), ('ENTERTAINMENT', 'Entertainment'), ('UTILITIES', 'Utilities'), ('DINING_OUT', 'Dining Out'), ('TRANSPORTATION', 'Transportation'), ('HOUSING', 'Housing'), ('HEALTHCARE', 'Healthcare'), ('EDUCATION', 'Education'), ('OTHER', 'Other')], max_length=20)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('count', models.IntegerField(default=0)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_totals', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-month'],
+                'constraints': [models.UniqueConstraint(fields=('owner', 'month', 'category'), name='expenses_monthlytotal_bucket_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_monthly_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:28
+
+import django.db.models.deletion
+from collections import defaultdict
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_merchant_totals(apps, schema_editor):
+    # Mirrors rollups.merchant_of as of this migration.
+    Expense = apps.get_model('expenses', 'Expense')
+    MonthlyMerchantTotal = apps.get_model('expenses', 'MonthlyMerchantTotal')
+    buckets = defaultdict(lambda: [Decimal('0'), 0])
+    rows = Expense.objects.order_by().values_list('owner_id', 'date', 'description', 'amount')
+    for owner_id, day, description, amount in rows.iterator(chunk_size=1000):
+        bucket = buckets[owner_id, day.replace(day=1), ' '.join(description.split()).lower()[:100]]
+        bucket[0] += amount
+        bucket[1] += 1
+    MonthlyMerchantTotal.objects.bulk_create(
+        (
+            MonthlyMerchantTotal(owner_id=owner_id, month=month, merchant=merchant, total=total, count=count)
+            for (owner_id, month, merchant), (total, count) in buckets.items()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0008_recurringexpense'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyMerchantTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('merchant', models.CharField(max_length=100)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('count', models.IntegerField(default=0)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_merchant_totals', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-month'],
+                'constraints': [models.UniqueConstraint(fields=('owner', 'month', 'merchant'), name='expenses_monthlymerchant_bucket_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_merchant_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,107 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, Max
+
+
+def backfill(apps, schema_editor):
+    # Expense ids are unique and increasing, so they make a valid sequence
+    # for existing rows; each owner's counter continues from the largest.
+    Expense = apps.get_model("expenses", "Expense")
+    SyncSequence = apps.get_model("expenses", "SyncSequence")
+    Expense.objects.update(sync_seq=F("id"))
+    SyncSequence.objects.bulk_create(
+        (SyncSequence(owner_id=row["owner_id"], value=row["last"])
+         for row in Expense.objects.order_by().values("owner_id").annotate(last=Max("id"))),
+        batch_size=1000,
+    )
+
+
+# As created by 0005_expense_search_index, frozen here.
+SQLITE_FTS_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS expenses_expense_fts_ai
+    AFTER INSERT ON expenses_expense BEGIN
+        INSERT INTO expenses_expense_fts(rowid, description) VALUES (new.id, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS expenses_expense_fts_ad
+    AFTER DELETE ON expenses_expense BEGIN
+        INSERT INTO expenses_expense_fts(expenses_expense_fts, rowid, description)
+        VALUES ('delete', old.id, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS expenses_expense_fts_au
+    AFTER UPDATE OF description ON expenses_expense BEGIN
+        INSERT INTO expenses_expense_fts(expenses_expense_fts, rowid, description)
+        VALUES ('delete', old.id, old.description);
+        INSERT INTO expenses_expense_fts(rowid, description) VALUES (new.id, new.description);
+    END
+    """,
+    "INSERT INTO expenses_expense_fts(expenses_expense_fts) VALUES ('rebuild')",
+]
+
+
+def reinstall_search(apps, schema_editor):
+    # Adding sync_seq rebuilds the SQLite table, which drops the search triggers.
+    if schema_editor.connection.vendor == "sqlite":
+        for statement in SQLITE_FTS_TRIGGERS:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0009_monthlymerchanttotal'),
+        ('users', '0004_accountdeletion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, reinstall_search),
+        migrations.CreateModel(
+            name='ExpenseTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('expense_id', models.BigIntegerField()),
+                ('sync_seq', models.PositiveBigIntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SyncSequence',
+            fields=[
+                ('owner', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('value', models.PositiveBigIntegerField(default=0)),
+                ('pruned_upto', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='expense',
+            name='sync_seq',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['owner', 'sync_seq'], name='expenses_expense_sync_idx'),
+        ),
+        migrations.RunPython(reinstall_search, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='expensetombstone',
+            name='owner',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='expensetombstone',
+            index=models.Index(fields=['owner', 'sync_seq'], name='expenses_ex_owner_i_cc818a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expensetombstone',
+            index=models.Index(fields=['deleted_at'], name='expenses_ex_deleted_a3eb36_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+from django.db import migrations
+
+# icontains compiles to UPPER(col::text) LIKE UPPER(%s) on PostgreSQL, which
+# never used the index on the bare column. SQLite's FTS table is left alone.
+FORWARDS = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "DROP INDEX IF EXISTS expenses_expense_description_trgm",
+    """
+    CREATE INDEX IF NOT EXISTS expenses_expense_description_upper_trgm
+    ON expenses_expense USING gin ((UPPER(description::text)) gin_trgm_ops)
+    """,
+]
+BACKWARDS = [
+    "DROP INDEX IF EXISTS expenses_expense_description_upper_trgm",
+    """
+    CREATE INDEX IF NOT EXISTS expenses_expense_description_trgm
+    ON expenses_expense USING gin (description gin_trgm_ops)
+    """,
+]
+
+
+def _on_postgresql(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == "postgresql":
+            for statement in statements:
+                schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0010_expense_sync'),
+    ]
+
+    operations = [
+        migrations.RunPython(_on_postgresql(FORWARDS), _on_postgresql(BACKWARDS)),
+    ]
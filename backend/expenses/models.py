@@ -49,16 +49,287 @@ class Expense(models.Model):
     )
     description = models.TextField(max_length=500)
     date = models.DateField(validators=[validate_not_future_date])
+    recurring = models.ForeignKey(
+        "RecurringExpense",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="occurrences",
+    )
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # The owner's change number of the last write (see expenses.sync).
+    sync_seq = models.PositiveBigIntegerField(default=0)
 
     class Meta:
-        ordering = ["-date", "-created_at"]
+        ordering = ["-date", "-created_at", "-id"]
         indexes = [
-            models.Index(fields=["owner", "date"]),
+            # Keyset pagination order; its (owner, date) prefix also serves
+            # every per-owner date-range query.
+            models.Index(
+                fields=["owner", "-date", "-created_at", "-id"],
+                name="expenses_expense_keyset_idx",
+            ),
             models.Index(fields=["owner", "category"]),
+            models.Index(fields=["owner", "sync_seq"], name="expenses_expense_sync_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.date} • {self.amount} • {self.category}"
+
+
+class SyncSequence(models.Model):
+    """A user's last change number, and the newest one pruned from tombstones."""
+
+    owner = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="+",
+    )
+    value = models.PositiveBigIntegerField(default=0)
+    pruned_upto = models.PositiveBigIntegerField(default=0)
+
+
+class ExpenseTombstone(models.Model):
+    """A deleted expense, kept so that sync clients learn of the delete."""
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    expense_id = models.BigIntegerField()
+    sync_seq = models.PositiveBigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["owner", "sync_seq"]),
+            models.Index(fields=["deleted_at"]),
+        ]
+
+
+class DailyRollup(models.Model):
+    """
+    Materialised per-day spend bucket, kept in step with ``Expense`` writes
+    by ``expenses.rollups`` so analytics read O(days) rows instead of O(rows).
+    """
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="daily_rollups",
+    )
+    date = models.DateField()
+    category = models.CharField(max_length=20, choices=Expense.Category.choices)
+    payment_method = models.CharField(
+        max_length=20, choices=Expense.PaymentMethod.choices
+    )
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ["-date"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["owner", "date", "category", "payment_method"],
+                name="expenses_dailyrollup_bucket_uniq",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.date} • {self.category} • {self.payment_method} • {self.total}"
+
+
+class MonthlyCategoryTotal(models.Model):
+    """
+    Running spend per (owner, month, category), maintained alongside
+    ``DailyRollup``; ``month`` is the first day of the month. Budget status
+    reads these rows directly.
+    """
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="monthly_totals",
+    )
+    month = models.DateField()
+    category = models.CharField(max_length=20, choices=Expense.Category.choices)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ["-month"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["owner", "month", "category"],
+                name="expenses_monthlytotal_bucket_uniq",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} • {self.category} • {self.total}"
+
+
+class MonthlyMerchantTotal(models.Model):
+    """
+    Running spend per (owner, month, merchant), maintained alongside
+    ``MonthlyCategoryTotal``. ``merchant`` is the expense description
+    normalised by ``rollups.merchant_of``.
+    """
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="monthly_merchant_totals",
+    )
+    month = models.DateField()
+    merchant = models.CharField(max_length=100)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ["-month"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["owner", "month", "merchant"],
+                name="expenses_monthlymerchant_bucket_uniq",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} • {self.merchant} • {self.total}"
+
+
+class Budget(models.Model):
+    """A monthly spending limit for one category."""
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="budgets",
+    )
+    category = models.CharField(max_length=20, choices=Expense.Category.choices)
+    amount = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        validators=[MinValueValidator(Decimal("0.01"))]
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["category"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["owner", "category"], name="expenses_budget_owner_category_uniq",
+            ),
         ]
 
     def __str__(self):
-        return f"{self.date} • {self.amount} • {self.category}"
\ No newline at end of file
+        return f"{self.category} • {self.amount}/month"
+
+
+class RecurringExpense(models.Model):
+    """
+    A repeating expense such as rent or a subscription. Occurrences fall
+    every ``interval`` days/weeks/months/years from ``start_date``, until
+    ``end_date`` if set; monthly and yearly ones keep ``start_date``'s day,
+    moved back to the month's last day where it has none. ``next_date`` is
+    the first occurrence not yet written as an ``Expense`` (``None`` once
+    the rule has ended) and is advanced by ``expenses.recurring``.
+    """
+
+    class Frequency(models.TextChoices):
+        DAILY   = "DAILY", "Daily"
+        WEEKLY  = "WEEKLY", "Weekly"
+        MONTHLY = "MONTHLY", "Monthly"
+        YEARLY  = "YEARLY", "Yearly"
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="recurring_expenses",
+    )
+    amount = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        validators=[MinValueValidator(Decimal("0.01"))]
+    )
+    category = models.CharField(
+        max_length=20, choices=Expense.Category.choices, default=Expense.Category.OTHER
+    )
+    payment_method = models.CharField(
+        max_length=20, choices=Expense.PaymentMethod.choices, default=Expense.PaymentMethod.OTHER
+    )
+    description = models.TextField(max_length=500)
+    frequency = models.CharField(max_length=10, choices=Frequency.choices)
+    interval = models.PositiveSmallIntegerField(default=1, validators=[MinValueValidator(1)])
+    start_date = models.DateField()
+    end_date = models.DateField(null=True, blank=True)
+    next_date = models.DateField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["next_date", "id"]
+        indexes = [
+            models.Index(fields=["next_date", "id"], name="expenses_recurring_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.description} • {self.amount} every {self.interval} {self.frequency}"
+
+
+class ImportJob(models.Model):
+    """
+    A CSV statement import. Progress counters are committed together with
+    each imported chunk, so an interrupted job resumes exactly where it left off.
+    """
+
+    class Status(models.TextChoices):
+        PENDING   = "PENDING", "Pending"
+        RUNNING   = "RUNNING", "Running"
+        COMPLETED = "COMPLETED", "Completed"
+        FAILED    = "FAILED", "Failed"
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="import_jobs",
+    )
+    file = models.FileField(upload_to="imports/%Y/%m/")
+    column_map = models.JSONField(default=dict, blank=True)
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.PENDING
+    )
+    rows_processed = models.PositiveIntegerField(default=0)
+    rows_imported = models.PositiveIntegerField(default=0)
+    rows_rejected = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    message = models.TextField(blank=True)
+
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "updated_at"]),
+        ]
+
+    @property
+    def rows_per_second(self):
+        if not self.started_at:
+            return 0.0
+        elapsed = ((self.finished_at or timezone.now()) - self.started_at).total_seconds()
+        return round(self.rows_processed / elapsed, 1) if elapsed > 0 else 0.0
+
+    def __str__(self):
+        return f"import #{self.pk} • {self.status} • {self.rows_processed} rows"
@@ -1,6 +1,157 @@
 # expenses/pagination.py
-from rest_framework.pagination import CursorPagination
+import base64
+import json
+from datetime import date, datetime
 
-class ExpenseCursorPagination(CursorPagination):
-    page_size  = 20          # or whatever default you want
-    ordering   = "-date"     # newest-first, matches your table
+from django.db.models import Q, Sum
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .cache import response_cache
+from .models import DailyRollup
+
+
+class ExpenseKeysetPagination(BasePagination):
+    """
+    Keyset pagination on ``(-date, -created_at, -id)``.
+
+    Unlike DRF's CursorPagination (which positions on ``date`` alone and
+    falls back to offsets among equal dates), every page is a single
+    range seek on the ``(owner, -date, -created_at, -id)`` index.
+
+    ``?page_size=`` is honoured up to ``max_page_size``. ``?count=approx``
+    adds a ``count`` served from the per-user versioned cache, computed
+    from the daily rollups when the filters allow it.
+    """
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    ordering = ("-date", "-created_at", "-id")
+
+    # Filters the rollup table can answer on its own, mapped to its lookups.
+    rollup_filters = {
+        "category": "category__iexact",
+        "min_date": "date__gte",
+        "max_date": "date__lte",
+    }
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+
+        if position is not None:
+            queryset = queryset.filter(self._seek(position, reverse))
+        if reverse:
+            queryset = queryset.order_by(*(field.lstrip("-") for field in self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        rows = list(queryset[:size + 1])
+        has_more = len(rows) > size
+        rows = rows[:size]
+        if reverse:
+            rows.reverse()
+
+        # Walking backwards, there is always a next page (the one we came
+        # from); walking forwards, a previous page exists once we have moved.
+        self.next_position = self.previous_position = None
+        if rows:
+            if reverse or has_more:
+                self.next_position = self._position(rows[-1])
+            if (has_more if reverse else position is not None):
+                self.previous_position = self._position(rows[0])
+        self.count = self._approximate_count(request, view) if self._wants_count(request) else None
+        return rows
+
+    def get_paginated_response(self, data):
+        body = {
+            "next": self._link(self.next_position, reverse=False),
+            "previous": self._link(self.previous_position, reverse=True),
+            "results": data,
+        }
+        if self.count is not None:
+            body = {"count": self.count, **body}
+        return Response(body)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    # ── cursor encoding ──────────────────
+    def _position(self, item):
+        if isinstance(item, dict):
+            return item["date"], item["created_at"], item["id"]
+        return item.date, item.created_at, item.id
+
+    def _seek(self, position, reverse):
+        day, created_at, pk = position
+        op = "gt" if reverse else "lt"
+        # The leading inclusive bound gives the planner an index range to
+        # seek into; the disjunction then breaks ties within the same date.
+        return Q(**{f"date__{op}e": day}) & (
+            Q(**{f"date__{op}": day})
+            | Q(date=day, **{f"created_at__{op}": created_at})
+            | Q(date=day, created_at=created_at, **{f"id__{op}": pk})
+        )
+
+    def encode_cursor(self, position, reverse):
+        day, created_at, pk = position
+        payload = {"d": day.isoformat(), "c": created_at.isoformat(), "i": pk}
+        if reverse:
+            payload["r"] = 1
+        raw = json.dumps(payload, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4)))
+            position = (
+                date.fromisoformat(payload["d"]),
+                datetime.fromisoformat(payload["c"]),
+                int(payload["i"]),
+            )
+            return position, bool(payload.get("r"))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound("Invalid cursor")
+
+    def _link(self, position, reverse):
+        if position is None:
+            return None
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, self.encode_cursor(position, reverse)
+        )
+
+    # ── approximate count ────────────────
+    def _wants_count(self, request):
+        return request.query_params.get(self.count_query_param) == "approx"
+
+    def _approximate_count(self, request, view):
+        filterset = view.filterset_class.base_filters if view is not None else {}
+        params = sorted(
+            (name, value) for name, value in request.query_params.items()
+            if name in filterset and value != ""
+        )
+        key = response_cache.key("count", request.user.id, params)
+        return response_cache.get_or_compute(
+            key, lambda: self._count(request, view, dict(params))
+        )
+
+    def _count(self, request, view, params):
+        if params.keys() <= self.rollup_filters.keys():
+            lookups = {self.rollup_filters[name]: value for name, value in params.items()}
+            return DailyRollup.objects.filter(owner=request.user, **lookups).aggregate(
+                total=Sum("count")
+            )["total"] or 0
+        return view.filter_queryset(view.get_queryset()).count()
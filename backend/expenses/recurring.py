@@ -0,0 +1,133 @@
+"""
+Materialising recurring expenses.
+
+``materialise`` takes due rules (``next_date`` on or before today) a batch
+at a time, in one indexed query per batch, writes all of each rule's
+outstanding occurrences with ``bulk_create`` and moves its ``next_date``
+past today, in the same transaction as the rollup deltas. A rule is
+therefore either fully caught up or untouched, and re-running never writes
+an occurrence twice.
+
+Occurrences are only written up to today, so every row passes
+``validate_not_future_date``; later ones wait for a later run. Where the
+database can skip locked rows, concurrent runs split the work instead of
+blocking on each other.
+"""
+import calendar
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from . import rollups, sync
+from .cache import response_cache
+from .models import Expense, RecurringExpense
+
+BATCH_SIZE = 1000
+INSERT_BATCH_SIZE = 500
+
+_STEP_DAYS = {RecurringExpense.Frequency.DAILY: 1, RecurringExpense.Frequency.WEEKLY: 7}
+_STEP_MONTHS = {RecurringExpense.Frequency.MONTHLY: 1, RecurringExpense.Frequency.YEARLY: 12}
+
+
+# ─────────────────────────────────────────
+# Schedule
+# ─────────────────────────────────────────
+def following(rule, day):
+    """The occurrence after ``day``, itself an occurrence of ``rule``."""
+    if rule.frequency in _STEP_DAYS:
+        return day + timedelta(days=_STEP_DAYS[rule.frequency] * rule.interval)
+    start = rule.start_date
+    months = (day.year - start.year) * 12 + day.month - start.month
+    year, month = divmod(start.month - 1 + months + _STEP_MONTHS[rule.frequency] * rule.interval, 12)
+    year += start.year
+    month += 1
+    return start.replace(
+        year=year, month=month, day=min(start.day, calendar.monthrange(year, month)[1])
+    )
+
+
+def _ended(rule, day):
+    return rule.end_date is not None and day > rule.end_date
+
+
+def first_on_or_after(rule, day):
+    """First occurrence of ``rule`` on or after ``day``, or None past ``end_date``."""
+    occurrence = rule.start_date
+    while occurrence < day:
+        occurrence = following(rule, occurrence)
+    return None if _ended(rule, occurrence) else occurrence
+
+
+def due_dates(rule, today):
+    """Occurrences from ``next_date`` up to ``today``, and the new ``next_date``."""
+    dates, day = [], rule.next_date
+    while day is not None and day <= today and not _ended(rule, day):
+        dates.append(day)
+        day = following(rule, day)
+    return dates, None if day is None or _ended(rule, day) else day
+
+
+def reschedule(rule):
+    """
+    Point ``next_date`` at the first occurrence that has not been written,
+    after the rule's schedule was created or edited.
+    """
+    last = rule.pk and rule.occurrences.aggregate(last=Max("date"))["last"]
+    rule.next_date = first_on_or_after(
+        rule, max(rule.start_date, last + timedelta(days=1)) if last else rule.start_date
+    )
+
+
+# ─────────────────────────────────────────
+# Materialise
+# ─────────────────────────────────────────
+def _occurrence(rule, day):
+    return Expense(
+        owner_id=rule.owner_id,
+        recurring_id=rule.pk,
+        amount=rule.amount,
+        category=rule.category,
+        payment_method=rule.payment_method,
+        description=rule.description,
+        date=day,
+    )
+
+
+def materialise(batch_size=BATCH_SIZE):
+    """
+    Write every due occurrence of every rule; returns ``(rules, expenses)``,
+    the number of rules advanced and of expenses created.
+    """
+    today = timezone.now().date()
+    # Written rules leave this set, so each batch is simply its head.
+    due = RecurringExpense.objects.filter(next_date__lte=today).order_by("next_date", "pk")
+    if connection.features.has_select_for_update_skip_locked:
+        due = due.select_for_update(skip_locked=True)
+
+    rules = created = 0
+    while True:
+        with transaction.atomic():
+            batch = list(due[:batch_size])
+            if not batch:
+                return rules, created
+
+            expenses, advanced = [], defaultdict(list)
+            for rule in batch:
+                dates, next_date = due_dates(rule, today)
+                expenses.extend(_occurrence(rule, day) for day in dates)
+                advanced[next_date].append(rule.pk)
+            sync.stamp(expenses)
+            Expense.objects.bulk_create(expenses, batch_size=INSERT_BATCH_SIZE)
+            # A batch lands on a handful of distinct next dates; one UPDATE
+            # each beats a per-row CASE.
+            for next_date, ids in advanced.items():
+                RecurringExpense.objects.filter(pk__in=ids).update(next_date=next_date)
+            rollups.apply_changes(added=[rollups.entry_of(expense) for expense in expenses])
+            for owner_id in {expense.owner_id for expense in expenses}:
+                response_cache.bump_on_commit(owner_id)
+
+        rules += len(batch)
+        created += len(expenses)
@@ -0,0 +1,230 @@
+"""
+Incremental maintenance of the rollup tables: ``DailyRollup``,
+``MonthlyCategoryTotal`` and ``MonthlyMerchantTotal``.
+
+Writers describe what changed as *entries* — ``(owner_id, date, category,
+payment_method, description, amount)`` tuples, the same shape
+``values_list(*ENTRY_FIELDS)`` yields — and ``apply_changes`` folds them into
+per-bucket deltas for every table, so each write costs one upsert per bucket
+it touches.
+"""
+from collections import defaultdict, namedtuple
+from decimal import Decimal
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+
+from .models import DailyRollup, Expense, MonthlyCategoryTotal, MonthlyMerchantTotal
+
+BUCKET_FIELDS = ("owner_id", "date", "category", "payment_method")
+ENTRY_FIELDS = BUCKET_FIELDS + ("description", "amount")
+MERCHANT_LENGTH = MonthlyMerchantTotal._meta.get_field("merchant").max_length
+
+# ``fields`` are the bucket key, owner first and the date-like field second;
+# ``key_of`` maps an entry to its key and ``group`` a raw-expense queryset
+# to ``values(*fields)`` rows — or is None when the key cannot be computed
+# in SQL, and rebuilds fold entries through ``key_of`` instead.
+Rollup = namedtuple("Rollup", "model fields key_of group")
+
+
+def merchant_of(description):
+    """Merchant key of a description: case- and whitespace-insensitive, truncated."""
+    return " ".join(description.split()).lower()[:MERCHANT_LENGTH]
+
+
+DAILY = Rollup(
+    DailyRollup, BUCKET_FIELDS,
+    key_of=lambda entry: entry[:4],
+    group=lambda qs: qs.values(*BUCKET_FIELDS),
+)
+MONTHLY = Rollup(
+    MonthlyCategoryTotal, ("owner_id", "month", "category"),
+    key_of=lambda entry: (entry[0], entry[1].replace(day=1), entry[2]),
+    group=lambda qs: qs.annotate(month=TruncMonth("date")).values("owner_id", "month", "category"),
+)
+MERCHANTS = Rollup(
+    MonthlyMerchantTotal, ("owner_id", "month", "merchant"),
+    key_of=lambda entry: (entry[0], entry[1].replace(day=1), merchant_of(entry[4])),
+    group=None,
+)
+ROLLUPS = (DAILY, MONTHLY, MERCHANTS)
+
+# Up to this many buckets are upserted one statement at a time; larger
+# change sets (bulk writes, imports) are merged in a single locked read.
+INCREMENTAL_LIMIT = 8
+BATCH_SIZE = 1000
+
+
+def entry_of(expense):
+    return tuple(getattr(expense, field) for field in ENTRY_FIELDS)
+
+
+def collect_deltas(added=(), removed=(), rollup=DAILY):
+    deltas = defaultdict(lambda: [Decimal("0"), 0])
+    for entries, sign in ((added, 1), (removed, -1)):
+        for entry in entries:
+            delta = deltas[rollup.key_of(entry)]
+            delta[0] += sign * entry[-1]
+            delta[1] += sign
+    return {key: tuple(delta) for key, delta in deltas.items() if delta[1] or delta[0]}
+
+
+def apply_changes(added=(), removed=()):
+    """Fold added/removed expense entries into every rollup table."""
+    # Part of the caller's write: no savepoint to roll back to on its own.
+    with transaction.atomic(savepoint=False):
+        for rollup in ROLLUPS:
+            apply_deltas(collect_deltas(added, removed, rollup), rollup)
+
+
+def apply_deltas(deltas, rollup=DAILY):
+    if not deltas:
+        return
+    with transaction.atomic(savepoint=False):
+        if len(deltas) <= INCREMENTAL_LIMIT:
+            for key, (amount, count) in deltas.items():
+                _apply_one(rollup, key, amount, count)
+        else:
+            _apply_many(rollup, deltas)
+
+
+def _apply_one(rollup, key, amount, count):
+    if count > 0:
+        _upsert(rollup, key, amount, count)
+        return
+    # Nothing to create: the bucket holds the expenses being taken away.
+    bucket = rollup.model.objects.filter(**dict(zip(rollup.fields, key)))
+    bucket.update(total=F("total") + amount, count=F("count") + count)
+    if count < 0:
+        bucket.filter(count__lte=0).delete()
+
+
+def _upsert(rollup, key, amount, count):
+    """Add onto the bucket, creating it if new, in one ``INSERT … ON CONFLICT``."""
+    model = rollup.model
+    fields = [model._meta.get_field(name) for name in (*rollup.fields, "total", "count")]
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    columns = [quote(field.column) for field in fields]
+    summed = ", ".join(f"{column} = {table}.{column} + excluded.{column}" for column in columns[-2:])
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join(['%s'] * len(columns))}) "
+            f"ON CONFLICT ({', '.join(columns[:-2])}) DO UPDATE SET {summed}",
+            [
+                field.get_db_prep_save(value, connection)
+                for field, value in zip(fields, (*key, amount, count))
+            ],
+        )
+
+
+def _apply_many(rollup, deltas):
+    model, fields = rollup.model, rollup.fields
+    owners = {key[0] for key in deltas}
+    dates = [key[1] for key in deltas]
+    existing = {
+        tuple(getattr(row, field) for field in fields): row
+        for row in model.objects.select_for_update().filter(**{
+            "owner_id__in": owners,
+            f"{fields[1]}__gte": min(dates),
+            f"{fields[1]}__lte": max(dates),
+        })
+    }
+
+    to_update, to_create, to_delete = [], [], []
+    for key, (amount, count) in deltas.items():
+        row = existing.get(key)
+        if row is None:
+            if count > 0:
+                to_create.append(model(**dict(zip(fields, key)), total=amount, count=count))
+            continue
+        row.total += amount
+        row.count += count
+        (to_update if row.count > 0 else to_delete).append(row)
+
+    # The rows are locked, so their new totals are final: upserting them on
+    # the primary key writes each batch in one plain INSERT, where
+    # bulk_update() would build a CASE over every row — about 12x slower
+    # (benchmarks/rollup_merge.py).
+    model.objects.bulk_create(
+        to_update, batch_size=BATCH_SIZE,
+        update_conflicts=True, unique_fields=["id"], update_fields=["total", "count"],
+    )
+    if to_delete:
+        model.objects.filter(pk__in=[row.pk for row in to_delete]).delete()
+    try:
+        with transaction.atomic():
+            model.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+    except IntegrityError:
+        for row in to_create:
+            _apply_one(
+                rollup, tuple(getattr(row, field) for field in fields),
+                row.total, row.count,
+            )
+
+
+# ─────────────────────────────────────────
+# Rebuild / verify
+# ─────────────────────────────────────────
+def _owned(qs, owner_ids):
+    return qs if owner_ids is None else qs.filter(owner_id__in=owner_ids)
+
+
+def _expected(rollup, owner_ids=None):
+    """``{*fields, "total", "count"}`` rows recomputed from raw expenses."""
+    qs = _owned(Expense.objects.all(), owner_ids).order_by()
+    if rollup.group is None:
+        entries = qs.values_list(*ENTRY_FIELDS).iterator(chunk_size=BATCH_SIZE)
+        for key, (total, count) in collect_deltas(entries, rollup=rollup).items():
+            yield {**dict(zip(rollup.fields, key)), "total": total, "count": count}
+        return
+    yield from (
+        rollup.group(qs).annotate(total=Sum("amount"), count=Count("id"))
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+
+
+def rebuild(owner_ids=None):
+    """Recompute every table from raw expenses; returns the buckets written."""
+    written = 0
+    with transaction.atomic():
+        for rollup in ROLLUPS:
+            _owned(rollup.model.objects.all(), owner_ids).delete()
+            batch = []
+            for row in _expected(rollup, owner_ids):
+                batch.append(rollup.model(**row))
+                if len(batch) >= BATCH_SIZE:
+                    rollup.model.objects.bulk_create(batch)
+                    written += len(batch)
+                    batch = []
+            rollup.model.objects.bulk_create(batch)
+            written += len(batch)
+    return written
+
+
+def verify(owner_ids=None):
+    """
+    Compare every table against raw expenses. Returns a list of
+    ``(table, key, expected, actual)`` mismatches, each side ``(total, count)``.
+    """
+    mismatches = []
+    for rollup in ROLLUPS:
+        width = len(rollup.fields)
+        expected = {
+            tuple(row[field] for field in rollup.fields): (row["total"], row["count"])
+            for row in _expected(rollup, owner_ids)
+        }
+        actual = {
+            tuple(row[:width]): tuple(row[width:])
+            for row in _owned(rollup.model.objects.all(), owner_ids)
+            .values_list(*rollup.fields, "total", "count")
+            .iterator(chunk_size=BATCH_SIZE)
+        }
+        mismatches.extend(
+            (rollup.model._meta.db_table, key, expected.get(key), actual.get(key))
+            for key in sorted(expected.keys() | actual.keys(), key=str)
+            if expected.get(key) != actual.get(key)
+        )
+    return mismatches
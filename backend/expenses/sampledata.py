@@ -0,0 +1,92 @@
+"""
+Seeded, realistic-looking expense data for tests, benchmarks and load tests.
+
+The same ``seed`` always yields the same rows, so a test can pin query
+counts or totals against a large dataset without storing a fixture file.
+``seed_user`` goes through the services, so the rollups and running totals
+match the expenses exactly as in production; the ``generate_sample_data``
+command bulk-inserts ``user_expenses`` and rebuilds the rollups after.
+"""
+import itertools
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.utils import timezone
+
+from .models import Expense, RecurringExpense
+from .services import bulk_create_expenses, create_budget, create_recurring_expense
+
+Category = Expense.Category
+
+# (merchants, typical amount range) per category.
+PROFILES = {
+    Category.GROCERIES: (("Whole Foods", "Trader Joe's", "Aldi", "Costco"), (8, 180)),
+    Category.DINING_OUT: (("Chipotle", "Starbucks", "Sushi Place", "Pizza Hut"), (4, 90)),
+    Category.TRANSPORTATION: (("Uber", "Shell", "Metro Card", "Lyft"), (3, 70)),
+    Category.ENTERTAINMENT: (("Netflix", "Cinema", "Steam", "Concert Tickets"), (6, 150)),
+    Category.UTILITIES: (("Electric Co", "Water Works", "Internet Provider"), (30, 220)),
+    Category.HOUSING: (("Rent", "Home Depot", "IKEA"), (40, 2000)),
+    Category.HEALTHCARE: (("Pharmacy", "Dentist", "Clinic"), (10, 400)),
+    Category.EDUCATION: (("Bookstore", "Online Course", "Tuition"), (15, 600)),
+    Category.OTHER: (("Amazon", "Gift Shop", "Post Office"), (2, 250)),
+}
+# Everyday categories come up far more often than rent or tuition.
+WEIGHTS = (30, 22, 14, 10, 6, 3, 5, 2, 8)
+CATEGORIES = list(PROFILES)
+CUMULATIVE_WEIGHTS = list(itertools.accumulate(WEIGHTS))
+PAYMENT_METHODS = Expense.PaymentMethod.values
+
+
+def _expense(rng, today, days):
+    category = rng.choices(CATEGORIES, cum_weights=CUMULATIVE_WEIGHTS)[0]
+    merchants, (low, high) = PROFILES[category]
+    merchant = rng.choice(merchants)
+    return {
+        # Mostly small amounts, the occasional large one.
+        "amount": Decimal(round(low * (high / low) ** (rng.random() ** 2) * 100)) / 100,
+        "category": category,
+        "payment_method": rng.choice(PAYMENT_METHODS),
+        "description": merchant if rng.random() < 0.7 else f"{merchant} #{rng.randint(1, 999)}",
+        # Recent days are busier than old ones.
+        "date": today - timedelta(days=int(days * rng.random() ** 2)),
+    }
+
+
+def expense_rows(count, days=730, seed=0, today=None):
+    """``count`` validated expense rows dated over the last ``days`` days."""
+    rng = random.Random(seed)
+    today = today or timezone.now().date()
+    return [_expense(rng, today, days) for _ in range(count)]
+
+
+def expenses_per_user(rng, mean, alpha=2.5):
+    """A Pareto-distributed count averaging ``mean``: a few users log far more."""
+    return min(round(mean * (alpha - 1) / alpha * rng.paretovariate(alpha)), 10 * mean)
+
+
+def user_expenses(owner_id, count, rng, today, days=730):
+    """``count`` unsaved expenses for ``owner_id``, for ``bulk_create``."""
+    return [Expense(owner_id=owner_id, **_expense(rng, today, days)) for _ in range(count)]
+
+
+def seed_user(user, expenses=2000, days=730, seed=0, budgets=4, recurring=3):
+    """
+    Give ``user`` ``expenses`` expenses, a budget for each of the first
+    ``budgets`` categories and ``recurring`` monthly rules.
+    """
+    today = timezone.now().date()
+    bulk_create_expenses(user, expense_rows(expenses, days, seed, today))
+    for category in list(PROFILES)[:budgets]:
+        create_budget(user, {"category": category, "amount": Decimal("500.00")})
+    for i, category in enumerate(list(PROFILES)[:recurring]):
+        merchants, (low, high) = PROFILES[category]
+        create_recurring_expense(user, {
+            "amount": Decimal(high),
+            "category": category,
+            "payment_method": PAYMENT_METHODS[0],
+            "description": merchants[0],
+            "frequency": RecurringExpense.Frequency.MONTHLY,
+            "interval": 1,
+            "start_date": today + timedelta(days=i + 1),
+        })
@@ -0,0 +1,79 @@
+"""
+Full-text search over expense descriptions.
+
+SQLite: an external-content FTS5 table, ``expenses_expense_fts``, kept in
+sync with ``expenses_expense`` by triggers, so every write path (ORM,
+``bulk_create``, raw deletes) updates it. PostgreSQL: a ``pg_trgm`` GIN
+index on ``UPPER(description)``, the expression Django's ``icontains``
+compiles to, so the filter can use it. Other backends fall back to a plain
+``icontains`` scan.
+
+The index DDL lives in the migrations (0005, 0010, 0011), frozen there.
+A SQLite migration that rebuilds ``expenses_expense`` drops the triggers
+and must create them again, as 0010 does.
+
+The backends match differently. FTS5 matches every word of the query as
+the prefix of a word ("cof sho" finds "Coffee shop"); ``icontains`` matches
+the query as one substring ("fee sh" finds it too, "cof sho" does not).
+"""
+import re
+
+from django.db import connections
+from django.db.models import F, FloatField, Func, Value
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = "expenses_expense_fts"
+
+
+def match_expression(text):
+    """
+    Turn free text into an FTS5 query: every word must match as a prefix.
+    Words are quoted, so FTS5 operators in user input are inert.
+    """
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", text))
+
+
+def _vendor(queryset):
+    return connections[queryset.db].vendor
+
+
+def search_expenses(queryset, text):
+    """Filter ``queryset`` to expenses whose description matches ``text``."""
+    text = text.strip()
+    if not text:
+        return queryset
+    match = match_expression(text)
+    if _vendor(queryset) == "sqlite" and match:
+        return queryset.filter(id__in=RawSQL(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match]
+        ))
+    return queryset.filter(description__icontains=text)
+
+
+def ranked_search(owner, text, limit):
+    """Best matches first: BM25 on SQLite, trigram similarity on PostgreSQL."""
+    from .models import Expense
+
+    text = text.strip()
+    if not text:
+        return []
+    queryset = Expense.objects.filter(owner=owner)
+    match = match_expression(text)
+    vendor = _vendor(queryset)
+
+    if vendor == "sqlite" and match:
+        table = Expense._meta.db_table
+        return list(Expense.objects.raw(
+            f"SELECT e.* FROM {FTS_TABLE} JOIN {table} e ON e.id = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH %s AND e.owner_id = %s "
+            f"ORDER BY {FTS_TABLE}.rank, e.date DESC LIMIT %s",
+            [match, owner.pk, limit],
+        ))
+    queryset = queryset.filter(description__icontains=text)
+    if vendor == "postgresql":
+        similarity = Func(
+            Value(text), F("description"),
+            function="word_similarity", output_field=FloatField(),
+        )
+        queryset = queryset.annotate(rank=similarity).order_by("-rank", "-date")
+    return list(queryset[:limit])
@@ -1,17 +1,51 @@
 # expenses/serializers.py
-from rest_framework import serializers
-from .models import Expense
+from decimal import Decimal
 
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.fields import get_error_detail
+from rest_framework.settings import api_settings
 
-class ExpenseSerializer(serializers.ModelSerializer):
+from backend.metrics import TimedSerializerMixin
+from .models import Budget, Expense, ImportJob, RecurringExpense
+
+
+class ExpenseListSerializer(serializers.ListSerializer):
+    """
+    Batch validation for the bulk endpoint. Each item is validated on its
+    own so one bad row only rejects that row; ``partition`` returns the
+    ``(index, validated_data)`` pairs that passed and the per-index errors.
+    """
+
+    def partition(self, items):
+        if not isinstance(items, list):
+            raise serializers.ValidationError(
+                {"non_field_errors": ["Expected a list of items."]}
+            )
+        valid, errors = [], {}
+        for index, item in enumerate(items):
+            try:
+                valid.append((index, self.child.run_validation(item)))
+            except serializers.ValidationError as exc:
+                errors[index] = exc.detail
+            except DjangoValidationError as exc:
+                errors[index] = get_error_detail(exc)
+        return valid, errors
+
+
+class ExpenseSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     Full CRUD representation used by:
       • Expenses table (list & detail)
       • Add-/Edit-expense forms
+      • Bulk create / update (via ExpenseListSerializer)
     """
 
     class Meta:
         model = Expense
+        list_serializer_class = ExpenseListSerializer
         # All editable + meta fields the UI needs
         fields = (
             "id",
@@ -24,3 +58,197 @@ class ExpenseSerializer(serializers.ModelSerializer):
             "updated_at",
         )
         read_only_fields = ("created_at", "updated_at")
+
+
+# ─────────────────────────────────────────
+# Read fast path: values() rows + a field plan
+# ─────────────────────────────────────────
+def _plain(value):
+    return value
+
+
+def _decimal_formatter(field):
+    exponent = Decimal(1).scaleb(-field.decimal_places)
+
+    def fmt(value):
+        return f"{value.quantize(exponent, rounding=field.rounding):f}"
+    return fmt
+
+
+def _date(value):
+    return value.isoformat()
+
+
+def _datetime_formatter(tz):
+    # DRF's DateTimeField: converted to the current timezone, "Z" for UTC.
+    def fmt(value):
+        value = value.astimezone(tz).isoformat()
+        if value.endswith("+00:00"):
+            value = value[:-6] + "Z"
+        return value
+    return fmt
+
+
+def formatter(field, tz):
+    """
+    A one-argument function rendering a non-null database value exactly as
+    ``field.to_representation`` would with ``tz`` as the current timezone.
+    Fields left at DRF's default output settings get a shortcut; anything
+    else uses the field itself.
+    """
+    if isinstance(field, (serializers.CharField, serializers.ChoiceField, serializers.IntegerField)):
+        # CharField is str(), ChoiceField maps a choice to itself, IntegerField is int().
+        return _plain
+    if isinstance(field, serializers.DecimalField):
+        if (getattr(field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING)
+                and not field.localize and not field.normalize_output
+                and field.decimal_places is not None):
+            return _decimal_formatter(field)
+    elif isinstance(field, serializers.DateTimeField):
+        if (getattr(field, "format", api_settings.DATETIME_FORMAT) == ISO_8601
+                and not hasattr(field, "timezone") and settings.USE_TZ):
+            return _datetime_formatter(tz)
+    elif isinstance(field, serializers.DateField):
+        if getattr(field, "format", api_settings.DATE_FORMAT) == ISO_8601:
+            return _date
+    return field.to_representation
+
+
+class FieldPlanSerializer(serializers.BaseSerializer):
+    """
+    Read-only fast path for list responses. Takes ``values(*fields)`` dicts
+    (see ``values()``) and renders them exactly as ``Meta.serializer`` with
+    ``many=True`` would, formatting each field with a function picked once
+    per response instead of DRF's per-value field machinery.
+    """
+
+    class Meta:
+        serializer = None
+
+    @classmethod
+    def fields(cls):
+        return cls.Meta.serializer.Meta.fields
+
+    @classmethod
+    def values(cls, queryset):
+        return queryset.values(*cls.fields())
+
+    @classmethod
+    def plan(cls):
+        """``(field name, formatter)`` for every field that needs formatting."""
+        if "_fields" not in cls.__dict__:
+            cls._fields = cls.Meta.serializer().fields
+        # Looked up once here: it costs more than formatting a datetime.
+        tz = timezone.get_current_timezone()
+        return [
+            (name, fmt) for name in cls.fields()
+            if (fmt := formatter(cls._fields[name], tz)) is not _plain
+        ]
+
+    def to_representation(self, rows):
+        rows = list(rows)
+        plan = self.plan()
+        for row in rows:
+            for name, fmt in plan:
+                value = row[name]
+                if value is not None:
+                    row[name] = fmt(value)
+        return rows
+
+
+class ExpenseRowSerializer(TimedSerializerMixin, FieldPlanSerializer):
+    class Meta:
+        serializer = ExpenseSerializer
+
+
+class ImportJobSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Upload form for a CSV import and its progress report."""
+    rows_per_second = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = ImportJob
+        fields = (
+            "id",
+            "file",
+            "column_map",
+            "status",
+            "rows_processed",
+            "rows_imported",
+            "rows_rejected",
+            "rows_per_second",
+            "errors",
+            "message",
+            "started_at",
+            "finished_at",
+            "created_at",
+        )
+        read_only_fields = tuple(
+            field for field in fields if field not in ("file", "column_map")
+        )
+        extra_kwargs = {"file": {"write_only": True}}
+
+    def validate_file(self, value):
+        limit = getattr(settings, "EXPENSE_IMPORT_MAX_BYTES", 50 * 1024 * 1024)
+        if value.size > limit:
+            raise serializers.ValidationError(
+                f"Ensure this file has no more than {limit} bytes (it has {value.size})."
+            )
+        return value
+
+    def validate_column_map(self, value):
+        if not isinstance(value, dict) or not all(
+            isinstance(k, str) and isinstance(v, str) for k, v in value.items()
+        ):
+            raise serializers.ValidationError(
+                "Expected an object mapping CSV headers to expense fields."
+            )
+        return value
+
+
+DUPLICATE_BUDGET = "There is already a budget for this category."
+
+
+class BudgetSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """A monthly spending limit for one category."""
+
+    class Meta:
+        model = Budget
+        fields = ("id", "category", "amount", "created_at", "updated_at")
+        read_only_fields = ("created_at", "updated_at")
+
+    def validate_category(self, value):
+        existing = Budget.objects.filter(owner=self.context["request"].user, category=value)
+        if self.instance is not None:
+            existing = existing.exclude(pk=self.instance.pk)
+        if existing.exists():
+            raise serializers.ValidationError(DUPLICATE_BUDGET)
+        return value
+
+
+class RecurringExpenseSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """A repeating expense; ``next_date`` is when it is next written."""
+
+    class Meta:
+        model = RecurringExpense
+        fields = (
+            "id",
+            "amount",
+            "category",
+            "payment_method",
+            "description",
+            "frequency",
+            "interval",
+            "start_date",
+            "end_date",
+            "next_date",
+            "created_at",
+            "updated_at",
+        )
+        read_only_fields = ("next_date", "created_at", "updated_at")
+
+    def validate(self, attrs):
+        start = attrs.get("start_date", getattr(self.instance, "start_date", None))
+        end = attrs.get("end_date", getattr(self.instance, "end_date", None))
+        if start and end and end < start:
+            raise serializers.ValidationError({"end_date": ["Must not be before the start date."]})
+        return attrs
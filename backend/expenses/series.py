@@ -0,0 +1,126 @@
+"""
+Time series over the daily rollups.
+
+A series is described by a ``SeriesSpec``: the bucket granularity (day,
+week, month or year), how many buckets to return, ending with the current
+one, and optionally a field to split the totals by. Weeks start on Monday.
+Every bucket in range is present, zero-filled, so charts never have gaps.
+"""
+from collections import namedtuple
+from datetime import date, timedelta
+
+from django.db.models import F, Sum
+from django.db.models.functions import TruncMonth, TruncWeek, TruncYear
+
+from .models import DailyRollup
+
+SeriesSpec = namedtuple("SeriesSpec", "granularity periods group_by")
+
+# Upper bounds keep a single request from asking for an unbounded range.
+MAX_PERIODS = {"day": 366, "week": 260, "month": 120, "year": 20}
+GROUP_FIELDS = ("category", "payment_method")
+MAX_SERIES = 8
+
+_TRUNC = {"day": F, "week": TruncWeek, "month": TruncMonth, "year": TruncYear}
+
+
+def make_spec(granularity, periods, group_by=None):
+    """Validated ``SeriesSpec``; raises ValueError with a client-facing message."""
+    if granularity not in MAX_PERIODS:
+        raise ValueError(
+            f'"{granularity}" is not a valid granularity; use one of {", ".join(MAX_PERIODS)}.'
+        )
+    try:
+        periods = int(periods)
+    except (TypeError, ValueError):
+        raise ValueError("The number of periods must be an integer.") from None
+    if not 1 <= periods <= MAX_PERIODS[granularity]:
+        raise ValueError(
+            f"Ask for between 1 and {MAX_PERIODS[granularity]} {granularity} periods."
+        )
+    if group_by not in (None, *GROUP_FIELDS):
+        raise ValueError(
+            f'Cannot group by "{group_by}"; use one of {", ".join(GROUP_FIELDS)}.'
+        )
+    return SeriesSpec(granularity, periods, group_by)
+
+
+def parse_spec(text):
+    """``"month:12"`` or ``"month:12:category"`` → ``SeriesSpec``."""
+    parts = text.split(":")
+    if len(parts) not in (2, 3) or not all(parts):
+        raise ValueError(f'"{text}" is not of the form granularity:periods[:group_by].')
+    return make_spec(*parts)
+
+
+# ─────────────────────────────────────────
+# Buckets
+# ─────────────────────────────────────────
+def _add_months(day, months):
+    years, month = divmod(day.month - 1 + months, 12)
+    return date(day.year + years, month + 1, 1)
+
+
+def bucket_start(day, granularity):
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    if granularity == "year":
+        return day.replace(month=1, day=1)
+    return day
+
+
+def _shift(start, granularity, count):
+    if granularity == "day":
+        return start + timedelta(days=count)
+    if granularity == "week":
+        return start + timedelta(weeks=count)
+    return _add_months(start, count * (12 if granularity == "year" else 1))
+
+
+def buckets(spec, today):
+    """Start date of every bucket in range, oldest first."""
+    first = _shift(bucket_start(today, spec.granularity), spec.granularity, 1 - spec.periods)
+    starts = [first]
+    for _ in range(spec.periods - 1):
+        starts.append(_shift(starts[-1], spec.granularity, 1))
+    return starts
+
+
+# ─────────────────────────────────────────
+# Query + zero-fill
+# ─────────────────────────────────────────
+def series_queryset(user, spec, starts, today):
+    """Bucket totals (and the group field, if any) as ``values()`` rows."""
+    fields = ("bucket", spec.group_by) if spec.group_by else ("bucket",)
+    return (
+        DailyRollup.objects
+        .filter(owner=user, date__gte=starts[0], date__lte=today)
+        .order_by()
+        .annotate(bucket=_TRUNC[spec.granularity]("date"))
+        .values(*fields)
+        .annotate(bucket_total=Sum("total"))
+    )
+
+
+def build(spec, starts, rows):
+    """
+    Zero-filled payload for one spec from its ``series_queryset`` rows. Each
+    group gets a list of totals aligned with ``buckets``; groups without
+    spending in range are left out, and ungrouped specs have one ``None`` key.
+    """
+    position = {start: index for index, start in enumerate(starts)}
+    totals = {} if spec.group_by else {None: [0.0] * len(starts)}
+    for row in rows:
+        key = row[spec.group_by] if spec.group_by else None
+        if key not in totals:
+            totals[key] = [0.0] * len(starts)
+        totals[key][position[row["bucket"]]] = float(row["bucket_total"])
+    return {
+        "granularity": spec.granularity,
+        "periods": spec.periods,
+        "group_by": spec.group_by,
+        "buckets": [start.isoformat() for start in starts],
+        "series": [{"key": key, "totals": totals[key]} for key in sorted(totals)],
+    }
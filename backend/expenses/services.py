@@ -1,30 +1,277 @@
+import asyncio
 from datetime import date, timedelta
+from django.db import IntegrityError, transaction
+from django.http import Http404
 from django.utils import timezone
-from django.db.models import Sum
-from .models import Expense
+from django.db.models import Min, Q, Sum
+from rest_framework.exceptions import ValidationError
+from . import analytics, budgets, distribution, recurring, rollups, series, sync
+from .cache import response_cache
+from .models import Budget, DailyRollup, Expense, RecurringExpense
+from .serializers import DUPLICATE_BUDGET
+
+
+# ─────────────────────────────────────────
+# Writes — keep derived tables in step
+# ─────────────────────────────────────────
+def create_expense(owner, validated_data):
+    with transaction.atomic():
+        expense = Expense(owner=owner, **validated_data)
+        sync.stamp([expense])
+        expense.save(force_insert=True)
+        rollups.apply_changes(added=[rollups.entry_of(expense)])
+        response_cache.bump_on_commit(owner.id)
+    return expense
+
+
+def _lock_entries(queryset):
+    """
+    Lock the rows in id order and return ``{id: entry}`` as stored, so the
+    rollups come off what a concurrent write left rather than what was read.
+    """
+    return {
+        row[0]: row[1:]
+        for row in queryset.select_for_update().order_by("id")
+        .values_list("id", *rollups.ENTRY_FIELDS)
+    }
+
+
+def _restore(expense, entry):
+    for field, value in zip(rollups.ENTRY_FIELDS, entry):
+        setattr(expense, field, value)
+
+
+def update_expense(expense, validated_data):
+    with transaction.atomic():
+        before = _lock_entries(Expense.objects.filter(pk=expense.pk)).get(expense.pk)
+        if before is None:
+            raise Http404
+        _restore(expense, before)
+        for attr, value in validated_data.items():
+            setattr(expense, attr, value)
+        sync.stamp([expense])
+        expense.save()
+        rollups.apply_changes(added=[rollups.entry_of(expense)], removed=[before])
+        response_cache.bump_on_commit(expense.owner_id)
+    return expense
+
+
+def delete_expense(expense):
+    with transaction.atomic():
+        removed = _lock_entries(Expense.objects.filter(pk=expense.pk))
+        if not removed:
+            raise Http404
+        rollups.apply_changes(removed=removed.values())
+        sync.tombstone(expense.owner_id, [expense.pk])
+        expense.delete()
+        response_cache.bump_on_commit(expense.owner_id)
+
+
+# ─────────────────────────────────────────
+# Batched writes
+# ─────────────────────────────────────────
+BULK_CHUNK_SIZE = 500
+
+
+def _chunks(items, size=BULK_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def bulk_create_expenses(owner, rows):
+    """Insert validated rows in chunks; returns the saved instances."""
+    expenses = [Expense(owner=owner, **row) for row in rows]
+    with transaction.atomic():
+        sync.stamp(expenses)
+        for chunk in _chunks(expenses):
+            Expense.objects.bulk_create(chunk)
+        rollups.apply_changes(added=[rollups.entry_of(e) for e in expenses])
+        response_cache.bump_on_commit(owner.id)
+    return expenses
+
+
+def bulk_update_expenses(owner, changes):
+    """
+    Apply ``(expense, validated_data)`` pairs with chunked ``bulk_update``.
+    ``updated_at`` is stamped by hand because ``bulk_update`` skips ``auto_now``.
+    Rows deleted since they were read are skipped.
+    """
+    now = timezone.now()
+    removed, added, expenses, fields = [], [], [], {"updated_at", "sync_seq"}
+    with transaction.atomic():
+        stored = {}
+        for chunk in _chunks(sorted(expense.pk for expense, _ in changes)):
+            stored.update(_lock_entries(Expense.objects.filter(owner=owner, id__in=chunk)))
+        for expense, validated_data in changes:
+            before = stored.get(expense.pk)
+            if before is None:
+                continue
+            _restore(expense, before)
+            removed.append(before)
+            for attr, value in validated_data.items():
+                setattr(expense, attr, value)
+            expense.updated_at = now
+            added.append(rollups.entry_of(expense))
+            expenses.append(expense)
+            fields.update(validated_data)
+
+        sync.stamp(expenses)
+        for chunk in _chunks(expenses):
+            Expense.objects.bulk_update(chunk, sorted(fields))
+        rollups.apply_changes(added=added, removed=removed)
+        response_cache.bump_on_commit(owner.id)
+    return expenses
+
+
+def bulk_delete_expenses(owner, ids):
+    """Delete the owner's expenses among ``ids``; returns the ids removed."""
+    removed = {}
+    with transaction.atomic():
+        for chunk in _chunks(sorted(set(ids))):
+            removed.update(_lock_entries(Expense.objects.filter(owner=owner, id__in=chunk)))
+        deleted = sorted(removed)
+        for chunk in _chunks(deleted):
+            Expense.objects.filter(id__in=chunk).delete()
+        sync.tombstone(owner.id, deleted)
+        rollups.apply_changes(removed=removed.values())
+        response_cache.bump_on_commit(owner.id)
+    return deleted
+
+
+# ─────────────────────────────────────────
+# Budgets
+# ─────────────────────────────────────────
+def create_budget(owner, validated_data):
+    try:
+        with transaction.atomic():
+            budget = Budget.objects.create(owner=owner, **validated_data)
+            response_cache.bump_on_commit(owner.id)
+    except IntegrityError:
+        # Another request took the category after the serializer checked it.
+        raise ValidationError({"category": [DUPLICATE_BUDGET]})
+    return budget
+
+
+def update_budget(budget, validated_data):
+    try:
+        with transaction.atomic():
+            for attr, value in validated_data.items():
+                setattr(budget, attr, value)
+            budget.save()
+            response_cache.bump_on_commit(budget.owner_id)
+    except IntegrityError:
+        raise ValidationError({"category": [DUPLICATE_BUDGET]})
+    return budget
+
+
+def delete_budget(budget):
+    with transaction.atomic():
+        budget.delete()
+        response_cache.bump_on_commit(budget.owner_id)
+
+
+def get_budget_status(user, month):
+    """Every budget's spend and status in ``month``, from the running totals."""
+    return [budgets.describe(budget) for budget in budgets.with_spend(user, month)]
+
+
+async def aget_budget_status(user, month):
+    return [budgets.describe(budget) async for budget in budgets.with_spend(user, month)]
+
+
+# ─────────────────────────────────────────
+# Recurring expenses
+# ─────────────────────────────────────────
+SCHEDULE_FIELDS = {"frequency", "interval", "start_date", "end_date"}
+
+
+def create_recurring_expense(owner, validated_data):
+    with transaction.atomic():
+        rule = RecurringExpense(owner=owner, **validated_data)
+        recurring.reschedule(rule)
+        rule.save()
+    return rule
+
+
+def update_recurring_expense(rule, validated_data):
+    """Occurrences already written stay; a new schedule resumes after them."""
+    with transaction.atomic():
+        for attr, value in validated_data.items():
+            setattr(rule, attr, value)
+        if SCHEDULE_FIELDS & validated_data.keys():
+            recurring.reschedule(rule)
+        rule.save()
+    return rule
+
+
+# ─────────────────────────────────────────
+# Reads — served from DailyRollup
+# ─────────────────────────────────────────
+def get_series(user, specs):
+    """One zero-filled payload per ``series.SeriesSpec``, in order."""
+    today = timezone.now().date()
+    payloads = []
+    for spec in specs:
+        starts = series.buckets(spec, today)
+        rows = series.series_queryset(user, spec, starts, today)
+        payloads.append(series.build(spec, starts, rows))
+    return payloads
+
+
+async def aget_series(user, specs):
+    today = timezone.now().date()
+    starts = [series.buckets(spec, today) for spec in specs]
+
+    async def fetch(spec, spec_starts):
+        return [row async for row in series.series_queryset(user, spec, spec_starts, today)]
+
+    rows = await asyncio.gather(*map(fetch, specs, starts))
+    return [series.build(*args) for args in zip(specs, starts, rows)]
+
+
+def _daily(payload):
+    totals = payload["series"][0]["totals"]
+    return [{"day": day, "total": total} for day, total in zip(payload["buckets"], totals)]
 
 
 def get_daily_series(user, days):
-    end_date = timezone.now().date()
-    cutoff = end_date - timedelta(days=days - 1)
-    qs = (
-        Expense.objects
-        .filter(owner=user, date__gte=cutoff, date__lte=end_date)
-        .values("date")
-        .annotate(total=Sum("amount"))
+    """The last ``days`` days as ``[{"day", "total"}]``; see ``get_series``."""
+    spec = series.make_spec("day", days)
+    return _daily(get_series(user, [spec])[0])
+
+
+async def aget_daily_series(user, days):
+    spec = series.make_spec("day", days)
+    return _daily((await aget_series(user, [spec]))[0])
+
+
+def get_reports(user, days, window):
+    """The NumPy reports over one columnar load of the owner's expenses."""
+    columns = analytics.load(user)
+    return {
+        "rolling_average": analytics.rolling_average(
+            columns, timezone.now().date(), days=days, window=window
+        ),
+        "category_percentiles": analytics.category_percentiles(columns),
+        "monthly": analytics.monthly_changes(columns),
+    }
+
+
+def get_distribution(user, first, last, limit=10):
+    """Category breakdown and top ``limit`` merchants for months ``first``..``last``."""
+    return distribution.build(
+        first, last,
+        distribution.categories(user, first, last),
+        distribution.merchants(user, first, last, limit),
     )
-    totals_by_date = {row["date"]: float(row["total"]) for row in qs}
-    return [
-        {
-            "day": (cutoff + timedelta(days=i)).strftime("%Y-%m-%d"),
-            "total": totals_by_date.get(cutoff + timedelta(days=i), 0.0)
-        }
-        for i in range(days)
-    ]
 
 
-def get_dashboard_summary(user):
-    today = timezone.now().date()
+def _dashboard_queries(user, today):
+    """
+    The dashboard's aggregate: one conditional-aggregation pass over the
+    owner's daily rollups; and the month's category distribution, read
+    straight from its running per-category totals.
+    """
     current_month_start = today.replace(day=1)
 
     if today.month == 1:
@@ -36,20 +283,29 @@ def get_dashboard_summary(user):
 
     week_start = today - timedelta(days=today.weekday())
 
-    current_month_qs = Expense.objects.filter(
-        owner=user,
-        date__gte=current_month_start,
-        date__lte=today
+    in_current_month = Q(date__gte=current_month_start, date__lte=today)
+    in_previous_month = Q(
+        date__gte=previous_month_start, date__lte=previous_month_end
     )
+    in_current_week = Q(date__gte=week_start, date__lte=today)
 
-    current_month_total = current_month_qs.aggregate(
-        total=Sum('amount'))['total'] or 0
+    rollups_qs = DailyRollup.objects.filter(owner=user)
+    totals = dict(
+        current_month_total=Sum("total", filter=in_current_month),
+        previous_month_total=Sum("total", filter=in_previous_month),
+        current_week_total=Sum("total", filter=in_current_week),
+        all_time_total=Sum("total"),
+        first_date=Min("date"),
+    )
+    categories = distribution.categories(user, current_month_start, current_month_start)
+    return rollups_qs, totals, categories
 
-    previous_month_total = Expense.objects.filter(
-        owner=user,
-        date__gte=previous_month_start,
-        date__lte=previous_month_end
-    ).aggregate(total=Sum('amount'))['total'] or 0
+
+def _dashboard_payload(today, totals, categories, budget_status):
+    current_month_total = totals["current_month_total"] or 0
+    previous_month_total = totals["previous_month_total"] or 0
+    current_week_total = totals["current_week_total"] or 0
+    active_categories_count = len(categories)
 
     if previous_month_total > 0:
         trend_percentage = (
@@ -58,43 +314,26 @@ def get_dashboard_summary(user):
     else:
         trend_percentage = 0 if current_month_total == 0 else 100
 
-    first_expense = Expense.objects.filter(owner=user).order_by('date').first()
-    if first_expense:
+    first_date = totals["first_date"]
+    if first_date:
         months_passed = (
-            (today.year - first_expense.date.year) * 12 +
-            (today.month - first_expense.date.month)
+            (today.year - first_date.year) * 12 +
+            (today.month - first_date.month)
         ) + 1
-        all_time_total = Expense.objects.filter(
-            owner=user
-        ).aggregate(total=Sum('amount'))['total'] or 0
+        all_time_total = totals["all_time_total"] or 0
         monthly_average = all_time_total / months_passed if months_passed > 0 else 0
     else:
         monthly_average = 0
 
-    active_categories_count = current_month_qs.values(
-        'category').distinct().count()
-
-    top_category_data = current_month_qs.values(
-        'category'
-    ).annotate(
-        total=Sum('amount')
-    ).order_by('-total').first()
-
-    if top_category_data and current_month_total > 0:
-        top_category = top_category_data['category']
+    if categories and current_month_total > 0:
+        top_category = categories[0]['category']
         top_category_percentage = (
-            top_category_data['total'] / current_month_total
+            categories[0]['total'] / current_month_total
         ) * 100
     else:
         top_category = None
         top_category_percentage = 0
 
-    current_week_total = Expense.objects.filter(
-        owner=user,
-        date__gte=week_start,
-        date__lte=today
-    ).aggregate(total=Sum('amount'))['total'] or 0
-
     return {
         'current_month_total': float(current_month_total),
         'previous_month_total': float(previous_month_total),
@@ -104,4 +343,30 @@ def get_dashboard_summary(user):
         'top_category': top_category,
         'top_category_percentage': round(float(top_category_percentage), 2),
         'current_week_total': float(current_week_total),
-    }
\ No newline at end of file
+        'budgets': budget_status,
+    }
+
+
+def get_dashboard_summary(user):
+    today = timezone.now().date()
+    rollups_qs, totals, categories = _dashboard_queries(user, today)
+    totals = rollups_qs.aggregate(**totals)
+    # Only worth a second query when the month has any spending at all.
+    categories = list(categories) if totals["current_month_total"] else []
+    return _dashboard_payload(
+        today, totals, categories, get_budget_status(user, today)
+    )
+
+
+async def aget_dashboard_summary(user):
+    """
+    Same queries as ``get_dashboard_summary``, one after another: the async
+    ORM runs them all on the one thread-sensitive executor.
+    """
+    today = timezone.now().date()
+    rollups_qs, totals, categories = _dashboard_queries(user, today)
+    totals = await rollups_qs.aaggregate(**totals)
+    # Only worth a second query when the month has any spending at all.
+    categories = [row async for row in categories] if totals["current_month_total"] else []
+    budget_status = await aget_budget_status(user, today)
+    return _dashboard_payload(today, totals, categories, budget_status)
@@ -0,0 +1,167 @@
+"""
+Delta sync for offline-first clients.
+
+Every write to a user's expenses takes the next numbers from their
+``SyncSequence`` and stamps them on the rows it touches (``Expense.sync_seq``);
+a delete leaves an ``ExpenseTombstone`` carrying its own number instead.
+A client keeps the cursor of its last sync and asks for what changed after
+it: the rows and tombstones numbered past it, read in order off the
+``(owner, sync_seq)`` indexes, so a sync costs what changed rather than
+what the user has.
+
+``allocate`` takes the numbers with an upsert on the user's sequence row,
+which stays locked until the write commits. A user's writes therefore
+commit in the order of their numbers: once the sequence reads ``value``,
+every change numbered up to it has committed. A sync reads the sequence
+first and stops both of its queries at that number, so a write landing
+between the queries waits for the next sync rather than slipping under
+the cursor.
+
+Tombstones are pruned after ``TOMBSTONE_DAYS`` (``manage.py
+prune_tombstones``), which raises the sequence's ``pruned_upto``. A cursor
+that predates a prune may have missed deletes, so the response says
+``reset`` and starts over: the client drops its copy and pages through the
+full set. The cursor also records the ``pruned_upto`` it was issued under,
+so the pages of that resync are not themselves mistaken for stale.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Max, OuterRef, Subquery
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Expense, ExpenseTombstone, SyncSequence
+from .serializers import ExpenseRowSerializer
+
+MAX_LIMIT = 1000
+ALLOCATE_CHUNK_SIZE = 400  # owners per upsert: two parameters each
+TOMBSTONE_DAYS = getattr(settings, "EXPENSE_SYNC_TOMBSTONE_DAYS", 90)
+
+
+# ─────────────────────────────────────────
+# Writes — call inside the write's transaction
+# ─────────────────────────────────────────
+def allocate(counts):
+    """
+    Reserve ``counts[owner_id]`` consecutive change numbers for each owner;
+    returns ``{owner_id: first number}``.
+    """
+    table = connection.ops.quote_name(SyncSequence._meta.db_table)
+    # Owners in a fixed order, so concurrent writers lock their rows alike.
+    owners = sorted(counts)
+    firsts = {}
+    with connection.cursor() as cursor:
+        for start in range(0, len(owners), ALLOCATE_CHUNK_SIZE):
+            chunk = owners[start:start + ALLOCATE_CHUNK_SIZE]
+            cursor.execute(
+                f"INSERT INTO {table} (owner_id, value, pruned_upto) "
+                f"VALUES {', '.join(['(%s, %s, 0)'] * len(chunk))} "
+                f"ON CONFLICT (owner_id) DO UPDATE SET value = {table}.value + excluded.value "
+                "RETURNING owner_id, value",
+                [param for owner_id in chunk for param in (owner_id, counts[owner_id])],
+            )
+            firsts.update((owner_id, value - counts[owner_id] + 1) for owner_id, value in cursor.fetchall())
+    return firsts
+
+
+def stamp(expenses):
+    """Give each expense about to be saved the next change number of its owner."""
+    by_owner = defaultdict(list)
+    for expense in expenses:
+        by_owner[expense.owner_id].append(expense)
+    firsts = allocate({owner_id: len(owned) for owner_id, owned in by_owner.items()})
+    for owner_id, owned in by_owner.items():
+        for seq, expense in enumerate(owned, firsts[owner_id]):
+            expense.sync_seq = seq
+
+
+def tombstone(owner_id, ids):
+    """Record the deletion of the owner's expenses ``ids``."""
+    if not ids:
+        return
+    first = allocate({owner_id: len(ids)})[owner_id]
+    ExpenseTombstone.objects.bulk_create(
+        ExpenseTombstone(owner_id=owner_id, expense_id=expense_id, sync_seq=seq)
+        for seq, expense_id in enumerate(ids, first)
+    )
+
+
+# ─────────────────────────────────────────
+# Reads
+# ─────────────────────────────────────────
+def parse_cursor(value):
+    """``"<seq>.<pruned_upto>"`` (or a bare ``seq``) → ``(seq, pruned_upto)``; raises ``ValueError``."""
+    seq, _, horizon = (value or "0").partition(".")
+    seq, horizon = int(seq), int(horizon or 0)
+    if seq < 0 or horizon < 0:
+        raise ValueError(value)
+    return seq, horizon
+
+
+def changes(owner_id, since=0, horizon=0, limit=MAX_LIMIT):
+    """
+    The owner's changes numbered after ``since``, oldest first, at most
+    ``limit``: ``{"changed": expense rows, "deleted": expense ids, "cursor",
+    "has_more", "reset"}``. Changed rows are ``ExpenseRowSerializer`` values.
+    Only changes numbered up to the sequence's value when the sync started are
+    read, so the rows and tombstones come from the same committed prefix.
+    """
+    upto, pruned_upto = (
+        SyncSequence.objects.filter(owner_id=owner_id)
+        .values_list("value", "pruned_upto").first() or (0, 0)
+    )
+    # A client starting from nothing has nothing to drop.
+    reset = since > 0 and pruned_upto > max(since, horizon)
+    if reset:
+        since = 0
+
+    rows = list(
+        Expense.objects.filter(owner_id=owner_id, sync_seq__gt=since, sync_seq__lte=upto)
+        .order_by("sync_seq").values(*ExpenseRowSerializer.fields(), "sync_seq")[:limit + 1]
+    )
+    tombstones = list(
+        ExpenseTombstone.objects.filter(owner_id=owner_id, sync_seq__gt=since, sync_seq__lte=upto)
+        .order_by("sync_seq").values_list("sync_seq", "expense_id")[:limit + 1]
+    )
+    merged = sorted(
+        [(row["sync_seq"], row) for row in rows] + [(seq, expense_id) for seq, expense_id in tombstones],
+        key=lambda change: change[0],
+    )
+    page = merged[:limit]
+
+    changed, deleted = [], []
+    for _, change in page:
+        if isinstance(change, dict):
+            del change["sync_seq"]
+            changed.append(change)
+        else:
+            deleted.append(change)
+    last = page[-1][0] if page else since
+    return {
+        "changed": changed,
+        "deleted": deleted,
+        "cursor": f"{last}.{pruned_upto}",
+        "has_more": len(merged) > limit,
+        "reset": reset,
+    }
+
+
+# ─────────────────────────────────────────
+# Housekeeping
+# ─────────────────────────────────────────
+def prune_tombstones(days=TOMBSTONE_DAYS):
+    """Delete tombstones older than ``days``; returns how many."""
+    old = ExpenseTombstone.objects.filter(deleted_at__lt=timezone.now() - timedelta(days=days))
+    newest_pruned = (
+        old.filter(owner_id=OuterRef("owner_id")).order_by()
+        .values("owner_id").annotate(upto=Max("sync_seq")).values("upto")
+    )
+    with transaction.atomic():
+        SyncSequence.objects.filter(owner_id__in=old.values("owner_id")).update(
+            pruned_upto=Greatest("pruned_upto", Subquery(newest_pruned)),
+        )
+        deleted, _ = old.delete()
+    return deleted
@@ -1,3 +1,1642 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import OperationalError, connection, connections
+from django.db.models import Count
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import AsyncClient, AsyncRequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, force_authenticate
+from rest_framework_simplejwt.tokens import AccessToken
+
+from backend import metrics
+from backend.renderers import FastJSONRenderer
+from backend.routers import REPLICA, ReplicaRouter, use_replica
+from users.authentication import cached_row, user_cache
+from . import analytics, budgets, imports, recurring, rollups, series, sync
+from .cache import LocMemLRUBackend, MISSING, response_cache
+from .models import (
+    Budget,
+    DailyRollup,
+    Expense,
+    ExpenseTombstone,
+    ImportJob,
+    MonthlyCategoryTotal,
+    MonthlyMerchantTotal,
+    RecurringExpense,
+)
+from .sampledata import seed_user
+from .serializers import (
+    DUPLICATE_BUDGET,
+    BudgetSerializer,
+    ExpenseRowSerializer,
+    ExpenseSerializer,
+    formatter,
+)
+from .views import (
+    AsyncDailySeriesView,
+    AsyncDashboardSummaryView,
+    AsyncExpenseRecentView,
+    AsyncSeriesView,
+    ExpenseListCreateView,
+)
+from .management.commands import generate_sample_data
+from .services import (
+    bulk_create_expenses,
+    bulk_delete_expenses,
+    bulk_update_expenses,
+    create_expense,
+    create_recurring_expense,
+    delete_expense,
+    get_budget_status,
+    get_daily_series,
+    get_dashboard_summary,
+    get_distribution,
+    get_series,
+    update_expense,
+)
+
+User = get_user_model()
+
+
+def make_user(email="owner@example.com"):
+    return User.objects.create_user(
+        username=email.split("@")[0], email=email, password="pass12345!"
+    )
+
+
+def make_expense(owner, amount, day, category=Expense.Category.OTHER,
+                 payment_method=Expense.PaymentMethod.OTHER, description="x"):
+    return create_expense(owner, {
+        "amount": Decimal(amount),
+        "date": day,
+        "category": category,
+        "payment_method": payment_method,
+        "description": description,
+    })
+
+
+# ─────────────────────────────────────────
+# Dashboard
+# ─────────────────────────────────────────
+class DashboardSummaryTests(TestCase):
+    def setUp(self):
+        response_cache.clear()
+        self.user = make_user()
+        self.today = timezone.now().date()
+        self.month_start = self.today.replace(day=1)
+        self.previous_month_day = self.month_start - timedelta(days=1)
+
+    def test_empty_summary(self):
+        self.assertEqual(get_dashboard_summary(self.user), {
+            "current_month_total": 0.0,
+            "previous_month_total": 0.0,
+            "trend_percentage": 0.0,
+            "monthly_average": 0.0,
+            "active_categories_count": 0,
+            "top_category": None,
+            "top_category_percentage": 0.0,
+            "current_week_total": 0.0,
+            "budgets": [],
+        })
+
+    def test_summary_figures(self):
+        other = make_user("other@example.com")
+        make_expense(other, "999.00", self.today, Expense.Category.HOUSING)
+
+        seeded = [
+            make_expense(self.user, "30.00", self.today, Expense.Category.GROCERIES),
+            make_expense(self.user, "10.00", self.today, Expense.Category.GROCERIES),
+            make_expense(self.user, "60.00", self.month_start, Expense.Category.DINING_OUT),
+            make_expense(self.user, "50.00", self.previous_month_day),
+        ]
+
+        # Early in a month, the week reaches back into the previous one.
+        week_start = self.today - timedelta(days=self.today.weekday())
+        week_total = float(sum(e.amount for e in seeded if e.date >= week_start))
+
+        summary = get_dashboard_summary(self.user)
+
+        self.assertEqual(summary["current_month_total"], 100.0)
+        self.assertEqual(summary["previous_month_total"], 50.0)
+        self.assertEqual(summary["trend_percentage"], 100.0)
+        self.assertEqual(summary["monthly_average"], 75.0)
+        self.assertEqual(summary["active_categories_count"], 2)
+        self.assertEqual(summary["top_category"], Expense.Category.DINING_OUT)
+        self.assertEqual(summary["top_category_percentage"], 60.0)
+        self.assertEqual(summary["current_week_total"], week_total)
+
+    def test_query_count(self):
+        for i in range(20):
+            make_expense(
+                self.user, "5.00", self.today - timedelta(days=i * 7),
+                list(Expense.Category)[i % len(Expense.Category)],
+            )
+
+        with self.assertNumQueries(3):
+            get_dashboard_summary(self.user)
+
+    def test_endpoint(self):
+        make_expense(self.user, "12.50", self.today)
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        response = client.get("/api/expenses/dashboard/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["current_month_total"], 12.5)
+
+
+# ─────────────────────────────────────────
+# Budgets
+# ─────────────────────────────────────────
+class BudgetTests(TestCase):
+    def setUp(self):
+        response_cache.clear()
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.today = timezone.now().date()
+        self.month = self.today.replace(day=1)
+
+    def totals(self):
+        return set(MonthlyCategoryTotal.objects.filter(owner=self.user).values_list(
+            "month", "category", "total", "count"
+        ))
+
+    def test_monthly_totals_follow_every_write(self):
+        last_month = self.month - timedelta(days=1)
+        expense = make_expense(self.user, "20.00", self.today, Expense.Category.GROCERIES)
+        make_expense(self.user, "5.00", self.today, Expense.Category.GROCERIES)
+        self.assertEqual(self.totals(), {(self.month, "GROCERIES", Decimal("25.00"), 2)})
+
+        self.client.patch(f"/api/expenses/{expense.id}/", {"date": last_month.isoformat()})
+        self.assertEqual(self.totals(), {
+            (self.month, "GROCERIES", Decimal("5.00"), 1),
+            (last_month.replace(day=1), "GROCERIES", Decimal("20.00"), 1),
+        })
+
+        self.client.delete(f"/api/expenses/{expense.id}/")
+        self.assertEqual(self.totals(), {(self.month, "GROCERIES", Decimal("5.00"), 1)})
+        self.assertEqual(rollups.verify([self.user.id]), [])
+
+    def test_status_thresholds(self):
+        self.assertEqual(budgets.status_of(Decimal("100"), Decimal("79.99")), budgets.OK)
+        self.assertEqual(budgets.status_of(Decimal("100"), Decimal("80")), budgets.WARNING)
+        self.assertEqual(budgets.status_of(Decimal("100"), Decimal("100")), budgets.WARNING)
+        self.assertEqual(budgets.status_of(Decimal("100"), Decimal("100.01")), budgets.OVER)
+
+    def test_status_reads_running_totals(self):
+        for category in ("GROCERIES", "DINING_OUT", "UTILITIES"):
+            self.client.post("/api/expenses/budgets/", {"category": category, "amount": "100.00"})
+        make_expense(self.user, "85.00", self.today, Expense.Category.DINING_OUT)
+        make_expense(self.user, "120.00", self.today, Expense.Category.UTILITIES)
+        make_expense(self.user, "500.00", self.month - timedelta(days=1), Expense.Category.GROCERIES)
+
+        with self.assertNumQueries(1):
+            status_by_category = {
+                entry["category"]: entry for entry in get_budget_status(self.user, self.today)
+            }
+
+        self.assertEqual(status_by_category["GROCERIES"]["spent"], 0.0)
+        self.assertEqual(status_by_category["GROCERIES"]["status"], budgets.OK)
+        self.assertEqual(status_by_category["DINING_OUT"]["used_percentage"], 85.0)
+        self.assertEqual(status_by_category["DINING_OUT"]["status"], budgets.WARNING)
+        self.assertEqual(status_by_category["UTILITIES"]["remaining"], -20.0)
+        self.assertEqual(status_by_category["UTILITIES"]["status"], budgets.OVER)
+
+    def test_endpoints(self):
+        created = self.client.post("/api/expenses/budgets/", {"category": "EDUCATION", "amount": "50.00"})
+        self.assertEqual(created.status_code, 201)
+        duplicate = self.client.post("/api/expenses/budgets/", {"category": "EDUCATION", "amount": "9.00"})
+        self.assertEqual(duplicate.status_code, 400)
+
+        make_expense(self.user, "45.00", self.today, Expense.Category.EDUCATION)
+        response = self.client.get("/api/expenses/budgets/status/")
+        self.assertEqual(response.json()[0]["status"], budgets.WARNING)
+        self.assertEqual(
+            self.client.get("/api/expenses/dashboard/").json()["budgets"], response.json()
+        )
+
+        self.client.patch(f"/api/expenses/budgets/{created.json()['id']}/", {"amount": "40.00"})
+        self.assertEqual(
+            self.client.get("/api/expenses/budgets/status/").json()[0]["status"], budgets.OVER
+        )
+        previous = (self.month - timedelta(days=1)).strftime("%Y-%m")
+        self.assertEqual(
+            self.client.get(f"/api/expenses/budgets/status/?month={previous}").json()[0]["spent"],
+            0.0,
+        )
+        self.assertEqual(
+            self.client.get("/api/expenses/budgets/status/?month=2024-13").status_code, 400
+        )
+
+        self.client.delete(f"/api/expenses/budgets/{created.json()['id']}/")
+        self.assertEqual(self.client.get("/api/expenses/budgets/").json(), [])
+
+    def test_racing_duplicate_is_a_validation_error(self):
+        created = self.client.post("/api/expenses/budgets/", {"category": "EDUCATION", "amount": "50.00"})
+        other = self.client.post("/api/expenses/budgets/", {"category": "HOUSING", "amount": "50.00"})
+
+        # As if a concurrent request got in between the check and the write.
+        with mock.patch.object(BudgetSerializer, "validate_category", lambda self, value: value):
+            duplicate = self.client.post("/api/expenses/budgets/", {"category": "EDUCATION", "amount": "9.00"})
+            moved = self.client.patch(f"/api/expenses/budgets/{other.json()['id']}/", {"category": "EDUCATION"})
+
+        self.assertEqual(duplicate.status_code, 400)
+        self.assertEqual(duplicate.json(), {"category": [DUPLICATE_BUDGET]})
+        self.assertEqual(moved.status_code, 400)
+        self.assertEqual(
+            Budget.objects.get(pk=created.json()["id"]).amount, Decimal("50.00")
+        )
+
+    def test_budgets_are_private(self):
+        other = make_user("other@example.com")
+        self.client.post("/api/expenses/budgets/", {"category": "EDUCATION", "amount": "50.00"})
+        budget_id = self.client.get("/api/expenses/budgets/").json()[0]["id"]
+
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get("/api/expenses/budgets/").json(), [])
+        self.assertEqual(self.client.get(f"/api/expenses/budgets/{budget_id}/").status_code, 404)
+        self.assertEqual(
+            self.client.post("/api/expenses/budgets/", {"category": "EDUCATION", "amount": "5.00"}).status_code,
+            201,
+        )
+
+
+# ─────────────────────────────────────────
+# Category distribution + top merchants
+# ─────────────────────────────────────────
+class DistributionTests(TestCase):
+    def setUp(self):
+        response_cache.clear()
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.month = timezone.now().date().replace(day=1)
+        self.last_month = (self.month - timedelta(days=1)).replace(day=1)
+
+    def merchants(self):
+        return dict(MonthlyMerchantTotal.objects.filter(owner=self.user).values_list(
+            "merchant", "total"
+        ))
+
+    def test_merchant_totals_follow_every_write(self):
+        self.assertEqual(rollups.merchant_of("  Corner   SHOP\n"), "corner shop")
+        coffee = make_expense(self.user, "3.00", self.month, description="Coffee Bar")
+        make_expense(self.user, "4.00", self.month, description="coffee  bar")
+        self.assertEqual(self.merchants(), {"coffee bar": Decimal("7.00")})
+
+        self.client.patch(f"/api/expenses/{coffee.id}/", {"description": "Bakery"})
+        self.assertEqual(self.merchants(), {"coffee bar": Decimal("4.00"), "bakery": Decimal("3.00")})
+
+        self.client.delete(f"/api/expenses/{coffee.id}/")
+        self.assertEqual(self.merchants(), {"coffee bar": Decimal("4.00")})
+        self.assertEqual(rollups.verify(), [])
+
+        MonthlyMerchantTotal.objects.update(total=Decimal("1.00"))
+        with self.assertRaises(CommandError):
+            call_command("rebuild_rollups", "--verify", stdout=StringIO())
+        call_command("rebuild_rollups", stdout=StringIO())
+        self.assertEqual(self.merchants(), {"coffee bar": Decimal("4.00")})
+
+    def test_window(self):
+        make_expense(self.user, "60.00", self.month, Expense.Category.GROCERIES, description="Market")
+        make_expense(self.user, "20.00", self.month, Expense.Category.UTILITIES, description="Power Co")
+        make_expense(self.user, "20.00", self.last_month, Expense.Category.UTILITIES, description="power co")
+        make_expense(self.user, "5.00", self.last_month - timedelta(days=1), description="old")
+
+        with self.assertNumQueries(2):
+            window = get_distribution(self.user, self.last_month, self.month, limit=2)
+
+        self.assertEqual(window["total"], 100.0)
+        self.assertEqual(window["count"], 3)
+        self.assertEqual(window["active_categories_count"], 2)
+        self.assertEqual(window["top_category"], "GROCERIES")
+        self.assertEqual(window["categories"], [
+            {"category": "GROCERIES", "total": 60.0, "count": 1, "percentage": 60.0},
+            {"category": "UTILITIES", "total": 40.0, "count": 2, "percentage": 40.0},
+        ])
+        self.assertEqual([row["merchant"] for row in window["merchants"]], ["market", "power co"])
+
+        response = self.client.get(
+            f"/api/expenses/distribution/?from={self.last_month:%Y-%m}&to={self.last_month:%Y-%m}"
+        )
+        self.assertEqual(response.json()["total"], 20.0)
+        self.assertEqual(self.client.get("/api/expenses/distribution/").json()["total"], 80.0)
+
+    def test_bad_windows(self):
+        for query in (
+            f"from={self.month:%Y-%m}&to={self.last_month:%Y-%m}",
+            "from=2001-01",
+            "to=2026-13",
+            "limit=0",
+        ):
+            response = self.client.get(f"/api/expenses/distribution/?{query}")
+            self.assertEqual(response.status_code, 400, query)
+
+
+# ─────────────────────────────────────────
+# Recurring expenses
+# ─────────────────────────────────────────
+class RecurringExpenseTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.today = timezone.now().date()
+
+    def rule(self, start, frequency="MONTHLY", interval=1, owner=None, **fields):
+        return create_recurring_expense(owner or self.user, {
+            "amount": Decimal("100.00"), "category": Expense.Category.HOUSING,
+            "description": "rent", "frequency": frequency, "interval": interval,
+            "start_date": start, **fields,
+        })
+
+    def test_schedule(self):
+        def dates(start, frequency, interval=1, count=5):
+            rule = RecurringExpense(start_date=start, frequency=frequency, interval=interval)
+            days = [start]
+            for _ in range(count - 1):
+                days.append(recurring.following(rule, days[-1]))
+            return days
+
+        self.assertEqual(dates(date(2024, 1, 31), "MONTHLY"), [
+            date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31),
+            date(2024, 4, 30), date(2024, 5, 31),
+        ])
+        self.assertEqual(dates(date(2024, 11, 15), "MONTHLY", interval=2, count=3), [
+            date(2024, 11, 15), date(2025, 1, 15), date(2025, 3, 15),
+        ])
+        self.assertEqual(dates(date(2024, 2, 29), "YEARLY", count=3), [
+            date(2024, 2, 29), date(2025, 2, 28), date(2026, 2, 28),
+        ])
+        self.assertEqual(dates(date(2024, 1, 1), "WEEKLY", interval=2, count=3), [
+            date(2024, 1, 1), date(2024, 1, 15), date(2024, 1, 29),
+        ])
+
+    def test_materialise_is_idempotent(self):
+        weekly = self.rule(self.today - timedelta(weeks=3), "WEEKLY")
+        ended = self.rule(self.today - timedelta(days=10), "DAILY", end_date=self.today - timedelta(days=8))
+        upcoming = self.rule(self.today + timedelta(days=1), "DAILY")
+
+        self.assertEqual(recurring.materialise(batch_size=2), (2, 7))
+        self.assertEqual(recurring.materialise(), (0, 0))
+
+        self.assertEqual(weekly.occurrences.count(), 4)
+        self.assertEqual(ended.occurrences.count(), 3)
+        self.assertFalse(upcoming.occurrences.exists())
+        weekly.refresh_from_db()
+        ended.refresh_from_db()
+        self.assertEqual(weekly.next_date, self.today + timedelta(weeks=1))
+        self.assertIsNone(ended.next_date)
+        self.assertTrue(all(
+            day <= self.today for day in Expense.objects.values_list("date", flat=True)
+        ))
+        self.assertEqual(rollups.verify(), [])
+
+    def test_queries_do_not_grow_with_rules(self):
+        def run(rules):
+            owners = User.objects.bulk_create(
+                User(username=f"user{rules}-{i}", email=f"user{rules}-{i}@example.com")
+                for i in range(rules)
+            )
+            for i, owner in enumerate(owners):
+                self.rule(self.today - timedelta(days=i % 10), "MONTHLY", owner=owner)
+            with CaptureQueriesContext(connection) as queries:
+                recurring.materialise()
+            return len(queries)
+
+        self.assertEqual(run(20), run(60))
+
+    def test_endpoints(self):
+        start = self.today - timedelta(days=14)
+        response = self.client.post("/api/expenses/recurring/", {
+            "amount": "9.99", "category": "ENTERTAINMENT", "description": "streaming",
+            "frequency": "WEEKLY", "start_date": start.isoformat(),
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["next_date"], start.isoformat())
+        rule_id = response.json()["id"]
+
+        out = StringIO()
+        call_command("materialise_recurring", stdout=out)
+        self.assertIn("created 3 expenses", out.getvalue())
+
+        # A new cadence resumes after the occurrences already written.
+        response = self.client.patch(f"/api/expenses/recurring/{rule_id}/", {"frequency": "DAILY"})
+        self.assertEqual(response.json()["next_date"], (self.today + timedelta(days=1)).isoformat())
+
+        response = self.client.patch(f"/api/expenses/recurring/{rule_id}/", {
+            "end_date": (start - timedelta(days=1)).isoformat(),
+        })
+        self.assertEqual(response.status_code, 400)
+
+        self.client.delete(f"/api/expenses/recurring/{rule_id}/")
+        self.assertEqual(Expense.objects.filter(owner=self.user, recurring=None).count(), 3)
+
+
+# ─────────────────────────────────────────
+# Daily rollups
+# ─────────────────────────────────────────
+class DailyRollupTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.today = timezone.now().date()
+        self.yesterday = self.today - timedelta(days=1)
+
+    def buckets(self):
+        return set(DailyRollup.objects.filter(owner=self.user).values_list(
+            "date", "category", "payment_method", "total", "count"
+        ))
+
+    def test_create_update_delete_maintain_buckets(self):
+        payload = {
+            "amount": "10.00", "category": "GROCERIES",
+            "payment_method": "CASH", "description": "milk",
+            "date": self.today.isoformat(),
+        }
+        first = self.client.post("/api/expenses/", payload).json()
+        self.client.post("/api/expenses/", {**payload, "amount": "5.50"})
+        self.assertEqual(self.buckets(), {
+            (self.today, "GROCERIES", "CASH", Decimal("15.50"), 2),
+        })
+
+        self.client.patch(f"/api/expenses/{first['id']}/", {
+            "date": self.yesterday.isoformat(), "category": "DINING_OUT",
+        })
+        self.assertEqual(self.buckets(), {
+            (self.today, "GROCERIES", "CASH", Decimal("5.50"), 1),
+            (self.yesterday, "DINING_OUT", "CASH", Decimal("10.00"), 1),
+        })
+
+        self.client.delete(f"/api/expenses/{first['id']}/")
+        self.assertEqual(self.buckets(), {
+            (self.today, "GROCERIES", "CASH", Decimal("5.50"), 1),
+        })
+        self.assertEqual(rollups.verify(), [])
+
+    def test_writes_from_a_stale_read_take_the_stored_row_off(self):
+        expense = make_expense(self.user, "4.00", self.today)
+        stale = Expense.objects.get(pk=expense.pk)
+        update_expense(expense, {"amount": Decimal("9.00"), "date": self.yesterday})
+
+        update_expense(stale, {"category": Expense.Category.UTILITIES})
+        bulk_update_expenses(self.user, [(expense, {"amount": Decimal("2.00")})])
+
+        self.assertEqual(self.buckets(), {
+            (self.yesterday, "UTILITIES", "OTHER", Decimal("2.00"), 1),
+        })
+        self.assertEqual(rollups.verify(), [])
+
+    def test_series_reads_rollups(self):
+        make_expense(self.user, "4.00", self.yesterday)
+        make_expense(self.user, "6.00", self.yesterday, Expense.Category.UTILITIES)
+
+        with self.assertNumQueries(1):
+            series = get_daily_series(self.user, 3)
+
+        self.assertEqual([point["total"] for point in series], [0.0, 10.0, 0.0])
+
+    def test_bulk_deltas_merge_with_existing_buckets(self):
+        make_expense(self.user, "1.00", self.today)
+        entries = [
+            (self.user.id, self.today - timedelta(days=i), "OTHER", "OTHER", "bulk", Decimal("2.00"))
+            for i in range(rollups.INCREMENTAL_LIMIT + 2)
+        ]
+        Expense.objects.bulk_create(
+            Expense(owner=self.user, date=day, category=category,
+                    payment_method=method, amount=amount, description=description)
+            for _, day, category, method, description, amount in entries
+        )
+        rollups.apply_changes(added=entries)
+
+        self.assertEqual(rollups.verify([self.user.id]), [])
+
+    def test_command_verifies_and_rebuilds(self):
+        make_expense(self.user, "3.00", self.today)
+        DailyRollup.objects.update(total=Decimal("1.00"))
+
+        with self.assertRaises(CommandError):
+            call_command("rebuild_rollups", "--verify", stdout=StringIO())
+
+        call_command("rebuild_rollups", stdout=StringIO())
+        call_command("rebuild_rollups", "--verify", stdout=StringIO())
+
+
+# ─────────────────────────────────────────
+# Series
+# ─────────────────────────────────────────
+class SeriesTests(TestCase):
+    def setUp(self):
+        response_cache.clear()
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.today = timezone.now().date()
+
+    def test_buckets_step_across_year_boundaries(self):
+        wednesday = date(2026, 1, 14)
+        self.assertEqual(
+            series.buckets(series.make_spec("month", 3), wednesday),
+            [date(2025, 11, 1), date(2025, 12, 1), date(2026, 1, 1)],
+        )
+        self.assertEqual(
+            series.buckets(series.make_spec("week", 2), wednesday),
+            [date(2026, 1, 5), date(2026, 1, 12)],
+        )
+        self.assertEqual(
+            series.buckets(series.make_spec("year", 2), wednesday),
+            [date(2025, 1, 1), date(2026, 1, 1)],
+        )
+
+    def test_grouped_series_are_zero_filled(self):
+        month_start = self.today.replace(day=1)
+        last_month = month_start - timedelta(days=1)
+        make_expense(self.user, "4.00", self.today, Expense.Category.GROCERIES)
+        make_expense(self.user, "6.00", month_start, Expense.Category.GROCERIES)
+        make_expense(self.user, "2.50", last_month, Expense.Category.UTILITIES)
+
+        with self.assertNumQueries(2):
+            monthly, by_category = get_series(self.user, [
+                series.make_spec("month", 3),
+                series.make_spec("month", 3, "category"),
+            ])
+
+        self.assertEqual(monthly["buckets"][-2:], [
+            last_month.replace(day=1).isoformat(), month_start.isoformat(),
+        ])
+        self.assertEqual(monthly["series"], [{"key": None, "totals": [0.0, 2.5, 10.0]}])
+        self.assertEqual(by_category["series"], [
+            {"key": "GROCERIES", "totals": [0.0, 0.0, 10.0]},
+            {"key": "UTILITIES", "totals": [0.0, 2.5, 0.0]},
+        ])
+
+    def test_endpoint_returns_several_series(self):
+        make_expense(self.user, "3.00", self.today, payment_method=Expense.PaymentMethod.CASH)
+
+        response = self.client.get(
+            "/api/expenses/series/?series=day:7&series=year:2:payment_method"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        daily, yearly = response.json()
+        self.assertEqual(len(daily["buckets"]), 7)
+        self.assertEqual(daily["series"][0]["totals"][-1], 3.0)
+        self.assertEqual(yearly["series"], [{"key": "CASH", "totals": [0.0, 3.0]}])
+
+    def test_ranges_are_bounded_and_validated(self):
+        for url in (
+            "/api/expenses/series/daily/?days=100000",
+            "/api/expenses/series/daily/?days=abc",
+            "/api/expenses/series/?series=day:0",
+            "/api/expenses/series/?series=week:12:owner",
+            "/api/expenses/series/?series=hour:5",
+            "/api/expenses/series/?" + "&".join(["series=day:7"] * (series.MAX_SERIES + 1)),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 400)
+
+
+# ─────────────────────────────────────────
+# Columnar analytics
+# ─────────────────────────────────────────
+class AnalyticsTests(TestCase):
+    def setUp(self):
+        response_cache.clear()
+        self.user = make_user()
+        make_expense(self.user, "10.00", date(2024, 1, 15), Expense.Category.GROCERIES)
+        make_expense(self.user, "20.00", date(2024, 12, 3), Expense.Category.GROCERIES)
+        make_expense(self.user, "0.10", date(2025, 1, 20), Expense.Category.UTILITIES,
+                     Expense.PaymentMethod.CASH)
+        make_expense(self.user, "29.90", date(2025, 1, 21), Expense.Category.GROCERIES)
+
+    def test_load_builds_compact_columns(self):
+        columns = analytics.load(self.user)
+
+        self.assertEqual(columns.cents.dtype, "int64")
+        self.assertEqual(columns.category.dtype, "int8")
+        self.assertEqual(sorted(columns.cents.tolist()), [10, 1000, 2000, 2990])
+        cash = analytics.PAYMENT_METHODS.index(Expense.PaymentMethod.CASH)
+        self.assertEqual(
+            analytics.CATEGORIES[columns.category[columns.payment_method == cash][0]],
+            Expense.Category.UTILITIES,
+        )
+
+    def test_reports(self):
+        columns = analytics.load(self.user)
+
+        self.assertEqual(
+            analytics.rolling_average(columns, date(2025, 1, 21), days=2, window=2),
+            [{"day": "2025-01-20", "average": 0.05}, {"day": "2025-01-21", "average": 15.0}],
+        )
+        groceries = analytics.category_percentiles(columns, (0, 50, 100))["GROCERIES"]
+        self.assertEqual(groceries, {"count": 3, "p0": 10.0, "p50": 20.0, "p100": 29.9})
+
+        monthly = analytics.monthly_changes(columns)
+        self.assertEqual(len(monthly), 13)
+        self.assertEqual(monthly[-1], {
+            "month": "2025-01", "total": 30.0, "change_pct": 50.0, "yoy_change_pct": 200.0,
+        })
+        self.assertEqual(monthly[1]["total"], 0.0)
+        self.assertIsNone(monthly[2]["change_pct"])
+
+    def test_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        response = client.get("/api/expenses/reports/?days=30&window=7")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["rolling_average"]), 30)
+        self.assertEqual(client.get("/api/expenses/reports/?window=0").status_code, 400)
+
+
+# ─────────────────────────────────────────
+# Response cache
+# ─────────────────────────────────────────
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        response_cache.clear()
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.today = timezone.now().date()
+
+    def test_repeat_requests_are_served_from_cache(self):
+        make_expense(self.user, "8.00", self.today)
+        for url in ("/api/expenses/dashboard/", "/api/expenses/series/daily/?days=7",
+                    "/api/expenses/recent/"):
+            first = self.client.get(url)
+            with self.assertNumQueries(0):
+                second = self.client.get(url)
+            self.assertEqual(first.json(), second.json())
+        self.assertEqual(response_cache.stats()["hits"], 3)
+
+    def test_write_bumps_version(self):
+        self.assertEqual(
+            self.client.get("/api/expenses/dashboard/").json()["current_month_total"], 0.0
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/expenses/", {
+                "amount": "4.25", "category": "OTHER", "payment_method": "CASH",
+                "description": "coffee", "date": self.today.isoformat(),
+            })
+        self.assertEqual(
+            self.client.get("/api/expenses/dashboard/").json()["current_month_total"], 4.25
+        )
+
+    def test_if_none_match_returns_304(self):
+        etag = self.client.get("/api/expenses/dashboard/")["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/expenses/dashboard/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        make_expense(self.user, "1.00", self.today)
+        response = self.client.get("/api/expenses/dashboard/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_lru_backend_is_bounded(self):
+        backend = LocMemLRUBackend(max_entries=2)
+        backend.set("a", 1)
+        backend.set("b", 2)
+        backend.get("a")
+        backend.set("c", 3)
+
+        self.assertEqual(backend.get("a"), 1)
+        self.assertIs(backend.get("b"), MISSING)
+        self.assertEqual(backend.get("c"), 3)
+
+
+class AsyncAnalyticsViewTests(TestCase):
+    def setUp(self):
+        response_cache.clear()
+        self.user = make_user()
+        self.factory = AsyncRequestFactory()
+        today = timezone.now().date()
+        make_expense(self.user, "12.50", today, Expense.Category.GROCERIES)
+        make_expense(self.user, "7.50", today - timedelta(days=1))
+        # The sync ORM is off limits inside the async tests themselves.
+        self.expected = {
+            AsyncDashboardSummaryView: get_dashboard_summary(self.user),
+            AsyncDailySeriesView: get_daily_series(self.user, 7),
+            AsyncSeriesView: get_series(self.user, [series.make_spec("day", 30)]),
+            AsyncExpenseRecentView: ExpenseSerializer(
+                Expense.objects.filter(owner=self.user), many=True
+            ).data,
+        }
+
+    async def call(self, view, authenticate=True, headers=None):
+        request = self.factory.get("/?days=7", headers=headers)
+        if authenticate:
+            force_authenticate(request, user=self.user)
+        response = await view.as_view()(request)
+        response.render()
+        return response
+
+    async def test_payloads_match_sync_views(self):
+        for view, expected in self.expected.items():
+            response = await self.call(view)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data, expected)
+
+    def test_dashboard_query_count_then_cache(self):
+        call = async_to_sync(self.call)   # assertNumQueries needs a sync context
+        with self.assertNumQueries(3):
+            first = call(AsyncDashboardSummaryView)
+        with self.assertNumQueries(0):
+            cached = call(AsyncDashboardSummaryView)
+            not_modified = call(AsyncDashboardSummaryView, headers={"If-None-Match": first["ETag"]})
+        self.assertEqual(cached.data, first.data)
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_dashboard_skips_categories_without_spending_this_month(self):
+        self.user = make_user("idle@example.com")
+        with self.assertNumQueries(2):
+            response = async_to_sync(self.call)(AsyncDashboardSummaryView)
+        self.assertEqual(response.data, get_dashboard_summary(self.user))
+
+    async def test_requires_authentication(self):
+        response = await self.call(AsyncDashboardSummaryView, authenticate=False)
+        self.assertEqual(response.status_code, 401)
+
+
+# ─────────────────────────────────────────
+# Request instrumentation
+# ─────────────────────────────────────────
+class PerformanceMiddlewareTests(TestCase):
+    def setUp(self):
+        # On by default only under DEBUG.
+        self.enterContext(self.settings(PERF_METRICS={**settings.PERF_METRICS, "SERVER_TIMING": True}))
+        metrics.clear_metrics()
+        response_cache.clear()
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        for i in range(3):
+            make_expense(self.user, "5.00", timezone.now().date(), description=f"item {i}")
+
+    def timings(self, response):
+        return {
+            part.split(";")[0]: part for part in response["Server-Timing"].split(", ")
+        }
+
+    def test_server_timing(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/expenses/")
+        timings = self.timings(response)
+
+        self.assertEqual(set(timings), {"db", "serialize", "app", "total"})
+        self.assertIn(f'desc="{len(queries)} queries"', timings["db"])
+        self.assertGreater(float(timings["serialize"].split("dur=")[1]), 0)
+
+    def test_route_histograms_and_endpoint(self):
+        self.client.get("/api/expenses/")
+        self.client.get("/api/expenses/")
+        self.client.get(f"/api/expenses/{Expense.objects.first().id}/")
+
+        self.assertEqual(self.client.get("/metrics/").status_code, 404)
+        with self.settings(PERF_METRICS={**settings.PERF_METRICS, "TOKEN": "scrape-me"}):
+            self.assertEqual(self.client.get("/metrics/").status_code, 401)
+            response = self.client.get("/metrics/", headers={"Authorization": "Bearer scrape-me"})
+
+        text = response.content.decode()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'http_request_duration_seconds_count{method="GET",route="api/expenses/"} 2', text
+        )
+        self.assertIn(
+            'http_request_duration_seconds_bucket{method="GET",route="api/expenses/<int:pk>/",le="+Inf"} 1',
+            text,
+        )
+        self.assertIn('http_requests_total{method="GET",route="api/expenses/",status="200"} 2', text)
+        self.assertIn('http_response_size_bytes_count{method="GET",route="api/expenses/"} 2', text)
+
+    def test_histogram_counts_values_above_the_largest_bucket(self):
+        histogram = metrics.Histogram("h", "help", ("route",), (0.1, 1))
+        histogram.observe(("x",), 0.05)
+        histogram.observe(("x",), 50)
+
+        lines = histogram.collect()
+        self.assertIn('h_bucket{route="x",le="0.1"} 1', lines)
+        self.assertIn('h_bucket{route="x",le="1"} 1', lines)
+        self.assertIn('h_bucket{route="x",le="+Inf"} 2', lines)
+        self.assertIn('h_count{route="x"} 2', lines)
+
+    async def test_async_requests_are_measured(self):
+        token = await sync_to_async(lambda: str(AccessToken.for_user(self.user)))()
+        response = await AsyncClient().get(
+            "/api/expenses/dashboard/", headers={"Authorization": f"Bearer {token}"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('desc="0 queries"', self.timings(response)["db"])
+
+    def test_slow_requests_log_their_queries(self):
+        with self.settings(PERF_METRICS={**settings.PERF_METRICS, "SLOW_REQUEST_MS": 0}):
+            with self.assertLogs("backend.metrics", "WARNING") as logs:
+                self.client.get("/api/expenses/")
+        self.assertIn("GET /api/expenses/", logs.output[0])
+        self.assertIn('FROM "expenses_expense"', logs.output[0])
+
+
+# ─────────────────────────────────────────
+# Query budgets
+# ─────────────────────────────────────────
+class QueryBudgetTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_block_over_budget_raises_under_tests(self):
+        with self.assertRaisesMessage(metrics.QueryBudgetExceeded, "ran 2 queries, over its budget of 1"):
+            with metrics.query_budget(1):
+                list(Expense.objects.all())
+                list(Budget.objects.all())
+        with metrics.query_budget(2):
+            list(Expense.objects.all())
+            list(Budget.objects.all())
+
+    def test_decorated_function(self):
+        @metrics.query_budget(0, label="count")
+        def count():
+            return Expense.objects.count()
+
+        with self.assertRaisesMessage(metrics.QueryBudgetExceeded, "count ran 1 queries"):
+            count()
+
+    def test_log_and_off_modes(self):
+        with self.settings(PERF_METRICS={**settings.PERF_METRICS, "QUERY_BUDGETS": "log"}):
+            with self.assertLogs("backend.metrics", "WARNING") as logs:
+                with metrics.query_budget(0):
+                    Expense.objects.count()
+        self.assertIn('FROM "expenses_expense"', logs.output[0])
+
+        with self.settings(PERF_METRICS={**settings.PERF_METRICS, "QUERY_BUDGETS": "off"}):
+            with self.assertNoLogs("backend.metrics", "WARNING"):
+                with metrics.query_budget(0):
+                    Expense.objects.count()
+
+    def test_view_over_budget(self):
+        with mock.patch.object(ExpenseListCreateView, "query_budget", {"GET": 0}):
+            with self.assertRaisesMessage(metrics.QueryBudgetExceeded, "GET api/expenses/ ran 1 queries"):
+                self.client.get("/api/expenses/")
+            # Only the declared methods are checked.
+            self.assertEqual(self.client.post("/api/expenses/", {}).status_code, 400)
+
+
+class EndpointQueryCountTests(TestCase):
+    """
+    Pins the queries behind every endpoint, against a seeded account of a
+    few thousand expenses and with real JWT authentication. A change here
+    is a change in cost: update the number deliberately, never to make the
+    test pass.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+        seed_user(cls.user, expenses=3000, seed=1)
+        seed_user(make_user("other@example.com"), expenses=300, seed=2)
+        cls.expense = Expense.objects.filter(owner=cls.user).earliest("date")
+        cls.budget = Budget.objects.filter(owner=cls.user).first()
+        cls.rule = RecurringExpense.objects.filter(owner=cls.user).first()
+
+    def setUp(self):
+        response_cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+        self.today = timezone.now().date().isoformat()
+        # Before anything seeded, so every rollup bucket a write touches is
+        # new, whatever today's date.
+        self.unseeded_day = (timezone.now().date() - timedelta(days=1000)).isoformat()
+        # Counted with the user's row cached, as between its expiries.
+        patcher = mock.patch.object(user_cache, "row_ttl", 3600)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        cached_row(self.user.pk)
+
+    def assertQueries(self, count, method, url, data=None, status=200):
+        with self.assertNumQueries(count):
+            response = getattr(self.client, method)(url, data, format="json")
+            if response.streaming:
+                b"".join(response.streaming_content)
+        self.assertEqual(response.status_code, status)
+        return response
+
+    def new_expense(self, **fields):
+        return {
+            "amount": "12.50", "category": "OTHER", "payment_method": "CASH",
+            "description": "Corner shop", "date": self.unseeded_day, **fields,
+        }
+
+    def test_list_and_detail(self):
+        self.assertQueries(1, "get", "/api/expenses/")
+        self.assertQueries(1, "get", "/api/expenses/?category=GROCERIES&min_date=2020-01-01")
+        self.assertQueries(1, "get", f"/api/expenses/{self.expense.id}/")
+
+    def test_writes(self):
+        created = self.assertQueries(7, "post", "/api/expenses/", self.new_expense(), status=201)
+        url = f"/api/expenses/{created.data['id']}/"
+        self.assertQueries(9, "patch", url, {"amount": "13.00"})
+        # Leaves three buckets empty and starts three new ones: the worst case.
+        self.assertQueries(15, "patch", url, {"category": "HEALTHCARE", "date": "2020-01-02"})
+        self.assertQueries(13, "delete", url, status=204)
+
+    def test_bulk(self):
+        response = self.assertQueries(
+            7, "post", "/api/expenses/bulk/", [self.new_expense()] * 50, status=201
+        )
+        ids = [row["id"] for row in response.data["results"]]
+        self.assertQueries(
+            9, "patch", "/api/expenses/bulk/", [{"id": i, "amount": "1.00"} for i in ids]
+        )
+        self.assertQueries(12, "delete", "/api/expenses/bulk/", {"ids": ids})
+
+    def test_analytics(self):
+        self.assertQueries(1, "get", "/api/expenses/recent/")
+        self.assertQueries(0, "get", "/api/expenses/recent/")
+        self.assertQueries(3, "get", "/api/expenses/dashboard/")
+        self.assertQueries(0, "get", "/api/expenses/dashboard/")
+        self.assertQueries(1, "get", "/api/expenses/series/daily/?days=366")
+        self.assertQueries(
+            3, "get", "/api/expenses/series/?series=day:30&series=week:12:category&series=year:3"
+        )
+        self.assertQueries(1, "get", "/api/expenses/reports/?days=366")
+        self.assertQueries(2, "get", "/api/expenses/distribution/?from=2020-01&limit=50")
+
+    def test_search_and_export(self):
+        self.assertQueries(1, "get", "/api/expenses/search/?q=whole")
+        self.assertQueries(3, "get", "/api/expenses/sync/?since=2990&limit=100")
+        self.assertQueries(1, "get", "/api/expenses/export/csv/")
+        self.assertQueries(1, "get", "/api/expenses/export/ndjson/?category=GROCERIES")
+
+    def test_imports(self):
+        upload = SimpleUploadedFile("expenses.csv", b"date,amount,category,payment_method,description\n")
+        with self.assertNumQueries(1):
+            response = self.client.post("/api/expenses/imports/", {"file": upload}, format="multipart")
+        self.assertEqual(response.status_code, 202)
+        self.assertQueries(1, "get", f"/api/expenses/imports/{response.data['id']}/")
+
+    def test_budgets(self):
+        url = f"/api/expenses/budgets/{self.budget.id}/"
+        self.assertQueries(1, "get", "/api/expenses/budgets/")
+        self.assertQueries(4, "post", "/api/expenses/budgets/", {"category": "OTHER", "amount": "80.00"}, status=201)
+        self.assertQueries(1, "get", url)
+        self.assertQueries(4, "patch", url, {"amount": "650.00"})
+        self.assertQueries(1, "get", "/api/expenses/budgets/status/?month=2025-01")
+        self.assertQueries(4, "delete", url, status=204)
+
+    def test_recurring(self):
+        url = f"/api/expenses/recurring/{self.rule.id}/"
+        self.assertQueries(1, "get", "/api/expenses/recurring/")
+        self.assertQueries(3, "post", "/api/expenses/recurring/", {
+            **self.new_expense(), "frequency": "WEEKLY", "start_date": self.today,
+        }, status=201)
+        self.assertQueries(1, "get", url)
+        self.assertQueries(5, "patch", url, {"interval": 2})
+        self.assertQueries(3, "delete", url, status=204)
+
+
+# ─────────────────────────────────────────
+# Sample data
+# ─────────────────────────────────────────
+class GenerateSampleDataTests(TestCase):
+    def test_generates_skewed_data_with_matching_rollups(self):
+        call_command(
+            "generate_sample_data", users=20, expenses=50, seed=3, batch_size=300,
+            stdout=StringIO(),
+        )
+        users = User.objects.filter(username__startswith="sample")
+        counts = sorted(users.annotate(n=Count("expenses")).values_list("n", flat=True))
+        by_category = dict(
+            Expense.objects.values_list("category").annotate(n=Count("id")).values_list("category", "n")
+        )
+
+        self.assertEqual(len(counts), 20)
+        self.assertGreater(counts[-1], 2 * counts[0])
+        self.assertGreater(by_category["GROCERIES"], by_category["EDUCATION"])
+        self.assertTrue(users.first().check_password("sample-password"))
+        self.assertEqual(rollups.verify(), [])
+
+        with self.assertRaisesMessage(CommandError, "already exist"):
+            call_command("generate_sample_data", users=1, stdout=StringIO())
+
+    def test_batches_are_bounded_by_owners_too(self):
+        rebuild, batches = rollups.rebuild, []
+
+        def counting(owner_ids):
+            batches.append(len(owner_ids))
+            return rebuild(owner_ids)
+
+        with mock.patch.object(generate_sample_data, "OWNER_BATCH_SIZE", 8), \
+                mock.patch.object(rollups, "rebuild", counting):
+            call_command("generate_sample_data", users=20, expenses=2, stdout=StringIO())
+
+        self.assertEqual(batches, [8, 8, 4])
+        self.assertEqual(rollups.verify(), [])
+
+
+# ─────────────────────────────────────────
+# Database configuration
+# ─────────────────────────────────────────
+class SQLiteTuningTests(TestCase):
+    def test_connections_apply_pragmas_and_immediate_writes(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("SQLite only")
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)   # NORMAL
+            cursor.execute("PRAGMA cache_size")
+            self.assertLess(cursor.fetchone()[0], 0)    # sized in KiB
+        self.assertEqual(connection.transaction_mode, "IMMEDIATE")
+
+
+class ReplicaRouterTests(TestCase):
+    def test_reads_follow_context_and_writes_stay_on_default(self):
+        router = ReplicaRouter()
+        self.assertIsNone(router.db_for_read(Expense))
+        with use_replica():
+            # No replica configured in this settings module.
+            self.assertIsNone(router.db_for_read(Expense))
+        self.assertEqual(router.db_for_write(Expense), "default")
+        self.assertFalse(router.allow_migrate(REPLICA, "expenses"))
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    A second SQLite alias on the same test database stands in for the
+    replica; it is added after the runner set up its databases, so it
+    needs no test database of its own.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        connections.settings[REPLICA] = dict(connections["default"].settings_dict)
+        cls.databases = cls.databases | {REPLICA}
+
+    @classmethod
+    def tearDownClass(cls):
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.settings[REPLICA]
+        cls.databases = cls.databases - {REPLICA}
+        super().tearDownClass()
+
+    def setUp(self):
+        response_cache.clear()
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_analytics_read_from_replica_unless_recently_written(self):
+        make_expense(self.user, "3.00", timezone.now().date())
+
+        with CaptureQueriesContext(connections[REPLICA]) as replica:
+            self.client.get("/api/expenses/dashboard/")
+        self.assertEqual(len(replica), 0)   # the write above is too recent
+
+        with override_settings(DATABASE_REPLICA_STICKY_SECONDS=0):
+            with CaptureQueriesContext(connections[REPLICA]) as replica:
+                response = self.client.get("/api/expenses/series/daily/?days=7")
+                self.client.get("/api/expenses/recent/")
+        self.assertEqual(len(replica), 1)   # the series, not the recent list
+        self.assertEqual(response.json()[-1]["total"], 3.0)
+
+
+# ─────────────────────────────────────────
+# Bulk endpoint
+# ─────────────────────────────────────────
+class ExpenseBulkTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.today = timezone.now().date().isoformat()
+
+    def item(self, amount="1.00", **overrides):
+        return {
+            "amount": amount, "category": "GROCERIES", "payment_method": "CASH",
+            "description": "bulk", "date": self.today, **overrides,
+        }
+
+    def test_create_reports_per_item_errors(self):
+        items = [self.item(str(i + 1)) for i in range(600)]
+        items[3] = self.item("-1.00")
+
+        response = self.client.post("/api/expenses/bulk/", items, format="json")
+
+        self.assertEqual(response.status_code, 207)
+        body = response.json()
+        self.assertEqual(len(body["results"]), 599)
+        self.assertEqual([error["index"] for error in body["errors"]], [3])
+        self.assertEqual(Expense.objects.filter(owner=self.user).count(), 599)
+        self.assertEqual(rollups.verify([self.user.id]), [])
+
+    def test_atomic_create_rejects_whole_batch(self):
+        items = [self.item(), self.item(category="NOPE")]
+
+        response = self.client.post("/api/expenses/bulk/?atomic=true", items, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Expense.objects.exists())
+
+    def test_update_and_delete(self):
+        created = self.client.post(
+            "/api/expenses/bulk/", [self.item(), self.item()], format="json"
+        ).json()["results"]
+        ids = [row["id"] for row in created]
+        other = make_expense(make_user("other@example.com"), "9.00", timezone.now().date())
+
+        response = self.client.patch("/api/expenses/bulk/", [
+            {"id": ids[0], "amount": "7.00", "category": "UTILITIES"},
+            {"id": other.id, "amount": "1.00"},
+        ], format="json")
+
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(response.json()["errors"][0]["index"], 1)
+        self.assertEqual(Expense.objects.get(id=ids[0]).amount, Decimal("7.00"))
+        self.assertEqual(Expense.objects.get(id=other.id).amount, Decimal("9.00"))
+
+        response = self.client.delete(
+            "/api/expenses/bulk/", {"ids": ids + [other.id]}, format="json"
+        )
+
+        self.assertEqual(response.json(), {"deleted": ids, "not_found": [other.id]})
+        self.assertTrue(Expense.objects.filter(id=other.id).exists())
+        self.assertEqual(rollups.verify(), [])
+
+
+# ─────────────────────────────────────────
+# Export
+# ─────────────────────────────────────────
+class ExpenseExportTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.today = timezone.now().date()
+
+    def export(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content)
+
+    def test_ndjson_matches_serializer_bytes(self):
+        expenses = [
+            make_expense(self.user, "1234.50", self.today, description='Café "latte"\u2028'),
+            make_expense(self.user, "0.05", self.today - timedelta(days=3)),
+        ]
+
+        body = self.export("/api/expenses/export/ndjson/")
+
+        expected = b"".join(
+            JSONRenderer().render(ExpenseSerializer(expense).data) + b"\n"
+            for expense in expenses
+        )
+        self.assertEqual(body, expected)
+
+    def test_csv_honours_filters(self):
+        make_expense(self.user, "3.00", self.today, Expense.Category.GROCERIES, description="apples")
+        make_expense(self.user, "4.00", self.today, Expense.Category.HOUSING, description="rent")
+
+        lines = self.export("/api/expenses/export/csv/?category=housing").decode().splitlines()
+
+        self.assertEqual(lines[0], ",".join(ExpenseSerializer.Meta.fields))
+        self.assertEqual(len(lines), 2)
+        self.assertIn(",4.00,HOUSING,OTHER,rent,", lines[1])
+
+    def test_unknown_format(self):
+        self.assertEqual(self.client.get("/api/expenses/export/xml/").status_code, 404)
+
+
+# ─────────────────────────────────────────
+# Fast serialization path
+# ─────────────────────────────────────────
+class FastSerializationTests(TestCase):
+    def setUp(self):
+        response_cache.clear()
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        today = timezone.now().date()
+        self.expenses = [
+            make_expense(self.user, "1234.50", today, description='Café "latte"\u2028\u2029'),
+            make_expense(self.user, "0.05", today - timedelta(days=3), Expense.Category.HOUSING),
+            make_expense(self.user, "99999999.99", today - timedelta(days=400)),
+        ]
+
+    def test_list_and_recent_match_serializer_bytes(self):
+        # A non-UTC zone, so datetimes are converted exactly as DRF would.
+        with timezone.override("Asia/Kolkata"):
+            expected = ExpenseSerializer(self.expenses, many=True).data
+            listed = self.client.get("/api/expenses/")
+            recent = self.client.get("/api/expenses/recent/")
+
+        self.assertIn("+05:30", expected[0]["created_at"])
+        self.assertEqual(
+            listed.content,
+            JSONRenderer().render({"next": None, "previous": None, "results": expected}),
+        )
+        self.assertEqual(recent.content, JSONRenderer().render(expected))
+
+    def test_plan_only_shortcuts_default_fields(self):
+        plan = dict(ExpenseRowSerializer.plan())
+        self.assertEqual(sorted(plan), ["amount", "created_at", "date", "updated_at"])
+
+        field = ExpenseSerializer().fields["amount"]
+        field.coerce_to_string = False
+        fmt = formatter(field, timezone.get_current_timezone())
+        self.assertEqual(fmt, field.to_representation)
+        self.assertEqual(fmt(Decimal("1.5")), Decimal("1.50"))
+
+    def test_renderer_matches_drf_byte_for_byte(self):
+        data = {
+            "text": "naïve \u2028 \"quoted\" 1e5",
+            "floats": [0.1, 2.5, 1e16, 1e-5, 1.00001, -0.0, 123456789.123],
+            "big": 2 ** 70,
+            "keys": {1: "int key", None: "none key"},
+            "decimal": Decimal("12.30"),
+            "when": timezone.now(),
+            "day": date(2026, 1, 31),
+            "lazy": ExpenseSerializer().fields["amount"].error_messages["invalid"],
+            "rows": ExpenseSerializer(self.expenses, many=True).data,
+            "tuple": (1, 2),
+        }
+        for value in [data, *data.values(), [], {}, "", None]:
+            with self.subTest(value=value):
+                self.assertEqual(FastJSONRenderer().render(value), JSONRenderer().render(value))
+        with mock.patch("backend.renderers.orjson", None):
+            self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_indented_responses_use_drf(self):
+        response = self.client.get("/api/expenses/recent/", HTTP_ACCEPT="application/json; indent=2")
+        self.assertTrue(response.content.startswith(b"[\n  {"))
+
+
+# ─────────────────────────────────────────
+# CSV import
+# ─────────────────────────────────────────
+class ImportJobTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        self.enterContext(override_settings(MEDIA_ROOT=media))
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.today = timezone.now().date()
+
+    def upload(self, text, **extra):
+        response = self.client.post("/api/expenses/imports/", {
+            "file": SimpleUploadedFile("statement.csv", text.encode()), **extra,
+        })
+        self.assertEqual(response.status_code, 202, response.content)
+        return response.json()["id"]
+
+    def test_import_validates_and_reports_progress(self):
+        tomorrow = self.today + timedelta(days=1)
+        job_id = self.upload(
+            "Posted,Amount,Memo,Category,Method\n"
+            f'{self.today},"$1,200.50",Rent,Housing,Bank Transfer\n'
+            f"{self.today},12.345,Lunch,dining out,\n"
+            f"{tomorrow},5.00,Later,,\n"
+            f"{self.today},7.25,Bus,TRANSPORTATION,cash\n"
+            "not-a-date,1.00,Broken,,\n"
+        )
+
+        imports.run_import(job_id, chunk_size=2)
+
+        status = self.client.get(f"/api/expenses/imports/{job_id}/").json()
+        self.assertEqual(status["status"], "COMPLETED")
+        self.assertEqual(
+            (status["rows_processed"], status["rows_imported"], status["rows_rejected"]),
+            (5, 2, 3),
+        )
+        self.assertEqual([e["row"] for e in status["errors"]], [2, 3, 5])
+        self.assertEqual(status["errors"][1]["errors"], {"date": ["Date cannot be in the future."]})
+        self.assertEqual(
+            sorted(Expense.objects.filter(owner=self.user).values_list(
+                "amount", "category", "payment_method"
+            )),
+            [(Decimal("7.25"), "TRANSPORTATION", "CASH"),
+             (Decimal("1200.50"), "HOUSING", "BANK_TRANSFER")],
+        )
+        self.assertEqual(rollups.verify([self.user.id]), [])
+
+    def test_interrupted_job_resumes_after_committed_rows(self):
+        job_id = self.upload(
+            "date,amount,description\n"
+            + "".join(f"{self.today},{i}.00,row {i}\n" for i in range(1, 5)),
+            column_map='{"description": "description"}',
+        )
+        # A worker that dies after committing the first two rows.
+        import_chunk = imports._import_chunk
+
+        def dies_after_first_chunk(job, chunk):
+            if job.rows_processed:
+                raise OperationalError("connection lost")
+            import_chunk(job, chunk)
+
+        with mock.patch.object(imports, "_import_chunk", dies_after_first_chunk), \
+                self.assertRaises(OperationalError):
+            imports.run_import(job_id, chunk_size=2)
+        ImportJob.objects.filter(pk=job_id).update(
+            updated_at=timezone.now() - imports.STALE_AFTER * 2,
+        )
+
+        self.assertEqual(list(imports.pending_jobs().values_list("id", flat=True)), [job_id])
+        imports.run_import(job_id)
+
+        self.assertEqual(
+            sorted(Expense.objects.values_list("description", flat=True)),
+            ["row 1", "row 2", "row 3", "row 4"],
+        )
+
+    def test_missing_columns_fail_the_job(self):
+        job_id = self.upload("when,how much\n2024-01-01,3\n")
+
+        job = imports.run_import(job_id)
+
+        self.assertEqual(job.status, ImportJob.Status.FAILED)
+        self.assertIn("description", job.message)
+
+    def test_finished_jobs_delete_their_upload(self):
+        completed = self.upload(f"date,amount,description\n{self.today},1.00,ok\n")
+        failed = self.upload("when,how much\n2024-01-01,3\n")
+        paths = {
+            job.pk: job.file.path for job in ImportJob.objects.filter(pk__in=[completed, failed])
+        }
+
+        for job_id in paths:
+            job = imports.run_import(job_id)
+            self.assertFalse(job.file)
+            self.assertFalse(os.path.exists(paths[job_id]))
+
+    def test_uploads_over_the_limit_are_refused(self):
+        with self.settings(EXPENSE_IMPORT_MAX_BYTES=64):
+            response = self.client.post("/api/expenses/imports/", {
+                "file": SimpleUploadedFile("statement.csv", b"date,amount,description\n" * 4),
+            })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("no more than 64 bytes", response.json()["file"][0])
+        self.assertFalse(ImportJob.objects.exists())
+
+    def test_amount_separators_must_be_unambiguous(self):
+        parsed = {raw: imports._parse_amount(raw)[0] for raw in (
+            "1234.56", "1,234.56", "$1,234,567", "1,500", "1,50", "1.234,56", "12,34.5", "1,2345",
+        )}
+        self.assertEqual(parsed, {
+            "1234.56": Decimal("1234.56"), "1,234.56": Decimal("1234.56"),
+            "$1,234,567": Decimal("1234567"), "1,500": Decimal("1500"),
+            "1,50": None, "1.234,56": None, "12,34.5": None, "1,2345": None,
+        })
+
+
+# ─────────────────────────────────────────
+# Search
+# ─────────────────────────────────────────
+class ExpenseSearchTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.today = timezone.now().date()
+
+    def descriptions(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        rows = body["results"] if isinstance(body, dict) else body
+        return [row["description"] for row in rows]
+
+    def test_filter_uses_prefix_matching_and_tracks_writes(self):
+        coffee = make_expense(self.user, "3.00", self.today, description="Coffee beans")
+        make_expense(self.user, "9.00", self.today, description="Cinema tickets")
+        make_expense(make_user("other@example.com"), "1.00", self.today, description="Coffee")
+
+        self.assertEqual(self.descriptions("/api/expenses/?search=cof"), ["Coffee beans"])
+        self.assertEqual(self.descriptions("/api/expenses/?search=coffee%20be"), ["Coffee beans"])
+
+        self.client.patch(f"/api/expenses/{coffee.id}/", {"description": "Tea"})
+        self.assertEqual(self.descriptions("/api/expenses/?search=cof"), [])
+        self.assertEqual(self.descriptions("/api/expenses/?search=tea"), ["Tea"])
+
+        self.client.delete(f"/api/expenses/{coffee.id}/")
+        self.assertEqual(self.descriptions("/api/expenses/?search=tea"), [])
+
+    def test_operators_in_input_are_inert(self):
+        make_expense(self.user, "3.00", self.today, description="Rent OR utilities")
+
+        self.assertEqual(
+            self.descriptions('/api/expenses/?search=rent%20"OR*'), ["Rent OR utilities"]
+        )
+
+    def test_ranked_search_endpoint(self):
+        make_expense(self.user, "1.00", self.today, description="Pizza night with pizza friends")
+        make_expense(self.user, "1.00", self.today, description="Groceries and a pizza")
+        make_expense(self.user, "1.00", self.today, description="Bus fare")
+
+        self.assertEqual(
+            self.descriptions("/api/expenses/search/?q=pizz"),
+            ["Pizza night with pizza friends", "Groceries and a pizza"],
+        )
+
+
+# ─────────────────────────────────────────
+# Keyset pagination
+# ─────────────────────────────────────────
+class ExpenseKeysetPaginationTests(TestCase):
+    def setUp(self):
+        response_cache.clear()
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.today = timezone.now().date()
+        # Many rows sharing a date (and, for bulk rows, a created_at).
+        rows = [
+            {"amount": Decimal("1.00"), "date": self.today - timedelta(days=i % 3),
+             "category": Expense.Category.OTHER,
+             "payment_method": Expense.PaymentMethod.CASH, "description": f"row {i}"}
+            for i in range(25)
+        ]
+        bulk_create_expenses(self.user, rows)
+
+    def walk(self, url, key="next"):
+        ids = []
+        while url:
+            body = self.client.get(url).json()
+            ids.append([row["id"] for row in body["results"]])
+            url = body[key]
+        return ids
+
+    def test_pages_cover_every_row_once_in_order(self):
+        pages = self.walk("/api/expenses/?page_size=4")
+
+        seen = [pk for page in pages for pk in page]
+        expected = list(
+            Expense.objects.filter(owner=self.user)
+            .order_by("-date", "-created_at", "-id").values_list("id", flat=True)
+        )
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(pages), 7)
+
+    def test_previous_links_walk_back(self):
+        forward = self.walk("/api/expenses/?page_size=10")
+        last_page_url = "/api/expenses/?page_size=10"
+        for _ in range(len(forward) - 1):
+            last_page_url = self.client.get(last_page_url).json()["next"]
+
+        backward = self.walk(last_page_url, key="previous")
+
+        self.assertEqual(backward, list(reversed(forward)))
+
+    def test_page_size_is_capped(self):
+        body = self.client.get("/api/expenses/?page_size=1000").json()
+        self.assertEqual(len(body["results"]), 25)
+        self.assertIsNone(body["next"])
+
+    def test_approximate_count_is_cached(self):
+        body = self.client.get("/api/expenses/?count=approx&category=other").json()
+        self.assertEqual(body["count"], 25)
+
+        with self.assertNumQueries(1):
+            body = self.client.get("/api/expenses/?count=approx&category=other").json()
+        self.assertEqual(body["count"], 25)
+        self.assertNotIn("count", self.client.get("/api/expenses/").json())
+
+        body = self.client.get("/api/expenses/?count=approx&search=row").json()
+        self.assertEqual(body["count"], 25)
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get("/api/expenses/?cursor=bogus").status_code, 404)
+
+
+# ─────────────────────────────────────────
+# Delta sync
+# ─────────────────────────────────────────
+class ExpenseSyncTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.day = timezone.now().date() - timedelta(days=3)
+
+    def sync(self, since="", limit=1000):
+        response = self.client.get(f"/api/expenses/sync/?since={since}&limit={limit}")
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def walk(self, since="", limit=2):
+        changed, deleted, resets = {}, set(), []
+        while True:
+            body = self.sync(since, limit)
+            resets.append(body["reset"])
+            for row in body["changed"]:
+                changed[row["id"]] = row
+            deleted.update(body["deleted"])
+            since = body["cursor"]
+            if not body["has_more"]:
+                return changed, deleted, since, resets
+
+    def test_returns_only_what_changed_since_the_cursor(self):
+        kept, edited, removed = (make_expense(self.user, "5.00", self.day) for _ in range(3))
+        make_expense(make_user("other@example.com"), "9.00", self.day)
+        changed, deleted, cursor, _ = self.walk()
+        self.assertEqual(set(changed), {kept.id, edited.id, removed.id})
+        self.assertEqual(changed[kept.id], ExpenseSerializer(kept).data | {"amount": "5.00"})
+        self.assertEqual(deleted, set())
+
+        self.client.patch(f"/api/expenses/{edited.id}/", {"amount": "6.00"}, format="json")
+        self.client.delete(f"/api/expenses/{removed.id}/")
+        added = make_expense(self.user, "7.00", self.day)
+        body = self.sync(cursor)
+        self.assertEqual([row["id"] for row in body["changed"]], [edited.id, added.id])
+        self.assertEqual(body["changed"][0]["amount"], "6.00")
+        self.assertEqual(body["deleted"], [removed.id])
+        self.assertFalse(body["has_more"])
+
+        self.assertEqual(self.sync(body["cursor"])["changed"], [])
+        self.assertEqual(self.sync(body["cursor"])["cursor"], body["cursor"])
+
+    def test_batched_and_recurring_writes_are_numbered(self):
+        rows = [{"amount": Decimal("1.00"), "date": self.day, "category": Expense.Category.OTHER,
+                 "payment_method": Expense.PaymentMethod.CASH, "description": "x"}] * 4
+        created = bulk_create_expenses(self.user, rows)
+        *_, cursor, _ = self.walk()
+
+        bulk_update_expenses(self.user, [(created[0], {"amount": Decimal("2.00")})])
+        bulk_delete_expenses(self.user, [created[1].id, created[2].id])
+        RecurringExpense.objects.create(
+            owner=self.user, amount=Decimal("3.00"), category=Expense.Category.OTHER,
+            frequency="DAILY", start_date=self.day, next_date=self.day,
+        )
+        recurring.materialise()
+        changed, deleted, _, _ = self.walk(cursor)
+        self.assertEqual(len(changed), 1 + 4)  # the update, and four daily occurrences
+        self.assertEqual(changed[created[0].id]["amount"], "2.00")
+        self.assertEqual(deleted, {created[1].id, created[2].id})
+
+        numbers = list(Expense.objects.values_list("sync_seq", flat=True))
+        numbers += ExpenseTombstone.objects.values_list("sync_seq", flat=True)
+        self.assertEqual(len(set(numbers)), len(numbers))
+
+    def test_writes_between_the_reads_wait_for_the_next_sync(self):
+        edited, removed = (make_expense(self.user, "5.00", self.day) for _ in range(2))
+        removed_id = removed.id
+        cursor = self.sync()["cursor"]
+        since = int(cursor.split(".")[0])
+        tombstones = ExpenseTombstone.objects.filter
+
+        def interleave(*args, **kwargs):
+            # Lands after the rows were read, before the tombstones are.
+            mocked.side_effect = tombstones
+            update_expense(edited, {"amount": Decimal("6.00")})
+            delete_expense(removed)
+            return tombstones(*args, **kwargs)
+
+        with mock.patch.object(ExpenseTombstone.objects, "filter", side_effect=interleave) as mocked:
+            body = sync.changes(self.user.id, since)
+        self.assertEqual((body["changed"], body["deleted"], body["cursor"]), ([], [], cursor))
+
+        body = self.sync(cursor)
+        self.assertEqual([row["amount"] for row in body["changed"]], ["6.00"])
+        self.assertEqual(body["deleted"], [removed_id])
+
+    def test_pruned_tombstones_reset_stale_cursors(self):
+        expenses = [make_expense(self.user, "5.00", self.day) for _ in range(5)]
+        *_, stale, _ = self.walk()
+        self.client.delete(f"/api/expenses/{expenses[0].id}/")
+        ExpenseTombstone.objects.update(deleted_at=timezone.now() - timedelta(days=sync.TOMBSTONE_DAYS + 1))
+        out = StringIO()
+        call_command("prune_tombstones", stdout=out)
+        self.assertIn("Pruned 1 tombstones", out.getvalue())
+
+        changed, deleted, cursor, resets = self.walk(stale)
+        self.assertEqual(resets, [True, False])  # only the first page of the resync
+        self.assertEqual(set(changed), {expense.id for expense in expenses[1:]})
+        self.assertEqual(deleted, set())
+        self.assertFalse(self.sync(cursor)["reset"])
+        self.assertFalse(self.sync()["reset"])
+
+    def test_rejects_a_bad_cursor(self):
+        for since in ("abc", "-1", "1.x"):
+            response = self.client.get(f"/api/expenses/sync/?since={since}")
+            self.assertEqual(response.status_code, 400)
@@ -1,21 +1,59 @@
 # expenses/urls.py
 
+from django.conf import settings
 from django.urls import path
 from .views import (
+    BudgetDetailView,
+    BudgetListCreateView,
+    BudgetStatusView,
     ExpenseListCreateView,
+    ExpenseBulkView,
+    ExpenseExportView,
+    ImportJobCreateView,
+    ImportJobDetailView,
+    RecurringExpenseDetailView,
+    RecurringExpenseListCreateView,
     ExpenseDetailView,
     ExpenseRecentView,
+    ExpenseSearchView,
+    ExpenseSyncView,
     DailySeriesView,
-    DashboardSummaryView
+    DashboardSummaryView,
+    DistributionView,
+    ReportsView,
+    SeriesView,
 )
 
+# Under ASGI, the read-only analytics endpoints run as native async views.
+if settings.EXPENSES_ASYNC_VIEWS:
+    from .views import (
+        AsyncDashboardSummaryView as DashboardSummaryView,
+        AsyncDailySeriesView as DailySeriesView,
+        AsyncExpenseRecentView as ExpenseRecentView,
+        AsyncSeriesView as SeriesView,
+    )
+
 urlpatterns = [
     # Dashboard endpoints (keep first to avoid conflicts)
     path("dashboard/", DashboardSummaryView.as_view()),
+    path("series/", SeriesView.as_view()),
     path("series/daily/", DailySeriesView.as_view()),
     path("recent/", ExpenseRecentView.as_view()),
+    path("reports/", ReportsView.as_view()),
+    path("distribution/", DistributionView.as_view()),
+    path("search/", ExpenseSearchView.as_view()),
+    path("sync/", ExpenseSyncView.as_view()),
+    path("export/<str:fmt>/", ExpenseExportView.as_view()),
     
     # Expense CRUD endpoints
     path("", ExpenseListCreateView.as_view()),
+    path("bulk/", ExpenseBulkView.as_view()),
+    path("imports/", ImportJobCreateView.as_view()),
+    path("imports/<int:pk>/", ImportJobDetailView.as_view()),
+    path("budgets/", BudgetListCreateView.as_view()),
+    path("budgets/status/", BudgetStatusView.as_view()),
+    path("budgets/<int:pk>/", BudgetDetailView.as_view()),
+    path("recurring/", RecurringExpenseListCreateView.as_view()),
+    path("recurring/<int:pk>/", RecurringExpenseDetailView.as_view()),
     path("<int:pk>/", ExpenseDetailView.as_view()),
 ]
\ No newline at end of file
@@ -1,13 +1,53 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import permissions, generics, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
-from .models import Expense
-from .serializers import ExpenseSerializer
+from .cache import VersionedCacheMixin
+from .distribution import MAX_MERCHANTS, MAX_MONTHS, months_between, parse_month
+from .export import STREAMS
+from .imports import schedule_import
+from .models import Budget, Expense, ImportJob, RecurringExpense
+from .search import ranked_search
+from .series import MAX_SERIES, make_spec, parse_spec
+from . import sync
+from .serializers import (
+    BudgetSerializer,
+    ExpenseRowSerializer,
+    ExpenseSerializer,
+    ImportJobSerializer,
+    RecurringExpenseSerializer,
+)
 from .filters import ExpenseFilter
-from .pagination import ExpenseCursorPagination
-from .services import get_daily_series, get_dashboard_summary
+from .pagination import ExpenseKeysetPagination
+from .services import (
+    create_expense,
+    update_expense,
+    delete_expense,
+    bulk_create_expenses,
+    bulk_update_expenses,
+    bulk_delete_expenses,
+    create_budget,
+    update_budget,
+    delete_budget,
+    get_budget_status,
+    create_recurring_expense,
+    update_recurring_expense,
+    get_daily_series,
+    get_dashboard_summary,
+    get_distribution,
+    get_reports,
+    get_series,
+    aget_daily_series,
+    aget_dashboard_summary,
+    aget_series,
+)
 
 
 # ─────────────────────────────────────────
@@ -16,35 +56,192 @@ from .services import get_daily_series, get_dashboard_summary
 class ExpenseListCreateView(generics.ListCreateAPIView):
     serializer_class = ExpenseSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # Every budget counts one query for the user's row, read when its
+    # cache entry has expired (see users.authentication).
+    query_budget = {"GET": 3, "POST": 8}  # GET: the page, and a ?count=approx miss
     filter_backends = [DjangoFilterBackend]
     filterset_class = ExpenseFilter
-    pagination_class = ExpenseCursorPagination
+    pagination_class = ExpenseKeysetPagination
 
     def get_queryset(self):
         return Expense.objects.filter(owner=self.request.user)
 
     def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
+        queryset = ExpenseRowSerializer.values(self.filter_queryset(self.get_queryset()))
         page = self.paginate_queryset(queryset)
         if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+            return self.get_paginated_response(ExpenseRowSerializer(page).data)
+        return Response(ExpenseRowSerializer(queryset).data, status=status.HTTP_200_OK)
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save(owner=request.user)
+        serializer.instance = create_expense(request.user, serializer.validated_data)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
+# ─────────────────────────────────────────
+# Bulk create / update / delete
+# ─────────────────────────────────────────
+class ExpenseBulkView(generics.GenericAPIView):
+    """
+    POST   — list of new expenses
+    PATCH  — list of partial updates, each carrying its ``id``
+    DELETE — ``{"ids": [...]}``
+
+    Invalid items are reported per index and the rest are written; pass
+    ``?atomic=true`` to reject the whole batch when any item fails.
+    """
+    serializer_class = ExpenseSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    # For a batch of max_items; a query per item would blow well past these.
+    # DELETE includes the tombstones, 249 to an INSERT on SQLite.
+    query_budget = {"POST": 113, "PATCH": 103, "DELETE": 64}
+    max_items = 5000
+
+    def get_queryset(self):
+        return Expense.objects.filter(owner=self.request.user)
+
+    def _check_size(self, items):
+        if isinstance(items, list) and len(items) > self.max_items:
+            raise ValidationError(
+                {"non_field_errors": [f"At most {self.max_items} items per request."]}
+            )
+
+    def _atomic(self):
+        return self.request.query_params.get("atomic", "").lower() in ("1", "true")
+
+    def _response(self, results, errors, success_status):
+        body = {
+            "results": results,
+            "errors": [
+                {"index": index, "errors": detail}
+                for index, detail in sorted(errors.items())
+            ],
+        }
+        if not errors:
+            return Response(body, status=success_status)
+        if not results:
+            return Response(body, status=status.HTTP_400_BAD_REQUEST)
+        return Response(body, status=status.HTTP_207_MULTI_STATUS)
+
+    def post(self, request):
+        self._check_size(request.data)
+        valid, errors = self.get_serializer(many=True).partition(request.data)
+        if errors and self._atomic():
+            return self._response([], errors, status.HTTP_201_CREATED)
+
+        created = bulk_create_expenses(request.user, [data for _, data in valid])
+        results = [
+            {"index": index, "id": expense.id}
+            for (index, _), expense in zip(valid, created)
+        ]
+        return self._response(results, errors, status.HTTP_201_CREATED)
+
+    def patch(self, request):
+        self._check_size(request.data)
+        serializer = self.get_serializer(many=True, partial=True)
+        valid, errors = serializer.partition(request.data)
+
+        ids = {}
+        for index, _ in valid:
+            try:
+                ids[index] = int(request.data[index].get("id"))
+            except (TypeError, ValueError):
+                errors[index] = {"id": ["A valid integer is required."]}
+        instances = self.get_queryset().in_bulk(set(ids.values()))
+
+        changes, results, seen = [], [], set()
+        for index, data in valid:
+            if index in errors:
+                continue
+            instance = instances.get(ids[index])
+            if instance is None:
+                errors[index] = {"id": ["Not found."]}
+                continue
+            if instance.id in seen:
+                errors[index] = {"id": ["Duplicate id in batch."]}
+                continue
+            seen.add(instance.id)
+            changes.append((instance, data))
+            results.append({"index": index, "id": instance.id})
+
+        if errors and self._atomic():
+            return self._response([], errors, status.HTTP_200_OK)
+        bulk_update_expenses(request.user, changes)
+        return self._response(results, errors, status.HTTP_200_OK)
+
+    def delete(self, request):
+        ids = request.data.get("ids") if isinstance(request.data, dict) else None
+        if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+            raise ValidationError({"ids": ["Expected a list of integer ids."]})
+        self._check_size(ids)
+
+        if self._atomic() and self.get_queryset().filter(id__in=ids).count() != len(set(ids)):
+            raise ValidationError({"ids": ["Some ids were not found."]})
+        deleted = bulk_delete_expenses(request.user, ids)
+        missing = sorted(set(ids) - set(deleted))
+        return Response(
+            {"deleted": deleted, "not_found": missing}, status=status.HTTP_200_OK
+        )
+
+
+# ─────────────────────────────────────────
+# Export (streamed CSV / NDJSON)
+# ─────────────────────────────────────────
+class ExpenseExportView(generics.GenericAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 2  # up to the first byte; rows are read while streaming
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = ExpenseFilter
+
+    def get_queryset(self):
+        return Expense.objects.filter(owner=self.request.user)
+
+    def get(self, request, fmt):
+        if fmt not in STREAMS:
+            raise Http404
+        stream, content_type = STREAMS[fmt]
+        response = StreamingHttpResponse(
+            stream(self.filter_queryset(self.get_queryset())),
+            content_type=content_type,
+        )
+        response["Content-Disposition"] = f'attachment; filename="expenses.{fmt}"'
+        return response
+
+
+# ─────────────────────────────────────────
+# CSV import jobs
+# ─────────────────────────────────────────
+class ImportJobCreateView(generics.CreateAPIView):
+    serializer_class = ImportJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 2
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = serializer.save(owner=request.user)
+        schedule_import(job)
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
+
+class ImportJobDetailView(generics.RetrieveAPIView):
+    serializer_class = ImportJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 2
+
+    def get_queryset(self):
+        return ImportJob.objects.filter(owner=self.request.user)
+
+
 # ─────────────────────────────────────────
 # Retrieve + Update + Delete
 # ─────────────────────────────────────────
 class ExpenseDetailView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = ExpenseSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = {"GET": 2, "PUT": 16, "PATCH": 16, "DELETE": 14}
 
     def get_queryset(self):
         return Expense.objects.filter(owner=self.request.user)
@@ -60,48 +257,396 @@ class ExpenseDetailView(generics.RetrieveUpdateDestroyAPIView):
             partial=True
         )
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        update_expense(serializer.instance, serializer.validated_data)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def destroy(self, request, *args, **kwargs):
-        self.get_object().delete()
+        delete_expense(self.get_object())
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 # ─────────────────────────────────────────
 # Recent
 # ─────────────────────────────────────────
-class ExpenseRecentView(generics.ListAPIView):
+class ExpenseRecentView(VersionedCacheMixin, generics.ListAPIView):
     serializer_class = ExpenseSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 2
     pagination_class = None
+    cache_namespace = "recent"
 
     def get_queryset(self):
-        return Expense.objects.filter(
+        return ExpenseRowSerializer.values(Expense.objects.filter(
             owner=self.request.user
-        ).order_by('-date', '-created_at')[:5]
+        ).order_by('-date', '-created_at'))[:5]
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            request, (),
+            lambda: ExpenseRowSerializer(self.get_queryset()).data,
+        )
+
+
+# ─────────────────────────────────────────
+# Search (ranked, prefix matching)
+# ─────────────────────────────────────────
+class ExpenseSearchView(generics.ListAPIView):
+    serializer_class = ExpenseSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 2
+    pagination_class = None
+    max_limit = 50
 
     def list(self, request, *args, **kwargs):
-        serializer = self.get_serializer(self.get_queryset(), many=True)
+        try:
+            limit = min(max(int(request.query_params.get("limit", 10)), 1), self.max_limit)
+        except ValueError:
+            raise ValidationError({"limit": ["A valid integer is required."]})
+        results = ranked_search(request.user, request.query_params.get("q", ""), limit)
+        serializer = self.get_serializer(results, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
 # ─────────────────────────────────────────
-# Daily Series
+# Delta sync (see expenses.sync)
+# ─────────────────────────────────────────
+class ExpenseSyncView(generics.GenericAPIView):
+    """
+    GET ?since=<cursor>&limit=<n> — what changed after ``cursor``. Call
+    again with the returned ``cursor`` while ``has_more``; on ``reset``,
+    drop the local copy first.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 4
+
+    def get(self, request):
+        try:
+            since, horizon = sync.parse_cursor(request.query_params.get("since"))
+        except ValueError:
+            raise ValidationError({"since": ["Pass the cursor of the last sync."]})
+        try:
+            limit = min(max(int(request.query_params.get("limit", sync.MAX_LIMIT)), 1), sync.MAX_LIMIT)
+        except ValueError:
+            raise ValidationError({"limit": ["A valid integer is required."]})
+        delta = sync.changes(request.user.id, since, horizon, limit)
+        delta["changed"] = ExpenseRowSerializer(delta["changed"]).data
+        return Response(delta, status=status.HTTP_200_OK)
+
+
+# ─────────────────────────────────────────
+# Series
 # ─────────────────────────────────────────
-class DailySeriesView(generics.GenericAPIView):
+def _days_param(request, default=30):
+    try:
+        return make_spec("day", request.query_params.get("days", default)).periods
+    except ValueError as exc:
+        raise ValidationError({"days": [str(exc)]})
+
+
+def _series_param(request):
+    """
+    ``?series=granularity:periods[:group_by]``, repeatable, e.g.
+    ``?series=day:30&series=month:12:category``; defaults to ``day:30``.
+    """
+    texts = request.query_params.getlist("series") or ["day:30"]
+    if len(texts) > MAX_SERIES:
+        raise ValidationError({"series": [f"Ask for at most {MAX_SERIES} series at once."]})
+    try:
+        return [parse_spec(text) for text in texts]
+    except ValueError as exc:
+        raise ValidationError({"series": [str(exc)]})
+
+
+class DailySeriesView(VersionedCacheMixin, generics.GenericAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 2
+    cache_namespace = "series-daily"
+    read_from_replica = True
+
+    def get(self, request):
+        days = _days_param(request)
+        return self.cached_response(
+            request, (days, timezone.now().date()),
+            lambda: get_daily_series(request.user, days),
+        )
+
+
+class SeriesView(VersionedCacheMixin, generics.GenericAPIView):
+    """Several series, each at its own granularity and grouping, in one call."""
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 1 + MAX_SERIES
+    cache_namespace = "series"
+    read_from_replica = True
+
+    def get(self, request):
+        specs = _series_param(request)
+        return self.cached_response(
+            request, (specs, timezone.now().date()),
+            lambda: get_series(request.user, specs),
+        )
+
+
+# ─────────────────────────────────────────
+# Reports (columnar, NumPy)
+# ─────────────────────────────────────────
+class ReportsView(VersionedCacheMixin, generics.GenericAPIView):
+    """
+    Rolling average over ``?days=`` (default 90) with a ``?window=``-day
+    window (default 7), per-category percentiles and month-over-month /
+    year-over-year changes.
+    """
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 2
+    cache_namespace = "reports"
+    read_from_replica = True
+    max_window = 90
 
     def get(self, request):
-        days = int(request.query_params.get("days", 30))
-        return Response(get_daily_series(request.user, days), status=status.HTTP_200_OK)
+        days = _days_param(request, default=90)
+        try:
+            window = int(request.query_params.get("window", 7))
+        except ValueError:
+            window = 0
+        if not 1 <= window <= self.max_window:
+            raise ValidationError({"window": [f"Use a window of 1 to {self.max_window} days."]})
+        return self.cached_response(
+            request, (days, window, timezone.now().date()),
+            lambda: get_reports(request.user, days, window),
+        )
+
+
+# ─────────────────────────────────────────
+# Budgets
+# ─────────────────────────────────────────
+class BudgetListCreateView(generics.ListCreateAPIView):
+    serializer_class = BudgetSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = {"GET": 2, "POST": 5}
+    pagination_class = None
+
+    def get_queryset(self):
+        return Budget.objects.filter(owner=self.request.user)
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.instance = create_budget(request.user, serializer.validated_data)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class BudgetDetailView(generics.RetrieveUpdateDestroyAPIView):
+    serializer_class = BudgetSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 5
+
+    def get_queryset(self):
+        return Budget.objects.filter(owner=self.request.user)
+
+    def update(self, request, *args, **kwargs):
+        serializer = self.get_serializer(self.get_object(), data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        update_budget(serializer.instance, serializer.validated_data)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    def destroy(self, request, *args, **kwargs):
+        delete_budget(self.get_object())
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+def _month_param(request, name):
+    """``?name=YYYY-MM`` as the month's first day; defaults to this month."""
+    text = request.query_params.get(name)
+    if text is None:
+        return timezone.now().date().replace(day=1)
+    try:
+        return parse_month(text)
+    except ValueError:
+        raise ValidationError({name: ["Use the form YYYY-MM."]})
+
+
+class BudgetStatusView(VersionedCacheMixin, generics.GenericAPIView):
+    """Spend against every budget in ``?month=YYYY-MM`` (default: this month)."""
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 2
+    cache_namespace = "budget-status"
+    read_from_replica = True
+
+    def get(self, request):
+        month = _month_param(request, "month")
+        return self.cached_response(
+            request, (month,),
+            lambda: get_budget_status(request.user, month),
+        )
+
+
+# ─────────────────────────────────────────
+# Recurring expenses
+# ─────────────────────────────────────────
+class RecurringExpenseListCreateView(generics.ListCreateAPIView):
+    serializer_class = RecurringExpenseSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = {"GET": 2, "POST": 4}
+    pagination_class = None
+
+    def get_queryset(self):
+        return RecurringExpense.objects.filter(owner=self.request.user)
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.instance = create_recurring_expense(request.user, serializer.validated_data)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class RecurringExpenseDetailView(generics.RetrieveUpdateDestroyAPIView):
+    """Deleting a rule stops it; the expenses it already wrote are kept."""
+    serializer_class = RecurringExpenseSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = {"GET": 2, "PUT": 6, "PATCH": 6, "DELETE": 4}
+
+    def get_queryset(self):
+        return RecurringExpense.objects.filter(owner=self.request.user)
+
+    def update(self, request, *args, **kwargs):
+        serializer = self.get_serializer(self.get_object(), data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        update_recurring_expense(serializer.instance, serializer.validated_data)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+# ─────────────────────────────────────────
+# Category distribution + top merchants
+# ─────────────────────────────────────────
+class DistributionView(VersionedCacheMixin, generics.GenericAPIView):
+    """
+    Spend per category and the top ``?limit=`` merchants (default 10) for
+    the months ``?from=YYYY-MM`` to ``?to=YYYY-MM``, both defaulting to
+    this month.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 3
+    cache_namespace = "distribution"
+    read_from_replica = True
+
+    def get(self, request):
+        last = _month_param(request, "to")
+        first = _month_param(request, "from") if "from" in request.query_params else last
+        if not 1 <= months_between(first, last) <= MAX_MONTHS:
+            raise ValidationError({"from": [f"Ask for 1 to {MAX_MONTHS} months, ending on or after from."]})
+        try:
+            limit = int(request.query_params.get("limit", 10))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= MAX_MERCHANTS:
+            raise ValidationError({"limit": [f"Use a limit of 1 to {MAX_MERCHANTS}."]})
+        return self.cached_response(
+            request, (first, last, limit),
+            lambda: get_distribution(request.user, first, last, limit),
+        )
 
 
 # ─────────────────────────────────────────
 # Dashboard
 # ─────────────────────────────────────────
-class DashboardSummaryView(generics.GenericAPIView):
+class DashboardSummaryView(VersionedCacheMixin, generics.GenericAPIView):
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 4
+    cache_namespace = "dashboard"
+    read_from_replica = True
 
     def get(self, request):
-        return Response(get_dashboard_summary(request.user), status=status.HTTP_200_OK)
\ No newline at end of file
+        return self.cached_response(
+            request, (timezone.now().date(),),
+            lambda: get_dashboard_summary(request.user),
+        )
+
+
+# ─────────────────────────────────────────
+# Async analytics (ASGI)
+# ─────────────────────────────────────────
+class AsyncAPIView(generics.GenericAPIView):
+    """
+    DRF's dispatch is synchronous, so views with ``async def`` handlers
+    dispatch here instead. Authentication, permissions and throttling are
+    DRF's own ``initial()``, run in a worker thread since they may query.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            method = request.method.lower()
+            handler = self.http_method_not_allowed
+            if method in self.http_method_names:
+                handler = getattr(self, method, handler)
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def options(self, request, *args, **kwargs):
+        return super().options(request, *args, **kwargs)
+
+
+class AsyncExpenseRecentView(VersionedCacheMixin, AsyncAPIView):
+    serializer_class = ExpenseSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 2
+    cache_namespace = "recent"
+
+    async def get(self, request):
+        async def compute():
+            recent = ExpenseRowSerializer.values(Expense.objects.filter(
+                owner=request.user
+            ).order_by('-date', '-created_at'))[:5]
+            return ExpenseRowSerializer([row async for row in recent]).data
+
+        return await self.acached_response(request, (), compute)
+
+
+class AsyncDailySeriesView(VersionedCacheMixin, AsyncAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 2
+    cache_namespace = "series-daily"
+    read_from_replica = True
+
+    async def get(self, request):
+        days = _days_param(request)
+        return await self.acached_response(
+            request, (days, timezone.now().date()),
+            lambda: aget_daily_series(request.user, days),
+        )
+
+
+class AsyncSeriesView(VersionedCacheMixin, AsyncAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 1 + MAX_SERIES
+    cache_namespace = "series"
+    read_from_replica = True
+
+    async def get(self, request):
+        specs = _series_param(request)
+        return await self.acached_response(
+            request, (specs, timezone.now().date()),
+            lambda: aget_series(request.user, specs),
+        )
+
+
+class AsyncDashboardSummaryView(VersionedCacheMixin, AsyncAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 4
+    cache_namespace = "dashboard"
+    read_from_replica = True
+
+    async def get(self, request):
+        return await self.acached_response(
+            request, (timezone.now().date(),),
+            lambda: aget_dashboard_summary(request.user),
+        )
@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
 
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        from .authentication import user_deleted, user_saved
+        from .models import LazyUser, User
+
+        # Signals carry the instance's own class, so the proxy needs its own.
+        for sender in (User, LazyUser):
+            post_save.connect(user_saved, sender=sender)
+            post_delete.connect(user_deleted, sender=sender)
@@ -0,0 +1,129 @@
+"""
+JWT authentication from a cached user row.
+
+A verified access token already says who the caller is, and nearly every
+view only needs ``request.user.id`` for its ``owner=`` filters. Like
+``JWTAuthentication``, ``LazyJWTAuthentication`` refuses tokens of deleted
+or deactivated accounts, but it checks the user's row in a cache kept for
+``ROW_TTL`` seconds, loading it on a miss: one query per user per
+``ROW_TTL`` instead of one per request. The row carries every field but the
+password hash, so views reading ``request.user`` need no query either;
+password checks always read the database.
+
+An evicted or expired row is simply read again, so a deactivation is never
+forgotten. Saving or deleting a user drops its cached row. The cache works
+like the response cache: a per-process LRU unless ``CACHES`` is configured.
+With a per-process cache, other workers see the change within ``ROW_TTL``;
+configure a shared cache for them to see it at once.
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from expenses.cache import MISSING, build_backend
+
+from .models import LazyUser
+
+User = get_user_model()
+
+DEFAULTS = {
+    "BACKEND": "auto",
+    "ALIAS": "default",
+    "MAX_ENTRIES": 10_000,
+    "ROW_TTL": 5,
+}
+
+
+class UserCache:
+    """Cached user rows, each expiring ``row_ttl`` seconds after it was read."""
+
+    def __init__(self, backend, row_ttl):
+        self.backend = backend
+        self.row_ttl = row_ttl
+
+    def row(self, user_id):
+        entry = self.backend.get(f"users:row:{user_id}")
+        if entry is MISSING or entry[0] < time.time():
+            return MISSING
+        return entry[1]
+
+    def set_row(self, user_id, row):
+        self.backend.set(f"users:row:{user_id}", (time.time() + self.row_ttl, row))
+
+    def forget(self, user_id):
+        self.backend.delete(f"users:row:{user_id}")
+
+    def clear(self):
+        self.backend.clear()
+
+
+_config = {**DEFAULTS, **getattr(settings, "USER_CACHE", {})}
+user_cache = UserCache(build_backend({**_config, "TIMEOUT": _config["ROW_TTL"]}), _config["ROW_TTL"])
+
+# Every concrete field but the password hash, which is loaded only on demand.
+ROW_FIELDS = tuple(
+    field.attname for field in User._meta.concrete_fields if field.attname != "password"
+)
+
+
+def cached_row(user_id):
+    """``user_id``'s row without the password, from the cache or the database; None if gone."""
+    row = user_cache.row(user_id)
+    if row is MISSING:
+        row = User.objects.filter(pk=user_id).values(*ROW_FIELDS).first()
+        if row is not None:
+            user_cache.set_row(user_id, row)
+    return row
+
+
+def load_deferred_fields(user, fields):
+    """Fill in ``user``'s deferred fields: all of them, in one go."""
+    deferred = user.get_deferred_fields()
+    if "password" in fields:
+        row = User.objects.filter(pk=user.pk).values(*deferred).first()
+    else:
+        row = cached_row(user.pk)
+    if row is None:
+        raise AuthenticationFailed(_("User not found"), code="user_not_found")
+    for name, value in row.items():
+        if name in deferred:
+            setattr(user, name, value)
+
+
+class LazyJWTAuthentication(JWTAuthentication):
+    """``JWTAuthentication`` checking the user against a short-lived row cache."""
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_FIELD != User._meta.pk.name or api_settings.CHECK_REVOKE_TOKEN:
+            # Both need the password hash or another lookup anyway.
+            return super().get_user(validated_token)
+        try:
+            user_id = User._meta.pk.to_python(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, ValidationError) as exc:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from exc
+        row = cached_row(user_id)
+        if row is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if api_settings.CHECK_USER_IS_ACTIVE and not row["is_active"]:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        # Only the password hash stays deferred.
+        return LazyUser.from_db(DEFAULT_DB_ALIAS, list(row), list(row.values()))
+
+
+# ─────────────────────────────────────────
+# Keeping the cache in step (connected in UsersConfig.ready)
+# ─────────────────────────────────────────
+def user_saved(sender, instance, **kwargs):
+    user_cache.forget(instance.pk)
+
+
+def user_deleted(sender, instance, **kwargs):
+    user_cache.forget(instance.pk)
@@ -0,0 +1,167 @@
+"""
+Account deletion in the background.
+
+Deleting a user in the request would hand Django's collector every table
+that points at it, and delete a heavy user's history in one transaction.
+That is seconds of holding the write lock, with every row passing through
+the search index's triggers. Instead, ``request_deletion`` deactivates the
+account and queues an ``AccountDeletion``. This worker refuses the
+account's tokens at once; others once their cached copy of the user's row
+expires (see ``users.authentication``). ``run_deletion`` waits that long,
+so no request can still write as the user, then purges their rows table
+by table, ``CHUNK_SIZE`` rows per ``DELETE``, each chunk committed with
+the job's progress. A job interrupted mid-way is resumed
+by ``manage.py process_deletions`` once stale. The user row itself goes
+last, through the ORM, so anything still pointing at it cascades as usual.
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from expenses.cache import response_cache
+from expenses.models import (
+    Budget, DailyRollup, Expense, ExpenseTombstone, ImportJob, MonthlyCategoryTotal,
+    MonthlyMerchantTotal, RecurringExpense,
+)
+
+from .authentication import user_cache
+from .models import AccountDeletion
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+CHUNK_SIZE = 5000
+STALE_AFTER = timedelta(minutes=10)
+
+# The user's rows per step, in deletion order: expenses before the
+# recurring rules they point at, blacklist entries before their tokens.
+STEPS = (
+    ("expenses", lambda user_id: Expense.objects.filter(owner_id=user_id)),
+    ("expense_tombstones", lambda user_id: ExpenseTombstone.objects.filter(owner_id=user_id)),
+    ("daily_rollups", lambda user_id: DailyRollup.objects.filter(owner_id=user_id)),
+    ("monthly_category_totals", lambda user_id: MonthlyCategoryTotal.objects.filter(owner_id=user_id)),
+    ("monthly_merchant_totals", lambda user_id: MonthlyMerchantTotal.objects.filter(owner_id=user_id)),
+    ("budgets", lambda user_id: Budget.objects.filter(owner_id=user_id)),
+    ("recurring_expenses", lambda user_id: RecurringExpense.objects.filter(owner_id=user_id)),
+    ("import_jobs", lambda user_id: ImportJob.objects.filter(owner_id=user_id)),
+    ("blacklisted_tokens", lambda user_id: BlacklistedToken.objects.filter(token__user_id=user_id)),
+    ("outstanding_tokens", lambda user_id: OutstandingToken.objects.filter(user_id=user_id)),
+)
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, "ACCOUNT_DELETION_WORKERS", 1),
+    thread_name_prefix="account-deletion",
+)
+
+
+# ─────────────────────────────────────────
+# Requests
+# ─────────────────────────────────────────
+def request_deletion(user):
+    """Deactivate ``user`` and queue the purge of their data; returns the job."""
+    with transaction.atomic():
+        user.is_active = False
+        user.save(update_fields=["is_active"])
+        job = AccountDeletion.objects.create(user_id=user.pk)
+    transaction.on_commit(lambda: _executor.submit(_run_in_thread, job.pk))
+    return job
+
+
+def _run_in_thread(job_id):
+    try:
+        run_deletion(job_id)
+    except Exception:
+        logger.exception("Account deletion %s crashed", job_id)
+    finally:
+        connection.close()
+
+
+# ─────────────────────────────────────────
+# Jobs
+# ─────────────────────────────────────────
+def _claimable():
+    # RUNNING jobs whose progress stopped moving were interrupted mid-way.
+    stale = timezone.now() - STALE_AFTER
+    return Q(status=AccountDeletion.Status.PENDING) | Q(
+        status=AccountDeletion.Status.RUNNING, updated_at__lt=stale
+    )
+
+
+def pending_jobs():
+    return AccountDeletion.objects.filter(_claimable()).order_by("created_at")
+
+
+def claim(job_id):
+    """Atomically move a pending or stalled job to RUNNING; False if taken."""
+    return bool(
+        AccountDeletion.objects.filter(_claimable(), pk=job_id)
+        .update(status=AccountDeletion.Status.RUNNING, updated_at=timezone.now())
+    )
+
+
+def delete_chunk(queryset, chunk_size):
+    """``DELETE`` up to ``chunk_size`` rows of ``queryset`` by primary key; returns how many."""
+    model = queryset.model
+    select, params = queryset.order_by().values("pk")[:chunk_size].query.sql_with_params()
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {quote(model._meta.db_table)} "
+            f"WHERE {quote(model._meta.pk.column)} IN ({select})",
+            params,
+        )
+        return cursor.rowcount
+
+
+def _delete_import_files(user_id):
+    storage = ImportJob._meta.get_field("file").storage
+    for name in ImportJob.objects.filter(owner_id=user_id).values_list("file", flat=True):
+        if name:
+            storage.delete(name)
+
+
+def run_deletion(job_id, chunk_size=CHUNK_SIZE):
+    if not claim(job_id):
+        return None
+    job = AccountDeletion.objects.get(pk=job_id)
+    # Until every worker's cached row says inactive, a request could still
+    # write as the user behind the purge.
+    revoked_at = job.created_at + timedelta(seconds=user_cache.row_ttl)
+    time.sleep(max(0, (revoked_at - timezone.now()).total_seconds()))
+    if job.started_at is None:
+        job.started_at = timezone.now()
+        job.save(update_fields=["started_at", "updated_at"])
+
+    for step, rows in STEPS:
+        if step == "import_jobs":
+            _delete_import_files(job.user_id)
+        while True:
+            with transaction.atomic():
+                deleted = delete_chunk(rows(job.user_id), chunk_size)
+                AccountDeletion.objects.filter(pk=job.pk).update(
+                    step=step, rows_deleted=F("rows_deleted") + deleted, updated_at=timezone.now(),
+                )
+            if deleted < chunk_size:
+                break
+
+    # Whatever is left now is small: admin log entries, group memberships,
+    # and anything written since its table was purged.
+    User.objects.filter(pk=job.user_id).delete()
+    # Ids can be reused; never let a new account see cached responses.
+    response_cache.bump(job.user_id)
+
+    AccountDeletion.objects.filter(pk=job.pk).update(
+        status=AccountDeletion.Status.COMPLETED, step="", finished_at=timezone.now(),
+        updated_at=timezone.now(),
+    )
+    job.refresh_from_db()
+    return job
@@ -0,0 +1,110 @@
+"""
+Password hashers with tunable costs, run on a bounded thread pool.
+
+Which hasher encodes new passwords is ``PASSWORD_HASHING["PROFILE"]``; the
+others in ``PASSWORD_HASHERS`` still verify older hashes. A login whose
+hash was made by another hasher, or with other costs, rehashes it with the
+preferred one (Django's ``check_password`` does this on every successful
+check).
+
+Hashing is slow on purpose, so a burst of logins would take the CPU from
+every other request. Here every hash runs on one of ``WORKERS`` threads.
+argon2-cffi and hashlib release the GIL while hashing, so the rest of the
+process keeps running. Up to ``QUEUE`` more callers wait for a thread. Past
+that, ``PasswordHashingBusy`` (503) turns callers away at once, so hashing
+never ties up every request worker.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+DEFAULTS = {
+    "PROFILE": "pbkdf2",
+    "ARGON2_TIME_COST": 2,
+    "ARGON2_MEMORY_KIB": 19 * 1024,
+    "ARGON2_PARALLELISM": 1,
+    "PBKDF2_ITERATIONS": hashers.PBKDF2PasswordHasher.iterations,
+    "SCRYPT_WORK_FACTOR": hashers.ScryptPasswordHasher.work_factor,
+    "WORKERS": 2,
+    "QUEUE": 8,
+}
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, "PASSWORD_HASHING", {})}
+
+
+class PasswordHashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = _("Too many sign-ins at once; try again in a moment.")
+    default_code = "hashing_busy"
+
+
+class HashingPool:
+    def __init__(self, workers, queue):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(workers + queue)
+        self._local = threading.local()
+
+    def _call(self, fn, args):
+        self._local.inside = True
+        try:
+            return fn(*args)
+        finally:
+            self._local.inside = False
+
+    def run(self, fn, *args):
+        # PBKDF2 and scrypt verify by encoding; that runs on the same thread.
+        if getattr(self._local, "inside", False):
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHashingBusy()
+        try:
+            return self._executor.submit(self._call, fn, args).result()
+        finally:
+            self._slots.release()
+
+
+hashing_pool = HashingPool(_config()["WORKERS"], _config()["QUEUE"])
+
+
+class PooledHasherMixin:
+    def encode(self, password, salt, *args):
+        return hashing_pool.run(super().encode, password, salt, *args)
+
+    def verify(self, password, encoded):
+        return hashing_pool.run(super().verify, password, encoded)
+
+
+# ─────────────────────────────────────────
+# Profiles (costs are read per call, so a settings change applies at once)
+# ─────────────────────────────────────────
+class Argon2PasswordHasher(PooledHasherMixin, hashers.Argon2PasswordHasher):
+    @property
+    def time_cost(self):
+        return _config()["ARGON2_TIME_COST"]
+
+    @property
+    def memory_cost(self):
+        return _config()["ARGON2_MEMORY_KIB"]
+
+    @property
+    def parallelism(self):
+        return _config()["ARGON2_PARALLELISM"]
+
+
+class PBKDF2PasswordHasher(PooledHasherMixin, hashers.PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return _config()["PBKDF2_ITERATIONS"]
+
+
+class ScryptPasswordHasher(PooledHasherMixin, hashers.ScryptPasswordHasher):
+    @property
+    def work_factor(self):
+        return _config()["SCRYPT_WORK_FACTOR"]
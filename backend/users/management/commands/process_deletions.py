@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from users.deletion import pending_jobs, run_deletion
+
+
+class Command(BaseCommand):
+    help = "Purge the data of deleted accounts and resume interrupted purges."
+
+    def handle(self, *args, **options):
+        for job_id in pending_jobs().values_list("id", flat=True):
+            job = run_deletion(job_id)
+            if job is None:
+                continue
+            self.stdout.write(
+                f"deletion {job.pk}: {job.status} — {job.rows_deleted} rows "
+                f"({job.rows_per_second} rows/s)"
+            )
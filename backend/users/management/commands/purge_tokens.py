@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users import tokens
+
+
+class Command(BaseCommand):
+    help = "Delete expired refresh tokens and their blacklist entries. Safe to re-run; schedule it hourly."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=tokens.PURGE_BATCH_SIZE,
+            help="Tokens deleted per statement.",
+        )
+        parser.add_argument(
+            "--pause", type=float, default=0.0,
+            help="Seconds to sleep between batches.",
+        )
+
+    def handle(self, *args, batch_size, pause, **options):
+        started = time.perf_counter()
+        deleted = tokens.purge_expired(batch_size=batch_size, pause=pause)
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted} expired tokens in {time.perf_counter() - started:.2f}s."
+        ))
@@ -1,6 +1,9 @@
 # users/models.py
+import uuid
+
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 
 
 class User(AbstractUser):
@@ -16,3 +19,61 @@ class User(AbstractUser):
 
     def __str__(self) -> str:
         return self.username
+
+
+class LazyUser(User):
+    """
+    A ``User`` built from the short-lived user cache for a verified access
+    token (see ``users.authentication``), with its password hash deferred.
+    Fields deferred otherwise load all at once, from the cache when they can.
+    """
+
+    class Meta:
+        proxy = True
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        if fields is not None and self.get_deferred_fields().issuperset(fields):
+            from .authentication import load_deferred_fields
+
+            load_deferred_fields(self, fields)
+        else:
+            super().refresh_from_db(using, fields, from_queryset)
+
+
+class AccountDeletion(models.Model):
+    """
+    A deleted account's data being purged in the background. Keyed by a
+    random id, so its status can be read once the user's tokens no longer
+    work; it outlives the user row, which is why ``user_id`` is no foreign key.
+    """
+
+    class Status(models.TextChoices):
+        PENDING   = "PENDING", "Pending"
+        RUNNING   = "RUNNING", "Running"
+        COMPLETED = "COMPLETED", "Completed"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user_id = models.BigIntegerField(db_index=True)
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.PENDING
+    )
+    step = models.CharField(max_length=40, blank=True)
+    rows_deleted = models.PositiveBigIntegerField(default=0)
+
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "updated_at"]),
+        ]
+
+    @property
+    def rows_per_second(self):
+        if not self.started_at:
+            return 0.0
+        elapsed = ((self.finished_at or timezone.now()) - self.started_at).total_seconds()
+        return round(self.rows_deleted / elapsed, 1) if elapsed > 0 else 0.0
@@ -1,7 +1,11 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 from rest_framework import serializers
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+
+from backend.metrics import TimedSerializerMixin
+from .models import AccountDeletion
+from .tokens import RefreshToken
 
 User = get_user_model()
 
@@ -9,7 +13,7 @@ User = get_user_model()
 # ─────────────────────────────────────────────────────────────
 # Registration
 # ─────────────────────────────────────────────────────────────
-class RegisterSerializer(serializers.ModelSerializer):
+class RegisterSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     password = serializers.CharField(
         write_only=True, style={"input_type": "password"}, validators=[validate_password]
     )
@@ -40,18 +44,47 @@ class RegisterSerializer(serializers.ModelSerializer):
 # ─────────────────────────────────────────────────────────────
 class EmailLoginSerializer(TokenObtainPairSerializer):
     username_field = "email"
+    token_class = RefreshToken
+
+
+# ─────────────────────────────────────────────────────────────
+# Token refresh (rotating; see users.tokens)
+# ─────────────────────────────────────────────────────────────
+class RotatingRefreshSerializer(TokenRefreshSerializer):
+    token_class = RefreshToken
 
 
 # ─────────────────────────────────────────────────────────────
 # Profile (retrieve / update)
 # ─────────────────────────────────────────────────────────────
-class ProfileSerializer(serializers.ModelSerializer):
+class ProfileSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ("id", "email", "first_name", "last_name")
         read_only_fields = ("email",)
 
 
+# ─────────────────────────────────────────────────────────────
+# Account deletion progress
+# ─────────────────────────────────────────────────────────────
+class AccountDeletionSerializer(serializers.ModelSerializer):
+    rows_per_second = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = AccountDeletion
+        fields = (
+            "id",
+            "status",
+            "step",
+            "rows_deleted",
+            "rows_per_second",
+            "started_at",
+            "finished_at",
+            "created_at",
+        )
+        read_only_fields = fields
+
+
 # ─────────────────────────────────────────────────────────────
 # Change password
 # ─────────────────────────────────────────────────────────────
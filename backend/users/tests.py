@@ -1,3 +1,455 @@
-from django.test import TestCase
+import shutil
+import tempfile
+import threading
+import uuid
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from expenses.models import (
+    Budget, DailyRollup, Expense, ImportJob, MonthlyCategoryTotal, MonthlyMerchantTotal, RecurringExpense,
+)
+from expenses.sampledata import seed_user
+from . import hashers
+from .authentication import cached_row, user_cache
+from . import deletion
+from .models import AccountDeletion, LazyUser
+from .throttling import buckets
+from .tokens import BloomFilter, RefreshToken, blacklist_filter, purge_expired
+
+User = get_user_model()
+
+PASSWORD = "pass12345!"
+
+
+# ─────────────────────────────────────────
+# Query counts
+# ─────────────────────────────────────────
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class EndpointQueryCountTests(TestCase):
+    """Pins the queries behind every users endpoint; see the expenses suite."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="owner", email="owner@example.com", password=PASSWORD
+        )
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+        # A freshly synced blacklist filter that will not sync mid-test.
+        patcher = mock.patch.dict(blacklist_filter.config, SYNC_SECONDS=3600)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        blacklist_filter.reset()
+        blacklist_filter.sync()
+        # Counted with the user's row cached, as between its expiries.
+        patcher = mock.patch.object(user_cache, "row_ttl", 3600)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        cached_row(self.user.pk)
+
+    def assertQueries(self, count, method, url, data=None, status=200):
+        with self.assertNumQueries(count):
+            response = getattr(self.client, method)(url, data, format="json")
+        self.assertEqual(response.status_code, status)
+        return response
+
+    def test_register_and_login(self):
+        anonymous = APIClient()
+        with self.assertNumQueries(3):
+            response = anonymous.post("/api/users/register/", {
+                "email": "new@example.com", "first_name": "New", "last_name": "User",
+                "password": "Xx-pass-12345", "confirm_password": "Xx-pass-12345",
+            }, format="json")
+        self.assertEqual(response.status_code, 201)
+        with self.assertNumQueries(2):
+            response = anonymous.post(
+                "/api/users/login/", {"email": "owner@example.com", "password": PASSWORD}, format="json"
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def test_refresh_and_logout(self):
+        self.assertQueries(
+            10, "post", "/api/users/refresh/", {"refresh": str(RefreshToken.for_user(self.user))}
+        )
+        self.assertQueries(
+            5, "post", "/api/users/logout/", {"refresh": str(RefreshToken.for_user(self.user))}, status=204
+        )
+
+    def test_profile(self):
+        self.assertQueries(0, "get", "/api/users/profile/")
+        self.assertQueries(1, "patch", "/api/users/profile/", {"first_name": "Renamed"})
+        # And the row again: the save above dropped it from the cache.
+        self.assertQueries(3, "put", "/api/users/change-password/", {
+            "old_password": PASSWORD, "new_password": "Xx-pass-12345", "confirm_password": "Xx-pass-12345",
+        })
+
+    def test_delete_account_is_constant(self):
+        # Deactivate and queue; the data is purged in the background.
+        seed_user(self.user, expenses=3000)
+        response = self.assertQueries(4, "delete", "/api/users/profile/", status=202)
+        self.assertQueries(1, "get", response["Location"])
+
+
+# ─────────────────────────────────────────
+# Token-backed users
+# ─────────────────────────────────────────
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class LazyJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="owner", email="owner@example.com", password=PASSWORD, first_name="Ada"
+        )
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+
+    def test_user_row_is_read_once_per_ttl(self):
+        def user_queries():
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.get("/api/expenses/").status_code, 200)
+            return [q for q in queries if User._meta.db_table in q["sql"]]
+
+        self.assertEqual(len(user_queries()), 1)
+        self.assertEqual(user_queries(), [])
+        with mock.patch.object(user_cache, "row_ttl", 0):
+            user_cache.forget(self.user.pk)
+            user_queries()
+            self.assertEqual(len(user_queries()), 1)
+
+    def test_fields_load_once_and_are_cached_without_the_password(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get("/api/users/profile/").json()["first_name"], "Ada")
+        with self.assertNumQueries(0):
+            self.client.get("/api/users/profile/")
+        self.assertNotIn("password", user_cache.row(self.user.id))
+
+        self.client.patch("/api/users/profile/", {"first_name": "Grace"}, format="json")
+        self.assertEqual(self.client.get("/api/users/profile/").json()["first_name"], "Grace")
+
+    def test_password_checks_read_the_database(self):
+        self.client.get("/api/users/profile/")
+        response = self.client.put("/api/users/change-password/", {
+            "old_password": PASSWORD, "new_password": "Xx-pass-12345", "confirm_password": "Xx-pass-12345",
+        }, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password("Xx-pass-12345"))
+
+    def test_deactivated_and_deleted_users_are_refused(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get("/api/expenses/").status_code, 401)
+        self.user.is_active = True
+        self.user.save()
+        self.assertEqual(self.client.get("/api/expenses/").status_code, 200)
+
+        self.assertEqual(self.client.delete("/api/users/profile/").status_code, 202)
+        self.assertEqual(self.client.get("/api/expenses/").status_code, 401)
+
+    def test_changes_behind_the_cache_are_seen_once_the_row_is_gone(self):
+        # As on another worker: the row was cached before the change, and
+        # expired or was evicted since.
+        self.client.get("/api/expenses/")
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        user_cache.clear()
+        self.assertEqual(self.client.get("/api/expenses/").status_code, 401)
+
+        User.objects.filter(pk=self.user.pk).delete()
+        user_cache.clear()
+        response = self.client.post("/api/expenses/", {
+            "amount": "1.00", "category": "OTHER", "date": timezone.now().date().isoformat(),
+        }, format="json")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data["detail"].code, "user_not_found")
+
+    def test_request_user_is_lazy(self):
+        user = LazyUser.from_db("default", ["id"], [self.user.id])
+        self.assertEqual(user.get_deferred_fields(), {
+            f.attname for f in User._meta.concrete_fields if f.attname != "id"
+        })
+        with self.assertNumQueries(1):
+            self.assertEqual((user.email, user.first_name, user.is_active), ("owner@example.com", "Ada", True))
+        self.assertEqual(user.get_deferred_fields(), {"password"})
+
+
+# ─────────────────────────────────────────
+# Refresh-token store
+# ─────────────────────────────────────────
+class TokenStoreTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="owner", email="owner@example.com", password=PASSWORD)
+        patcher = mock.patch.dict(blacklist_filter.config, SYNC_SECONDS=3600)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        blacklist_filter.reset()
+        blacklist_filter.sync()
+
+    def blacklisted_elsewhere(self, pk=None):
+        """A token blacklisted by another process, behind the filter's back."""
+        jti = uuid.uuid4().hex
+        token = OutstandingToken.objects.create(
+            user=self.user, jti=jti, token="-", expires_at=timezone.now() + timedelta(days=1)
+        )
+        BlacklistedToken.objects.create(id=pk, token=token)
+        return jti
+
+    def test_rotated_tokens_are_refused(self):
+        client = APIClient()
+        refresh = str(RefreshToken.for_user(self.user))
+        self.assertEqual(client.post("/api/users/refresh/", {"refresh": refresh}).status_code, 200)
+        self.assertEqual(client.post("/api/users/refresh/", {"refresh": refresh}).status_code, 401)
+
+    def test_filter_answers_from_memory_and_catches_up(self):
+        with self.assertNumQueries(0):
+            self.assertIs(blacklist_filter.check(uuid.uuid4().hex), False)
+
+        jti = self.blacklisted_elsewhere()
+        self.assertIs(blacklist_filter.check(jti), False)  # not synced yet
+        blacklist_filter.sync()
+        self.assertIsNone(blacklist_filter.check(jti))  # a Bloom hit: ask the database
+        with self.assertRaises(TokenError):
+            RefreshToken.check_blacklist(mock.Mock(payload={"jti": jti}))
+        self.assertIs(blacklist_filter.check(jti), True)  # remembered
+
+    def test_catch_up_rereads_ids_committed_out_of_order(self):
+        first = BlacklistedToken.objects.order_by("-id").values_list("id", flat=True).first() or 0
+        later = self.blacklisted_elsewhere(pk=first + 2)
+        blacklist_filter.sync()
+        self.assertIsNone(blacklist_filter.check(later))
+
+        earlier = self.blacklisted_elsewhere(pk=first + 1)
+        blacklist_filter.sync()
+        self.assertIsNone(blacklist_filter.check(earlier))
+        self.assertEqual(blacklist_filter.gaps, {})
+
+    def test_bloom_filter_false_positive_rate(self):
+        bloom = BloomFilter(10_000, 0.01)
+        for i in range(10_000):
+            bloom.add(f"in-{i}")
+        self.assertTrue(all(f"in-{i}" in bloom for i in range(10_000)))
+        false_positives = sum(f"out-{i}" in bloom for i in range(10_000))
+        self.assertLess(false_positives, 200)
+
+    def test_purge_deletes_expired_tokens_in_batches(self):
+        now = timezone.now()
+        tokens = [
+            OutstandingToken.objects.create(
+                user=self.user, jti=f"jti-{i}", token="-", expires_at=now + timedelta(hours=offset)
+            )
+            for i, offset in enumerate((-3, -2, -2, -1, -1, 5, 6))
+        ]
+        for token in tokens[::2]:
+            BlacklistedToken.objects.create(token=token)
+
+        # Three batches, each: read ids, then (savepoint) delete blacklisted, delete.
+        with self.assertNumQueries(3 * 5):
+            self.assertEqual(purge_expired(batch_size=2), 5)
+        self.assertEqual(
+            list(OutstandingToken.objects.values_list("jti", flat=True)), ["jti-5", "jti-6"]
+        )
+        self.assertEqual(BlacklistedToken.objects.get().token.jti, "jti-6")
+
+        out = StringIO()
+        call_command("purge_tokens", stdout=out)
+        self.assertIn("Deleted 0 expired tokens", out.getvalue())
+
+
+# ─────────────────────────────────────────
+# Password hashing and auth throttles
+# ─────────────────────────────────────────
+FAST_PBKDF2 = {"PROFILE": "pbkdf2", "PBKDF2_ITERATIONS": 1000}
+THROTTLES = {"ENABLED": True, "IP": {"BURST": 4, "PER_MINUTE": 60}, "ACCOUNT": {"BURST": 1, "PER_MINUTE": 1}}
+
+
+@override_settings(
+    PASSWORD_HASHERS=["users.hashers.PBKDF2PasswordHasher", "django.contrib.auth.hashers.MD5PasswordHasher"],
+    PASSWORD_HASHING=FAST_PBKDF2,
+)
+class PasswordHashingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="owner", email="owner@example.com", password=PASSWORD)
+
+    def login(self, password=PASSWORD):
+        return APIClient().post(
+            "/api/users/login/", {"email": "owner@example.com", "password": password}, format="json"
+        )
+
+    def test_login_rehashes_outdated_hashes(self):
+        User.objects.filter(pk=self.user.pk).update(password=make_password(PASSWORD, hasher="md5"))
+        self.assertEqual(self.login().status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$1000$"))
+
+        with self.settings(PASSWORD_HASHING={**FAST_PBKDF2, "PBKDF2_ITERATIONS": 2000}):
+            self.assertEqual(self.login().status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$2000$"))
+
+        self.assertEqual(self.login("wrong-password").status_code, 401)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$2000$"))
+
+    def test_hashing_runs_on_the_pool_and_sheds_load_past_its_queue(self):
+        pool = hashers.HashingPool(workers=1, queue=0)
+        release, busy = threading.Event(), threading.Event()
+
+        def hold():
+            busy.set()
+            release.wait(5)
+
+        holder = threading.Thread(target=pool.run, args=(hold,))
+        holder.start()
+        busy.wait(5)
+        try:
+            with mock.patch.object(hashers, "hashing_pool", pool):
+                response = self.login()
+        finally:
+            release.set()
+            holder.join()
+        self.assertEqual(response.status_code, 503)
+
+        with mock.patch.object(hashers, "hashing_pool", pool):
+            self.assertEqual(self.login().status_code, 200)
+        self.assertEqual(pool.run(threading.current_thread).name[:13], "password-hash")
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"], AUTH_THROTTLES=THROTTLES)
+class AuthThrottleTests(TestCase):
+    def setUp(self):
+        buckets.clear()
+        self.client = APIClient()
+
+    def login(self, email):
+        return self.client.post("/api/users/login/", {"email": email, "password": PASSWORD}, format="json")
+
+    def test_token_bucket_refills(self):
+        self.assertEqual(buckets.take("k", burst=2, per_second=1, now=100), 0)
+        self.assertEqual(buckets.take("k", burst=2, per_second=1, now=100), 0)
+        self.assertEqual(buckets.take("k", burst=2, per_second=1, now=100.25), 0.75)
+        self.assertEqual(buckets.take("k", burst=2, per_second=1, now=101), 0)
+        self.assertEqual(buckets.take("k", burst=2, per_second=1, now=1000), 0)  # capped at the burst
+        self.assertEqual(buckets.take("k", burst=2, per_second=1, now=1000), 0)
+        self.assertGreater(buckets.take("k", burst=2, per_second=1, now=1000), 0)
+
+    def test_floods_are_refused_before_any_hashing(self):
+        self.assertEqual(self.login("a@example.com").status_code, 401)
+        with mock.patch("django.contrib.auth.hashers.MD5PasswordHasher.verify") as verify, \
+                self.assertNumQueries(0):
+            response = self.login("A@example.com ")  # the same account
+        verify.assert_not_called()
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+
+        self.assertEqual(self.login("b@example.com").status_code, 401)
+        self.assertEqual(self.login("c@example.com").status_code, 401)
+        # The refused request took an IP token too; the IP's burst is spent.
+        self.assertEqual(self.login("d@example.com").status_code, 429)
+        self.assertEqual(
+            APIClient(REMOTE_ADDR="10.0.0.2").post(
+                "/api/users/login/", {"email": "e@example.com", "password": PASSWORD}, format="json"
+            ).status_code,
+            401,
+        )
+
+    def test_forwarded_for_is_trusted_only_behind_configured_proxies(self):
+        def statuses():
+            buckets.clear()
+            client = APIClient(REMOTE_ADDR="10.0.0.9")
+            return [
+                client.post(
+                    "/api/users/login/", {"email": f"{n}@example.com", "password": PASSWORD},
+                    format="json", HTTP_X_FORWARDED_FOR=f"198.51.100.{n}",
+                ).status_code
+                for n in range(5)
+            ]
+
+        # Spoofed headers straight from a client all count against its address.
+        self.assertEqual(statuses(), [401] * 4 + [429])
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, "NUM_PROXIES": 1}):
+            self.assertEqual(statuses(), [401] * 5)
+
+
+# ─────────────────────────────────────────
+# Account deletion
+# ─────────────────────────────────────────
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class AccountDeletionTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        self.enterContext(override_settings(MEDIA_ROOT=media))
+        self.user = User.objects.create_user(username="owner", email="owner@example.com", password=PASSWORD)
+        self.other = User.objects.create_user(username="other", email="other@example.com", password=PASSWORD)
+        for user in (self.user, self.other):
+            seed_user(user, expenses=40)
+            ImportJob.objects.create(owner=user, file=SimpleUploadedFile("s.csv", b"date,amount\n"))
+            RefreshToken.for_user(user).blacklist()
+            RefreshToken.for_user(user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+        self.sleep = self.enterContext(mock.patch.object(deletion.time, "sleep"))
+
+    def owned_rows(self, user):
+        return {
+            model.__name__: model.objects.filter(owner=user).count()
+            for model in (
+                Expense, DailyRollup, MonthlyCategoryTotal, MonthlyMerchantTotal,
+                Budget, RecurringExpense, ImportJob,
+            )
+        } | {
+            "OutstandingToken": OutstandingToken.objects.filter(user=user).count(),
+            "BlacklistedToken": BlacklistedToken.objects.filter(token__user=user).count(),
+        }
+
+    def test_account_is_revoked_at_once_and_purged_in_chunks(self):
+        rows = self.owned_rows(self.user)
+        others = self.owned_rows(self.other)
+        upload = ImportJob.objects.get(owner=self.user).file
+
+        response = self.client.delete("/api/users/profile/")
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(self.client.get("/api/expenses/").status_code, 401)
+        refresh = str(RefreshToken.for_user(self.user))
+        self.assertEqual(APIClient().post("/api/users/refresh/", {"refresh": refresh}).status_code, 401)
+        status = self.client.get(response["Location"]).json()
+        self.assertEqual(status["status"], "PENDING")
+
+        job = deletion.run_deletion(status["id"], chunk_size=7)
+
+        # The purge waited for every worker to refuse the tokens.
+        self.assertAlmostEqual(self.sleep.call_args.args[0], user_cache.row_ttl, delta=1)
+        self.assertEqual(job.status, AccountDeletion.Status.COMPLETED)
+        self.assertEqual(job.rows_deleted, sum(rows.values()) + 1)  # and the refresh above
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        self.assertFalse(upload.storage.exists(upload.name))
+        self.assertEqual(set(self.owned_rows(self.user).values()), {0})
+        self.assertEqual(self.owned_rows(self.other), others)
+        self.assertEqual(APIClient().get(response["Location"]).json()["status"], "COMPLETED")
+
+    def test_interrupted_deletion_resumes(self):
+        job = deletion.request_deletion(self.user)
+        AccountDeletion.objects.filter(pk=job.pk).update(
+            status=AccountDeletion.Status.RUNNING, rows_deleted=10,
+            updated_at=timezone.now() - deletion.STALE_AFTER * 2,
+        )
+        self.assertEqual(list(deletion.pending_jobs()), [job])
+
+        out = StringIO()
+        call_command("process_deletions", stdout=out)
+
+        self.assertIn(f"deletion {job.pk}: COMPLETED", out.getvalue())
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        self.assertEqual(deletion.pending_jobs().count(), 0)
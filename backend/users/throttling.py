@@ -0,0 +1,103 @@
+"""
+Token-bucket throttles for the endpoints that hash passwords.
+
+Each client IP and each account has a bucket of ``BURST`` tokens, refilled
+at ``PER_MINUTE``. The account is the email posted to login or register, or
+the signed-in user for a password change. A request takes a token from
+each bucket or is refused with 429 and a ``Retry-After``. DRF checks
+throttles before the view runs, so a refused request costs two cache
+lookups and never reaches a hasher.
+
+Buckets live where the response cache lives: a per-process LRU unless
+``CACHES`` is configured. With several workers, configure a shared cache
+for a shared limit. Its read-then-write can let a few extra requests
+through under contention, which is fine for flood control.
+"""
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+
+from expenses.cache import MISSING, build_backend
+
+DEFAULTS = {
+    "ENABLED": True,
+    "BACKEND": "auto",
+    "ALIAS": "default",
+    "MAX_ENTRIES": 100_000,
+    "TIMEOUT": 3600,
+    "IP": {"BURST": 20, "PER_MINUTE": 10},
+    "ACCOUNT": {"BURST": 5, "PER_MINUTE": 1},
+}
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, "AUTH_THROTTLES", {})}
+
+
+class TokenBuckets:
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+
+    def take(self, key, burst, per_second, now=None):
+        """Take a token from ``key``'s bucket; returns 0, or the seconds until one is due."""
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self.backend.get(key)
+            tokens, updated = (burst, now) if entry is MISSING else entry
+            tokens = min(burst, tokens + (now - updated) * per_second)
+            if tokens >= 1:
+                self.backend.set(key, (tokens - 1, now))
+                return 0.0
+            self.backend.set(key, (tokens, now))
+            return (1 - tokens) / per_second
+
+    def clear(self):
+        self.backend.clear()
+
+
+buckets = TokenBuckets(build_backend(_config()))
+
+
+class TokenBucketThrottle(BaseThrottle):
+    scope = None  # "IP" or "ACCOUNT"
+
+    def get_key(self, request):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        config = _config()
+        key = self.get_key(request) if config["ENABLED"] else None
+        if key is None:
+            return True
+        rate = config[self.scope]
+        self.delay = buckets.take(
+            f"auth-throttle:{self.scope.lower()}:{key}", rate["BURST"], rate["PER_MINUTE"] / 60
+        )
+        return not self.delay
+
+    def wait(self):
+        return self.delay
+
+
+class IPThrottle(TokenBucketThrottle):
+    scope = "IP"
+
+    def get_key(self, request):
+        return self.get_ident(request)
+
+
+class AccountThrottle(TokenBucketThrottle):
+    scope = "ACCOUNT"
+
+    def get_key(self, request):
+        if request.user.is_authenticated:
+            return f"user:{request.user.pk}"
+        email = request.data.get("email") if hasattr(request.data, "get") else None
+        if not isinstance(email, str) or not email.strip():
+            return None
+        # Hashed: cache keys must not carry arbitrary client input.
+        return hashlib.blake2b(email.strip().lower().encode(), digest_size=16).hexdigest()
@@ -0,0 +1,254 @@
+"""
+Refresh-token store.
+
+Rotation blacklists a refresh token on every refresh and logout, so
+``OutstandingToken`` and ``BlacklistedToken`` grow by a row or two per
+call. ``purge_expired`` deletes the expired ones in batches. Schedule
+``python manage.py purge_tokens``.
+
+``RefreshToken`` answers "is this token blacklisted?" from memory where
+it can. Each process keeps a Bloom filter of every blacklisted token that
+has not expired, plus an LRU of the most recent ones. A token missing from
+the filter is certainly not blacklisted, so the database is asked only on
+a filter hit the LRU cannot confirm. The filter takes in other processes'
+blacklistings at most ``SYNC_SECONDS`` after they commit. Within that
+window, a token blacklisted elsewhere can still be refreshed here.
+"""
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken as BaseRefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+DEFAULTS = {
+    "ENABLED": True,
+    "SYNC_SECONDS": 1.0,
+    "FALSE_POSITIVE_RATE": 0.01,
+    "MIN_CAPACITY": 100_000,
+    "RECENT": 10_000,
+    # A gap in BlacklistedToken ids is a transaction still committing until
+    # it is this old; after that it is taken to have rolled back.
+    "GAP_SECONDS": 60,
+}
+PURGE_BATCH_SIZE = 5000
+
+
+# ─────────────────────────────────────────
+# Blacklist filter
+# ─────────────────────────────────────────
+class BloomFilter:
+    def __init__(self, capacity, false_positive_rate):
+        self.capacity = capacity
+        self.size = math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class BlacklistFilter:
+    """
+    ``check(jti)`` is True (blacklisted), False (certainly not) or None
+    (ask the database).
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget everything; the next check reloads from the database."""
+        with self._lock:
+            self.bloom = None
+            self.recent = OrderedDict()
+            self.seen_upto = 0
+            self.gaps = {}
+            self.synced_at = 0.0
+
+    def check(self, jti):
+        if time.monotonic() - self.synced_at >= self.config["SYNC_SECONDS"]:
+            self.sync()
+        with self._lock:
+            if jti in self.recent:
+                return True
+            return None if jti in self.bloom else False
+
+    def add(self, jti, committed=True):
+        """
+        Note a blacklisted token. Until ``committed``, it only goes into the
+        Bloom filter: a rollback then costs one database check, not a
+        wrongly refused token.
+        """
+        with self._lock:
+            if self.bloom is not None:
+                self.bloom.add(jti)
+            if committed:
+                self.recent[jti] = None
+                self.recent.move_to_end(jti)
+                while len(self.recent) > self.config["RECENT"]:
+                    self.recent.popitem(last=False)
+
+    def sync(self):
+        with self._lock:
+            if self.bloom is None or self.bloom.count > self.bloom.capacity:
+                self._load()
+            else:
+                self._catch_up()
+            self.synced_at = time.monotonic()
+
+    def _load(self):
+        # Tokens blacklisted more than a refresh lifetime ago have expired,
+        # and expired tokens are rejected before the blacklist is consulted.
+        cutoff = timezone.now() - api_settings.REFRESH_TOKEN_LIFETIME
+        rows = []
+        for pk, jti, blacklisted_at in (
+            BlacklistedToken.objects.order_by("-id")
+            .values_list("id", "token__jti", "blacklisted_at").iterator(chunk_size=10_000)
+        ):
+            if blacklisted_at < cutoff:
+                break
+            rows.append((pk, jti))
+        capacity = max(2 * len(rows), self.config["MIN_CAPACITY"])
+        self.bloom = BloomFilter(capacity, self.config["FALSE_POSITIVE_RATE"])
+        for _, jti in rows:
+            self.bloom.add(jti)
+        self.seen_upto = max((pk for pk, _ in rows), default=self._last_id())
+        self.gaps = {}
+
+    def _last_id(self):
+        return BlacklistedToken.objects.order_by("-id").values_list("id", flat=True).first() or 0
+
+    def _catch_up(self):
+        # Ids are allocated before commit, so a later id can be visible
+        # before an earlier one. Everything after the first unexplained gap
+        # is read again until the gap fills or ages out.
+        rows = list(
+            BlacklistedToken.objects.filter(id__gt=self.seen_upto)
+            .order_by("id").values_list("id", "token__jti")
+        )
+        now = time.monotonic()
+        ids = set()
+        for pk, jti in rows:
+            self.bloom.add(jti)
+            ids.add(pk)
+        if ids:
+            for pk in range(self.seen_upto + 1, max(ids)):
+                if pk not in ids:
+                    self.gaps.setdefault(pk, now)
+        self.gaps = {
+            pk: noticed for pk, noticed in self.gaps.items()
+            if pk not in ids and now - noticed < self.config["GAP_SECONDS"]
+        }
+        last = max(ids, default=self.seen_upto)
+        self.seen_upto = min(self.gaps) - 1 if self.gaps else last
+
+
+blacklist_filter = BlacklistFilter({**DEFAULTS, **getattr(settings, "TOKEN_BLACKLIST_FILTER", {})})
+
+
+# ─────────────────────────────────────────
+# Tokens
+# ─────────────────────────────────────────
+class RefreshToken(BaseRefreshToken):
+    """
+    simplejwt's ``RefreshToken``, with the blacklist check answered by
+    ``blacklist_filter`` where it can. It also records outstanding and
+    blacklisted tokens by user id, without loading the user each time.
+    """
+
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        blacklisted = blacklist_filter.check(jti) if blacklist_filter.config["ENABLED"] else None
+        if blacklisted is None:
+            blacklisted = BlacklistedToken.objects.filter(token__jti=jti).exists()
+            if blacklisted:
+                blacklist_filter.add(jti)
+        if blacklisted:
+            raise TokenError(_("Token is blacklisted"))
+
+    def _outstanding(self):
+        return OutstandingToken.objects.get_or_create(
+            jti=self.payload[api_settings.JTI_CLAIM],
+            defaults={
+                "user_id": self.payload.get(api_settings.USER_ID_CLAIM),
+                "created_at": self.current_time,
+                "token": str(self),
+                "expires_at": datetime_from_epoch(self.payload["exp"]),
+            },
+        )
+
+    def outstand(self):
+        return self._outstanding()
+
+    def blacklist(self):
+        token, _ = self._outstanding()
+        result = BlacklistedToken.objects.get_or_create(token=token)
+        jti = token.jti
+        blacklist_filter.add(jti, committed=False)
+        transaction.on_commit(lambda: blacklist_filter.add(jti))
+        return result
+
+
+# ─────────────────────────────────────────
+# Purge
+# ─────────────────────────────────────────
+def purge_expired(batch_size=PURGE_BATCH_SIZE, pause=0.0):
+    """
+    Delete expired outstanding tokens and their blacklist entries; returns
+    the number of outstanding tokens deleted.
+
+    Tokens are created with a fixed lifetime, so they expire in id order.
+    Each batch reads the oldest ``batch_size`` ids and deletes the expired
+    prefix by id range. The walk stops at the first token still valid, so no
+    batch scans the unexpired rest of the table. ``pause`` sleeps between
+    batches to leave room for other writers.
+    """
+    table = connection.ops.quote_name(OutstandingToken._meta.db_table)
+    deleted = 0
+    while True:
+        now = timezone.now()
+        batch = list(
+            OutstandingToken.objects.order_by("id")
+            .values_list("id", "expires_at")[:batch_size]
+        )
+        expired = 0
+        for _, expires_at in batch:
+            if expires_at > now:
+                break
+            expired += 1
+        if expired:
+            last = batch[expired - 1][0]
+            with transaction.atomic():
+                BlacklistedToken.objects.filter(token_id__lte=last).delete()
+                # The blacklist rows are gone, so skip the collector's
+                # cascade lookup and delete the range directly.
+                with connection.cursor() as cursor:
+                    cursor.execute(f"DELETE FROM {table} WHERE id <= %s", [last])
+            deleted += expired
+        if expired < batch_size:
+            return deleted
+        if pause:
+            time.sleep(pause)
@@ -1,7 +1,7 @@
 from django.urls import path
 from .views import (
     RegisterView, LoginView, RefreshView,
-    LogoutView, ProfileView, PasswordChangeView,
+    LogoutView, ProfileView, PasswordChangeView, AccountDeletionView,
 )
 
 urlpatterns = [
@@ -11,4 +11,5 @@ urlpatterns = [
     path("logout/",   LogoutView.as_view()),
     path("profile/",       ProfileView.as_view()),
     path("change-password/", PasswordChangeView.as_view()),
+    path("deletions/<uuid:pk>/", AccountDeletionView.as_view()),
 ]
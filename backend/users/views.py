@@ -5,7 +5,6 @@ from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
 )
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.exceptions import TokenError, InvalidToken
 
 from .serializers import (
@@ -13,8 +12,14 @@ from .serializers import (
     EmailLoginSerializer,
     ProfileSerializer,
     PasswordChangeSerializer,
+    RotatingRefreshSerializer,
+    AccountDeletionSerializer,
 )
+from .deletion import request_deletion
+from .models import AccountDeletion
 from .services import register_user, change_password
+from .throttling import AccountThrottle, IPThrottle
+from .tokens import RefreshToken
 
 
 # ─────────────────────────────
@@ -23,6 +28,8 @@ from .services import register_user, change_password
 class RegisterView(generics.CreateAPIView):
     serializer_class = RegisterSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [IPThrottle, AccountThrottle]
+    query_budget = 4
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -50,6 +57,8 @@ class RegisterView(generics.CreateAPIView):
 class LoginView(TokenObtainPairView):
     serializer_class = EmailLoginSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [IPThrottle, AccountThrottle]
+    query_budget = 2 + 1  # and rehashing an outdated password hash
 
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -72,7 +81,9 @@ class LoginView(TokenObtainPairView):
 # Token refresh
 # ─────────────────────────────
 class RefreshView(TokenRefreshView):
+    serializer_class = RotatingRefreshSerializer
     permission_classes = [permissions.AllowAny]
+    query_budget = 10 + 2  # and the blacklist filter's periodic sync
 
 
 # ─────────────────────────────
@@ -80,6 +91,7 @@ class RefreshView(TokenRefreshView):
 # ─────────────────────────────
 class LogoutView(generics.GenericAPIView):
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 1 + 5 + 2  # the user's row, and the blacklist filter's periodic sync
 
     def post(self, request):
         refresh_token = request.data.get("refresh")
@@ -103,6 +115,7 @@ class LogoutView(generics.GenericAPIView):
 class ProfileView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = ProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = {"GET": 1, "PUT": 2, "PATCH": 2, "DELETE": 5}
 
     def get_object(self):
         return self.request.user
@@ -122,8 +135,25 @@ class ProfileView(generics.RetrieveUpdateDestroyAPIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def destroy(self, request, *args, **kwargs):
-        request.user.delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
+        # The account is deactivated now and its data purged in the background.
+        job = request_deletion(request.user)
+        return Response(
+            AccountDeletionSerializer(job).data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={"Location": f"/api/users/deletions/{job.pk}/"},
+        )
+
+
+# ─────────────────────────────
+# Account deletion status — by its random id, as the account's tokens
+# no longer authenticate
+# ─────────────────────────────
+class AccountDeletionView(generics.RetrieveAPIView):
+    serializer_class = AccountDeletionSerializer
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+    queryset = AccountDeletion.objects.all()
+    query_budget = 1
 
 
 # ─────────────────────────────
@@ -132,6 +162,8 @@ class ProfileView(generics.RetrieveUpdateDestroyAPIView):
 class PasswordChangeView(generics.UpdateAPIView):
     serializer_class = PasswordChangeSerializer
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [IPThrottle, AccountThrottle]
+    query_budget = 4
 
     def get_object(self):
         return self.request.user